@@ -1,66 +1,402 @@
 """
 Rembg 배경 제거 API 서버
 """
+import os
+import json
+import base64
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import Response
-from rembg import remove
-from PIL import Image
+from fastapi.responses import Response, StreamingResponse
+from rembg import remove, new_session
+from rembg.sessions.base import BaseSession
+from PIL import Image, ImageFilter
 from io import BytesIO
 
-app = FastAPI(title="Rembg Background Removal API")
+# 시작 시 미리 로드할 모델 목록 (쉼표 구분, 첫 번째가 기본 모델)
+REMBG_MODELS = [
+    name.strip()
+    for name in os.getenv("REMBG_MODELS", "u2net").split(",")
+    if name.strip()
+]
+DEFAULT_MODEL = REMBG_MODELS[0] if REMBG_MODELS else "u2net"
+
+# 추론 워커 수 (기본: CPU 코어 수)와 대기열 한도
+CPU_COUNT = os.cpu_count() or 1
+REMBG_WORKERS = max(1, int(os.getenv("REMBG_WORKERS", str(CPU_COUNT))))
+REMBG_MAX_QUEUE = max(0, int(os.getenv("REMBG_MAX_QUEUE", str(REMBG_WORKERS * 2))))
+REMBG_RETRY_AFTER = int(os.getenv("REMBG_RETRY_AFTER", "2"))
+# 배치 요청당 최대 이미지 수
+REMBG_MAX_BATCH = max(1, int(os.getenv("REMBG_MAX_BATCH", "32")))
+# 축소 마스크 모드 기본값: 긴 변이 이 값보다 크면 축소본으로 추론 (0 = 사용 안 함)
+REMBG_MAX_SIDE = max(0, int(os.getenv("REMBG_MAX_SIDE", "0")))
+
+# ONNX Runtime intra-op 스레드를 워커 수에 맞게 분배 (코어 과다 구독 방지)
+# rembg의 new_session()이 OMP_NUM_THREADS를 읽어 SessionOptions에 반영한다.
+os.environ.setdefault("OMP_NUM_THREADS", str(max(1, CPU_COUNT // REMBG_WORKERS)))
+
+# 모델 이름 -> 미리 생성된 ONNX 세션
+_sessions: Dict[str, BaseSession] = {}
+
+# 추론 전용 스레드 풀 (ONNX Runtime은 추론 중 GIL을 해제)
+_executor: Optional[ThreadPoolExecutor] = None
+# 실행 중 + 대기 중인 요청 수 (이벤트 루프에서만 변경)
+_inflight = 0
+
+
+def load_sessions() -> None:
+    """설정된 모델의 세션을 생성하고 더미 추론으로 워밍업"""
+    dummy = Image.new("RGB", (64, 64), (255, 255, 255))
+    for model_name in REMBG_MODELS or [DEFAULT_MODEL]:
+        if model_name in _sessions:
+            continue
+        session = new_session(model_name)
+        # 첫 추론 시 발생하는 그래프 최적화/메모리 할당 비용을 미리 지불
+        remove(dummy, session=session)
+        _sessions[model_name] = session
+        print(f"✅ Loaded rembg model: {model_name}")
+
+
+def get_session(model_name: Optional[str]) -> BaseSession:
+    """이름으로 미리 로드된 세션 조회"""
+    name = model_name or DEFAULT_MODEL
+    session = _sessions.get(name)
+    if session is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown model: {name}. Available models: {', '.join(_sessions)}"
+        )
+    return session
+
+
+def free_slots() -> int:
+    """지금 확보할 수 있는 슬롯 수"""
+    return max(0, REMBG_WORKERS + REMBG_MAX_QUEUE - _inflight)
+
+
+def acquire_slot(count: int = 1) -> None:
+    """
+    추론 슬롯 확보
+
+    Args:
+        count: 확보할 슬롯 수
+
+    Raises:
+        HTTPException: 실행 중 + 대기 중 요청이 한도를 넘으면 503
+    """
+    global _inflight
+    if count > free_slots():
+        raise HTTPException(
+            status_code=503,
+            detail="Background removal queue is full. Please retry later.",
+            headers={"Retry-After": str(REMBG_RETRY_AFTER)}
+        )
+    _inflight += count
+
+
+def release_slot(*_) -> None:
+    """추론 슬롯 반환 (Future done 콜백으로도 사용)"""
+    global _inflight
+    _inflight -= 1
+
+
+# 출력 형식 → (MIME 타입, 파일 확장자)
+OUTPUT_FORMATS = {
+    "png": ("image/png", "png"),          # RGBA PNG (기본)
+    "webp": ("image/webp", "webp"),       # RGBA WebP (손실/무손실)
+    "mask": ("image/png", "png"),         # 단일 채널 8비트 마스크 PNG
+    "mask_raw": ("application/octet-stream", "raw"),  # 마스크 원시 바이트 (width × height)
+}
+MASK_OUTPUTS = ("mask", "mask_raw")
+
+
+@dataclass
+class RemoveOptions:
+    """배경 제거 요청 옵션"""
+    alpha_matting: bool = False
+    alpha_matting_foreground_threshold: int = 240
+    alpha_matting_background_threshold: int = 10
+    max_side: int = 0  # 0이면 원본 해상도로 추론
+    refine_edges: bool = False
+    output: str = "png"
+    compress_level: int = 6  # PNG zlib 압축 레벨 (0-9, 낮을수록 빠름)
+    lossless: bool = False  # WebP 무손실 여부
+    quality: int = 90  # WebP 품질 (무손실이면 압축 노력도)
+
+
+def parse_options(
+    alpha_matting: str,
+    alpha_matting_foreground_threshold: int,
+    alpha_matting_background_threshold: int,
+    max_side: int,
+    refine_edges: str,
+    output: str,
+    compress_level: int,
+    lossless: str,
+    quality: int
+) -> RemoveOptions:
+    """폼 파라미터를 RemoveOptions로 변환 및 검증"""
+    output = output.lower()
+    if output not in OUTPUT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid output: {output}. Allowed: {', '.join(OUTPUT_FORMATS)}"
+        )
+    return RemoveOptions(
+        alpha_matting=alpha_matting.lower() == "true",
+        alpha_matting_foreground_threshold=alpha_matting_foreground_threshold,
+        alpha_matting_background_threshold=alpha_matting_background_threshold,
+        max_side=max(0, max_side),
+        refine_edges=refine_edges.lower() == "true",
+        output=output,
+        compress_level=min(9, max(0, compress_level)),
+        lossless=lossless.lower() == "true",
+        quality=min(100, max(0, quality))
+    )
+
+
+def refine_mask_edges(mask: Image.Image, scale: float) -> Image.Image:
+    """
+    업스케일된 마스크의 계단 현상 보정
+
+    확대 배율에 비례해 블러한 뒤 중간 대역을 다시 늘려 경계를 부드럽지만 선명하게 만든다.
+    """
+    radius = max(1.0, scale / 2)
+    blurred = mask.filter(ImageFilter.GaussianBlur(radius))
+    low, high = 32, 224
+    lut = [
+        0 if v <= low else 255 if v >= high else round((v - low) * 255 / (high - low))
+        for v in range(256)
+    ]
+    return blurred.point(lut)
+
+
+def predict_mask(
+    image: Image.Image,
+    session: BaseSession,
+    options: RemoveOptions
+) -> Image.Image:
+    """입력 이미지와 같은 크기의 단일 채널(L) 마스크 추론"""
+    if options.alpha_matting:
+        # Alpha matting 결과의 알파 채널을 마스크로 사용
+        cutout = remove(
+            image,
+            session=session,
+            alpha_matting=True,
+            alpha_matting_foreground_threshold=options.alpha_matting_foreground_threshold,
+            alpha_matting_background_threshold=options.alpha_matting_background_threshold
+        )
+        return cutout.getchannel("A")
+    return remove(image, session=session, only_mask=True).convert("L")
+
+
+def downscaled_mask(
+    input_image: Image.Image,
+    session: BaseSession,
+    options: RemoveOptions
+) -> Image.Image:
+    """
+    축소본으로 마스크를 추론한 뒤 원본 크기로 확대
+
+    Returns:
+        원본 해상도의 L 마스크
+    """
+    small = input_image.convert("RGB")
+    small.thumbnail((options.max_side, options.max_side), Image.LANCZOS)
+
+    mask = predict_mask(small, session, options)
+    mask = mask.resize(input_image.size, Image.BILINEAR)
+    if options.refine_edges:
+        mask = refine_mask_edges(mask, input_image.width / small.width)
+    return mask
+
+
+def render_output(
+    input_image: Image.Image,
+    session: BaseSession,
+    options: RemoveOptions
+) -> Image.Image:
+    """
+    옵션에 따라 RGBA 결과 또는 L 마스크 생성
+
+    마스크 출력은 컷아웃 합성을 건너뛰고, 축소 모드는 마스크만 확대해 원본 픽셀에 적용한다.
+    """
+    downscale = options.max_side and max(input_image.size) > options.max_side
+
+    if options.output in MASK_OUTPUTS:
+        if downscale:
+            return downscaled_mask(input_image, session, options)
+        return predict_mask(input_image, session, options)
+
+    if downscale:
+        original = input_image.convert("RGBA")
+        original.putalpha(downscaled_mask(input_image, session, options))
+        return original
+
+    return remove(
+        input_image,
+        session=session,
+        alpha_matting=options.alpha_matting,
+        alpha_matting_foreground_threshold=options.alpha_matting_foreground_threshold,
+        alpha_matting_background_threshold=options.alpha_matting_background_threshold
+    )
+
+
+def encode_output(
+    image: Image.Image,
+    options: RemoveOptions
+) -> Tuple[bytes, Dict[str, str]]:
+    """
+    출력 형식에 맞게 인코딩
+
+    Returns:
+        (인코딩된 데이터, 추가 응답 헤더)
+    """
+    headers = {
+        "X-Image-Width": str(image.width),
+        "X-Image-Height": str(image.height)
+    }
+
+    if options.output == "mask_raw":
+        return image.tobytes(), {**headers, "X-Image-Mode": "L"}
+
+    output_buffer = BytesIO()
+    if options.output == "webp":
+        image.save(
+            output_buffer,
+            format="WEBP",
+            lossless=options.lossless,
+            quality=options.quality
+        )
+    else:
+        image.save(output_buffer, format="PNG", compress_level=options.compress_level)
+    return output_buffer.getvalue(), headers
+
+
+def process_image(
+    image_bytes: bytes,
+    session: BaseSession,
+    options: RemoveOptions
+) -> Tuple[bytes, Dict[str, str]]:
+    """
+    디코딩 → 배경 제거 → 인코딩 (워커 스레드에서 실행)
+
+    Returns:
+        (배경이 제거된 이미지 또는 마스크, 추가 응답 헤더)
+    """
+    input_image = Image.open(BytesIO(image_bytes))
+    output_image = render_output(input_image, session, options)
+    return encode_output(output_image, options)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """시작 시 모델 세션을 미리 로드하고 추론 스레드 풀 생성"""
+    global _executor
+    load_sessions()
+    _executor = ThreadPoolExecutor(
+        max_workers=REMBG_WORKERS,
+        thread_name_prefix="rembg"
+    )
+    yield
+    _executor.shutdown(wait=True)
+    _executor = None
+    _sessions.clear()
+
+
+app = FastAPI(title="Rembg Background Removal API", lifespan=lifespan)
 
 
 @app.get("/")
 async def health_check():
     """헬스 체크"""
-    return {"status": "ok", "service": "rembg"}
+    return {
+        "status": "ok",
+        "service": "rembg",
+        "models": list(_sessions),
+        "default_model": DEFAULT_MODEL,
+        "workers": REMBG_WORKERS,
+        "inflight": _inflight,
+        "max_queue": REMBG_MAX_QUEUE,
+        "max_batch": REMBG_MAX_BATCH
+    }
 
 
 @app.post("/remove")
 async def remove_background(
     file: UploadFile = File(...),
+    model: Optional[str] = Form(default=None),
     alpha_matting: str = Form(default="false"),
     alpha_matting_foreground_threshold: int = Form(default=240),
-    alpha_matting_background_threshold: int = Form(default=10)
+    alpha_matting_background_threshold: int = Form(default=10),
+    max_side: int = Form(default=REMBG_MAX_SIDE),
+    refine_edges: str = Form(default="false"),
+    output: str = Form(default="png"),
+    compress_level: int = Form(default=6),
+    lossless: str = Form(default="false"),
+    quality: int = Form(default=90)
 ):
     """
     이미지 배경 제거 API
 
     Args:
         file: 업로드된 이미지 파일
+        model: 사용할 모델 이름 (기본: REMBG_MODELS의 첫 번째 모델)
         alpha_matting: Alpha matting 활성화 ("true" or "false")
         alpha_matting_foreground_threshold: 전경 임계값 (0-255)
         alpha_matting_background_threshold: 배경 임계값 (0-255)
+        max_side: 긴 변이 이 값보다 크면 축소본으로 마스크를 추론 후 원본 크기로 확대 (0 = 사용 안 함)
+        refine_edges: 확대된 마스크 경계 보정 ("true" or "false")
+        output: 출력 형식 ("png", "webp", "mask", "mask_raw")
+        compress_level: PNG 압축 레벨 (0-9)
+        lossless: WebP 무손실 여부 ("true" or "false")
+        quality: WebP 품질 (0-100)
 
     Returns:
-        배경이 제거된 PNG 이미지
+        배경이 제거된 이미지 또는 마스크 (대기열이 가득 차면 503 + Retry-After)
+        mask_raw는 X-Image-Width / X-Image-Height 헤더로 크기를 전달
     """
+    session = get_session(model)
+    options = parse_options(
+        alpha_matting,
+        alpha_matting_foreground_threshold,
+        alpha_matting_background_threshold,
+        max_side,
+        refine_edges,
+        output,
+        compress_level,
+        lossless,
+        quality
+    )
+    acquire_slot()
+
     try:
         # 이미지 읽기
         image_bytes = await file.read()
-        input_image = Image.open(BytesIO(image_bytes))
 
-        # Alpha matting 파라미터 변환
-        use_alpha_matting = alpha_matting.lower() == "true"
-
-        # 배경 제거
-        output_image = remove(
-            input_image,
-            alpha_matting=use_alpha_matting,
-            alpha_matting_foreground_threshold=alpha_matting_foreground_threshold,
-            alpha_matting_background_threshold=alpha_matting_background_threshold
+        # 디코딩/추론/인코딩은 워커 스레드에서 실행 (이벤트 루프 블로킹 방지)
+        loop = asyncio.get_running_loop()
+        output_bytes, output_headers = await loop.run_in_executor(
+            _executor,
+            process_image,
+            image_bytes,
+            session,
+            options
         )
 
-        # PNG로 변환
-        output_buffer = BytesIO()
-        output_image.save(output_buffer, format="PNG")
-        output_bytes = output_buffer.getvalue()
-
+        media_type, extension = OUTPUT_FORMATS[options.output]
+        filename = os.path.splitext(file.filename or "image")[0]
         return Response(
             content=output_bytes,
-            media_type="image/png",
+            media_type=media_type,
             headers={
-                "Content-Disposition": f"attachment; filename=removed_{file.filename}"
+                "Content-Disposition": f"attachment; filename=removed_{filename}.{extension}",
+                **output_headers
             }
         )
 
@@ -69,6 +405,110 @@ async def remove_background(
             status_code=500,
             detail=f"Failed to process image: {str(e)}"
         )
+    finally:
+        release_slot()
+
+
+@app.post("/remove/batch")
+async def remove_background_batch(
+    files: List[UploadFile] = File(...),
+    model: Optional[str] = Form(default=None),
+    alpha_matting: str = Form(default="false"),
+    alpha_matting_foreground_threshold: int = Form(default=240),
+    alpha_matting_background_threshold: int = Form(default=10),
+    max_side: int = Form(default=REMBG_MAX_SIDE),
+    refine_edges: str = Form(default="false"),
+    output: str = Form(default="png"),
+    compress_level: int = Form(default=6),
+    lossless: str = Form(default="false"),
+    quality: int = Form(default=90)
+):
+    """
+    여러 이미지 배경 제거 API (하나의 multipart 요청)
+
+    Args:
+        files: 업로드된 이미지 파일 목록 (최대 REMBG_MAX_BATCH개)
+        model, alpha_matting, ...: /remove와 동일
+
+    Returns:
+        NDJSON 스트림. 처리가 끝나는 순서대로 한 줄씩 전송:
+        {"index": int, "filename": str, "status": "ok", "content_type": str,
+         "width": int, "height": int, "data": base64}
+        {"index": int, "filename": str, "status": "error", "error": str}
+    """
+    if len(files) > REMBG_MAX_BATCH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files. Maximum batch size is {REMBG_MAX_BATCH}"
+        )
+
+    session = get_session(model)
+    options = parse_options(
+        alpha_matting,
+        alpha_matting_foreground_threshold,
+        alpha_matting_background_threshold,
+        max_side,
+        refine_edges,
+        output,
+        compress_level,
+        lossless,
+        quality
+    )
+    media_type = OUTPUT_FORMATS[options.output][0]
+
+    # 요청 본문은 스트리밍 시작 전에 모두 읽어 둔다 (응답 중에는 UploadFile이 닫힐 수 있음)
+    inputs = [(upload.filename, await upload.read()) for upload in files]
+
+    # 남은 용량만큼만 슬롯을 잡고 (최소 1개), 나머지 이미지는 그 슬롯에서 차례로 처리
+    # 슬롯이 하나도 없을 때만 503이므로 큰 배치도 Retry-After 후 진행할 수 있다
+    reserved = min(len(inputs), free_slots())
+    acquire_slot(max(1, reserved))
+
+    # 완료 콜백이 결과를 큐에 넣고 다음 이미지를 같은 슬롯으로 제출,
+    # 남은 이미지가 없으면 슬롯 반환 (클라이언트가 중간에 끊어도 슬롯이 누수되지 않음)
+    loop = asyncio.get_running_loop()
+    results: "asyncio.Queue[Tuple[int, asyncio.Future]]" = asyncio.Queue()
+    queued = iter(range(len(inputs)))
+
+    def submit(index: int) -> None:
+        future = loop.run_in_executor(
+            _executor,
+            process_image,
+            inputs[index][1],
+            session,
+            options
+        )
+        future.add_done_callback(lambda done: on_done(index, done))
+
+    def on_done(index: int, future: asyncio.Future) -> None:
+        results.put_nowait((index, future))
+        next_index = next(queued, None)
+        if next_index is None:
+            release_slot()
+        else:
+            submit(next_index)
+
+    for index in itertools.islice(queued, max(1, reserved)):
+        submit(index)
+
+    async def stream_results() -> AsyncIterator[bytes]:
+        for _ in range(len(inputs)):
+            index, future = await results.get()
+            item = {"index": index, "filename": inputs[index][0]}
+            try:
+                output_bytes, output_headers = future.result()
+                item.update(
+                    status="ok",
+                    content_type=media_type,
+                    width=int(output_headers["X-Image-Width"]),
+                    height=int(output_headers["X-Image-Height"]),
+                    data=base64.b64encode(output_bytes).decode("ascii")
+                )
+            except Exception as e:
+                item.update(status="error", error=f"Failed to process image: {str(e)}")
+            yield (json.dumps(item) + "\n").encode("utf-8")
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.services.file_serving_service import (
+    FileInfo,
+    get_file_serving_service,
+    if_range_allows,
+    is_not_modified,
+    iter_file_range,
+    parse_range
+)
+from app.services.image_transform_service import get_image_transform_service
+
+router = APIRouter()
+file_serving = get_file_serving_service()
+image_transform = get_image_transform_service()
+
+
+def file_response(request: Request, info: FileInfo) -> Response:
+    """조건부 요청(304) / 바이트 범위(206) / 전체 응답(200) 선택"""
+    headers = info.headers()
+
+    if is_not_modified(
+        info,
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since")
+    ):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        byte_range = parse_range(request.headers.get("range"), info.size)
+    except ValueError:
+        return Response(
+            status_code=416,
+            headers={**headers, "Content-Range": f"bytes */{info.size}"}
+        )
+
+    if byte_range is None or not if_range_allows(request.headers.get("if-range"), info):
+        if request.method == "HEAD":
+            return Response(
+                headers={**headers, "Content-Length": str(info.size)},
+                media_type=info.content_type
+            )
+        return FileResponse(
+            info.full_path,
+            headers=headers,
+            media_type=info.content_type,
+            stat_result=info.stat
+        )
+
+    start, end = byte_range
+    headers.update({
+        "Content-Range": f"bytes {start}-{end}/{info.size}",
+        "Content-Length": str(end - start + 1),
+    })
+    if request.method == "HEAD":
+        return Response(status_code=206, headers=headers, media_type=info.content_type)
+
+    return StreamingResponse(
+        iter_file_range(info.full_path, start, end),
+        status_code=206,
+        headers=headers,
+        media_type=info.content_type
+    )
+
+
+@router.api_route("/{file_path:path}", methods=["GET", "HEAD"])
+async def serve_file(
+    file_path: str,
+    request: Request,
+    w: Optional[int] = Query(None, description="Resize to this width (thumbnail or export preset widths only; never upscales)"),
+    fmt: Optional[str] = Query(None, description="Output format: jpeg, webp or png"),
+    q: Optional[int] = Query(None, description="Output quality (allowed values only, see TRANSFORM_ALLOWED_QUALITIES)")
+):
+    """
+    Serve a stored file (local storage backend)
+    Strong ETags come from content hashes; content-addressed blob paths are
+    served with `Cache-Control: immutable`. Conditional requests get 304 and
+    single byte ranges get 206. Full responses go through FileResponse, which
+    uses the server's zero-copy path-send extension when available.
+
+    With `w`, `fmt` or `q` the image is resized/transcoded on the fly; results
+    are cached on disk and concurrent identical requests render once. Only
+    allow-listed widths and qualities are accepted so clients cannot fill the
+    cache or burn CPU with arbitrary parameter combinations.
+    """
+    info = await file_serving.get_file_info(file_path)
+    if info is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if w is not None or fmt is not None or q is not None:
+        info = await image_transform.get_transformed(file_path, info, width=w, fmt=fmt, quality=q)
+
+    return file_response(request, info)
@@ -1,20 +1,69 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi.responses import StreamingResponse, RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List, Optional
+from typing import List, Optional, Sequence
+from datetime import datetime, timezone
 
-from app.core.database import get_async_session
+from app.core.database import get_async_session, async_session_maker
 from app.core.auth import current_active_user
 from app.core.config import get_settings
 from app.models.user import User
 from app.models.image import Image
+from app.models.image_job import ImageJob
 from app.models.project import Project
-from app.schemas.image import ImageRead, ImageUploadResponse, CaptionGenerateRequest, CaptionGenerateResponse
-# from app.services.storage_service import storage_service
+from app.schemas.image import (
+    ImageRead,
+    ImageUploadResponse,
+    CaptionGenerateRequest,
+    CaptionGenerateResponse,
+    CaptionStreamRequest,
+    ImageJobStatus
+)
+from app.services.caption_stream_service import (
+    SSE_HEADERS,
+    get_caption_text_stream,
+    sse_event,
+    stream_caption_events
+)
+from app.services.job_service import TERMINAL_STATUSES, get_job_service
+from app.services.file_storage_service import get_file_storage
+from app.services.variant_service import VARIANT_PRESETS, get_variant_service
 # from app.services.credit_service import CreditService
 
 router = APIRouter()
 settings = get_settings()
+storage = get_file_storage()
+job_service = get_job_service()
+variant_service = get_variant_service()
+
+
+async def with_thumbnails(session: AsyncSession, images: Sequence[Image]) -> List[ImageRead]:
+    """
+    이미지 목록에 썸네일 URL 추가
+
+    합성 결과가 있으면 합성 이미지, 없으면 원본 기준. 처리 작업이 남긴 썸네일 URL을
+    사용하고 저장소는 조회하지 않는다. 작업 결과에 썸네일이 없는 완료된 이미지는
+    백그라운드에서 생성되고 thumbnail_urls는 null로 응답한다.
+    """
+    jobs = await job_service.get_latest_jobs(session, [image.id for image in images])
+    thumbnail_urls = []
+    for image in images:
+        job = jobs.get(image.id)
+        if job is not None and job.status not in TERMINAL_STATUSES:
+            # 파이프라인의 썸네일 단계가 곧 생성
+            thumbnail_urls.append(None)
+            continue
+        thumbnail_urls.append(variant_service.get_listing_thumbnail_urls(
+            image.processed_url or image.original_url,
+            (job.results or {}).get("thumbnails") if job is not None else None
+        ))
+    reads = []
+    for image, urls in zip(images, thumbnail_urls):
+        read = ImageRead.model_validate(image)
+        read.thumbnail_urls = urls
+        reads.append(read)
+    return reads
 
 
 @router.post("/upload", response_model=ImageUploadResponse, status_code=201)
@@ -22,12 +71,17 @@ async def upload_image(
     file: UploadFile = File(...),
     project_id: int = Form(...),
     style: Optional[str] = Form(None),
+    platform: str = Form("instagram"),
+    product_description: Optional[str] = Form(None),
+    caption_style: Optional[str] = Form(None),
     user: User = Depends(current_active_user),
     session: AsyncSession = Depends(get_async_session)
 ):
     """
     Upload an image for processing
-    Deducts credits and creates an image record
+    Deducts credits, stores the original and queues a processing job
+    (remove background → composite → caption). Poll GET /images/{id}/status
+    or subscribe to GET /images/{id}/status/stream for progress.
     """
     # Validate file type
     allowed_types = ["image/jpeg", "image/png", "image/jpg"]
@@ -56,10 +110,13 @@ async def upload_image(
             detail=f"Insufficient credits. Required: {credit_cost}, Available: {user.credits}"
         )
 
+    # 커밋 전에 실패하면 해제할 업로드 참조
+    uploaded_path = None
     try:
-        # TODO: Implement storage service integration
-        # For now, create placeholder URL
-        file_url = f"placeholder://uploads/{user.id}/{file.filename}"
+        # 원본 저장
+        saved = await storage.save_upload(file, user_id=str(user.id), folder="originals")
+        uploaded_path = saved.path
+        file_url = storage.get_file_url(saved.path)
 
         # Create image record
         db_image = Image(
@@ -73,25 +130,55 @@ async def upload_image(
         # Deduct credits (simplified - should use CreditService)
         user.credits -= credit_cost
 
+        await session.flush()
+
+        # 처리 작업 생성 (이미지와 같은 트랜잭션)
+        job = await job_service.create_job(
+            session,
+            db_image,
+            options={
+                "original_path": saved.path,
+                "original_sha256": saved.sha256,
+                "original_size": saved.size,
+                "filename": file.filename,
+                "style": style,
+                "platform": platform,
+                "product_description": product_description,
+                "caption_style": caption_style
+            }
+        )
+
         await session.commit()
+        # 커밋 후에는 이미지 레코드가 파일을 참조 (삭제 시 해제)
+        uploaded_path = None
         await session.refresh(db_image)
 
-        return ImageUploadResponse(
-            image_id=db_image.id,
-            original_url=db_image.original_url,
-            message="Image uploaded successfully. Processing will begin shortly."
-        )
-
     except HTTPException:
+        if uploaded_path:
+            await storage.discard_file(uploaded_path)
+        await session.rollback()
         raise
     except Exception as e:
         # Rollback transaction on error
+        if uploaded_path:
+            await storage.discard_file(uploaded_path)
         await session.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Failed to upload image: {str(e)}"
         )
 
+    # 커밋 후 큐 등록 (워커가 커밋 전 레코드를 읽지 않도록)
+    status = await job_service.submit(job.id)
+
+    return ImageUploadResponse(
+        image_id=db_image.id,
+        original_url=db_image.original_url,
+        job_id=job.id,
+        status=status,
+        message="Image uploaded successfully. Processing queued."
+    )
+
 
 @router.get("/", response_model=List[ImageRead])
 async def list_images(
@@ -112,7 +199,7 @@ async def list_images(
     result = await session.execute(query)
     images = result.scalars().all()
 
-    return images
+    return await with_thumbnails(session, images)
 
 
 @router.get("/{image_id}", response_model=ImageRead)
@@ -135,9 +222,171 @@ async def get_image(
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
 
+    return (await with_thumbnails(session, [image]))[0]
+
+
+@router.get("/{image_id}/status", response_model=ImageJobStatus)
+async def get_image_status(
+    image_id: int,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Get the latest processing job status for an image"""
+    result = await session.execute(
+        select(Image)
+        .join(Project)
+        .where(
+            Image.id == image_id,
+            Project.user_id == user.id
+        )
+    )
+    image = result.scalar_one_or_none()
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    job = await job_service.get_latest_job(session, image_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="No processing job for this image")
+
+    return ImageJobStatus(
+        image_id=image.id,
+        job_id=job.id,
+        status=job.status,
+        stage=job.stage,
+        progress=job.progress,
+        attempts=job.attempts or {},
+        error=job.error,
+        processed_url=image.processed_url,
+        caption=image.caption,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        updated_at=job.updated_at
+    )
+
+
+@router.get("/{image_id}/status/stream")
+async def stream_image_status(
+    image_id: int,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Stream processing job progress as Server-Sent Events
+    Emits a `status` event on every state change and closes after
+    the job succeeds or fails.
+    """
+    result = await session.execute(
+        select(Image.id)
+        .join(Project)
+        .where(
+            Image.id == image_id,
+            Project.user_id == user.id
+        )
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    async def event_stream():
+        async for event in job_service.watch_job(image_id):
+            yield sse_event("status", event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+async def get_processed_image(image_id: int, user: User, session: AsyncSession) -> Image:
+    """소유한 이미지 조회 (처리 완료 전이면 409)"""
+    result = await session.execute(
+        select(Image)
+        .join(Project)
+        .where(
+            Image.id == image_id,
+            Project.user_id == user.id
+        )
+    )
+    image = result.scalar_one_or_none()
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+    if not image.processed_url:
+        raise HTTPException(status_code=409, detail="Image is still processing")
     return image
 
 
+@router.get("/{image_id}/variants")
+async def list_variants(
+    image_id: int,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """List platform export variants (rendered on first request to each URL)"""
+    await get_processed_image(image_id, user, session)
+    return {
+        "image_id": image_id,
+        "variants": {
+            preset: {
+                "width": width,
+                "height": height,
+                "url": f"{settings.API_V1_STR}/images/{image_id}/variants/{preset}"
+            }
+            for preset, (width, height) in VARIANT_PRESETS.items()
+        }
+    }
+
+
+@router.get("/{image_id}/variants/{preset}")
+async def get_variant(
+    image_id: int,
+    preset: str,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Redirect to a platform export variant of the processed image
+    All presets are rendered together on the first request and stored under
+    deterministic paths; later requests redirect straight to the static file.
+    """
+    image = await get_processed_image(image_id, user, session)
+
+    # 사진(Unsplash) 배경 합성은 가장자리를 늘리지 않고 잘라서 채움
+    job = await job_service.get_latest_job(session, image_id)
+    composite = ((job.results or {}) if job is not None else {}).get("composite") or {}
+    photo_background = str(composite.get("background", "")).startswith("unsplash:")
+
+    url = await variant_service.get_variant_url(image.processed_url, preset, photo_background=photo_background)
+    return RedirectResponse(url=url, status_code=302)
+
+
+@router.get("/{image_id}/thumbnails/{width}")
+async def get_thumbnail(
+    image_id: int,
+    width: int,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Redirect to a WebP thumbnail of the image (processed if available, else original)
+    Available widths are 160, 320 and 640. All widths are rendered together on
+    the first request; the redirect target is a static, cacheable file.
+    """
+    result = await session.execute(
+        select(Image)
+        .join(Project)
+        .where(
+            Image.id == image_id,
+            Project.user_id == user.id
+        )
+    )
+    image = result.scalar_one_or_none()
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    url = await variant_service.get_thumbnail_url(image.processed_url or image.original_url, width)
+    return RedirectResponse(url=url, status_code=302)
+
+
 @router.delete("/{image_id}", status_code=204)
 async def delete_image(
     image_id: int,
@@ -158,15 +407,28 @@ async def delete_image(
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
 
-    # TODO: Delete files from storage
-    # if storage_service:
-    #     await storage_service.delete_file(image.original_url)
-    #     if image.processed_url:
-    #         await storage_service.delete_file(image.processed_url)
+    # 이미지가 참조하는 저장 파일 (작업 중간 결과 포함, 같은 파일은 한 번만)
+    file_paths = {
+        storage.path_from_url(url)
+        for url in (image.original_url, image.processed_url)
+        if url
+    }
+    jobs = await session.execute(select(ImageJob.results).where(ImageJob.image_id == image.id))
+    for results in jobs.scalars():
+        for stage_result in (results or {}).values():
+            if isinstance(stage_result, dict) and stage_result.get("path"):
+                file_paths.add(stage_result["path"])
+    file_paths.discard(None)
 
     await session.delete(image)
     await session.commit()
 
+    # 커밋 후 참조 해제 (다른 업로드와 공유하는 blob은 남음)
+    # 파일이 실제로 지워졌을 때만 그 파일에서 만든 변형/썸네일도 삭제
+    for file_path in file_paths:
+        if await storage.delete_file(file_path):
+            await variant_service.delete_derived(file_path)
+
     return None
 
 
@@ -239,3 +501,72 @@ async def generate_caption(
             status_code=500,
             detail=f"Failed to generate caption: {str(e)}"
         )
+
+
+@router.post("/caption/stream")
+async def stream_caption(
+    request: CaptionStreamRequest,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Stream caption generation as Server-Sent Events
+    Emits `token` events while the model writes and a `caption` event as soon as
+    each caption is complete, then `done` (or `error`). Credits are deducted only
+    after the stream completes successfully.
+    """
+    # Verify image exists and belongs to user
+    result = await session.execute(
+        select(Image)
+        .join(Project)
+        .where(
+            Image.id == request.image_id,
+            Project.user_id == user.id
+        )
+    )
+    image = result.scalar_one_or_none()
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    # Check if user has enough credits
+    credit_cost = settings.CREDIT_COSTS.get("caption_generation", 0.5)
+    if user.credits < credit_cost:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Insufficient credits. Required: {credit_cost}, Available: {user.credits}"
+        )
+
+    try:
+        chunks = get_caption_text_stream(
+            product_description=request.product_description,
+            platform=request.platform,
+            style=request.style,
+            length=request.length,
+            regenerate=request.regenerate
+        )
+    except (ValueError, ImportError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    image_id, user_id = image.id, user.id
+
+    async def save_caption(captions: List[str]):
+        # 요청 세션은 응답 본문 전송 전에 닫히므로 새 세션 사용
+        async with async_session_maker() as db:
+            db_image = await db.get(Image, image_id)
+            db_user = await db.get(User, user_id)
+            db_image.caption = captions[0]
+            db_image.caption_metadata = {
+                "platform": request.platform,
+                "style": request.style,
+                "length": request.length,
+                "captions": captions,
+                "generated_at": datetime.now(timezone.utc).isoformat()
+            }
+            db_user.credits -= credit_cost
+            await db.commit()
+
+    return StreamingResponse(
+        stream_caption_events(chunks, on_done=save_caption),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
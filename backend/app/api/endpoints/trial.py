@@ -1,30 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime, timedelta, timezone
 import secrets
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
-from app.core.database import get_async_session
+from app.core.database import get_async_session, async_session_maker
 from app.core.config import get_settings
 from app.models.trial_session import TrialSession
 from app.schemas.trial import (
     TrialSessionCreate,
     TrialSessionRead,
-    TrialSessionUploadResponse
+    TrialSessionUploadResponse,
+    TrialCaptionStreamRequest
 )
-from app.services.local_storage_service import get_local_storage
+from app.services.file_storage_service import get_file_storage
 from app.services.gemini_service import get_gemini_service
+from app.services.caption_stream_service import (
+    SSE_HEADERS,
+    get_caption_text_stream,
+    stream_caption_events
+)
 
 router = APIRouter()
 settings = get_settings()
-storage = get_local_storage()
+storage = get_file_storage("trial")
 
 # Gemini 서비스 lazy 초기화
 _gemini_instance = None
-_executor = ThreadPoolExecutor(max_workers=3)
 
 def get_gemini():
     global _gemini_instance
@@ -40,11 +44,6 @@ def get_gemini():
             raise
     return _gemini_instance
 
-async def run_in_threadpool(func, *args, **kwargs):
-    """동기 함수를 비동기로 실행"""
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(_executor, lambda: func(*args, **kwargs))
-
 
 @router.post("/upload", response_model=TrialSessionUploadResponse, status_code=201)
 async def upload_trial_image(
@@ -64,6 +63,8 @@ async def upload_trial_image(
             detail=f"Invalid file type. Allowed types: {', '.join(allowed_types)}"
         )
 
+    # 커밋 전에 실패하면 해제할 업로드 참조
+    uploaded_path = None
     try:
         # Generate unique session ID
         session_id = secrets.token_urlsafe(32)
@@ -71,41 +72,54 @@ async def upload_trial_image(
 
         # 1. 파일 로컬 저장
         print(f"💾 Saving file: {file.filename}")
-        file_path = await storage.save_upload_file(file, user_id=session_id, folder="trial")
-        file_url = storage.get_file_url(file_path)
-        print(f"✅ File saved: {file_url}")
+        saved = await storage.save_upload(file, user_id=session_id, folder="trial")
+        uploaded_path = saved.path
+        file_url = storage.get_file_url(saved.path)
+        print(f"✅ File saved: {file_url} ({saved.size} bytes)")
 
-        # 2. Gemini로 이미지 분석
+        # 2. Gemini로 이미지 분석 (업로드 스풀 대신 저장된 파일에서 한 번만 읽음)
         print("🔍 Analyzing image with Gemini...")
-        file.file.seek(0)  # 파일 포인터 리셋
-        image_data = await file.read()
-        print(f"   Image data size: {len(image_data)} bytes")
+        await file.close()
+        image_data = await storage.read_file(saved.path)
+
+        caption_style = style if style else "감성형"
 
         try:
             gemini_service = get_gemini()
             print("   Gemini service obtained")
 
-            # 동기 함수를 비동기로 실행
-            print("   Calling analyze_image...")
-            analysis = await run_in_threadpool(gemini_service.analyze_image, image_data)
-            print(f"✅ Image analyzed: {analysis}")
+            if settings.TRIAL_COMBINED_ANALYSIS:
+                # 분석 + 문구 생성을 한 번의 Gemini 호출로 처리
+                print("   Calling analyze_and_caption...")
+                result = await gemini_service.analyze_and_caption(
+                    image_data,
+                    platform="instagram",
+                    style=caption_style,
+                    length="medium"
+                )
+                # 결과 dict는 동시 요청끼리 공유되므로 변경하지 않고 분리
+                captions = result["captions"]
+                analysis = {k: v for k, v in result.items() if k != "captions"}
+                print(f"✅ Image analyzed: {analysis}")
+            else:
+                # 비동기 Gemini 호출 (동시 실행 수는 GEMINI_MAX_CONCURRENCY로 제한)
+                print("   Calling analyze_image...")
+                analysis = await gemini_service.analyze_image_async(image_data)
+                print(f"✅ Image analyzed: {analysis}")
+
+                # 3. 광고 문구 생성 (선택적 스타일 적용)
+                print("✍️ Generating captions...")
+                captions = await gemini_service.generate_caption_async(
+                    product_description=analysis.get("description", "상품 이미지"),
+                    platform="instagram",
+                    style=caption_style,
+                    length="medium"
+                )
         except Exception as e:
             print(f"❌ Error during image analysis: {e}")
             import traceback
             traceback.print_exc()
             raise
-
-        # 3. 광고 문구 생성 (선택적 스타일 적용)
-        print("✍️ Generating captions...")
-        caption_style = style if style else "감성형"
-
-        captions = await run_in_threadpool(
-            gemini_service.generate_caption,
-            product_description=analysis.get("description", "상품 이미지"),
-            platform="instagram",
-            style=caption_style,
-            length="medium"
-        )
         print(f"✅ Captions generated: {len(captions)} captions")
 
         # 4. 처리된 이미지 URL (현재는 원본과 동일, 추후 배경 제거 추가)
@@ -125,6 +139,8 @@ async def upload_trial_image(
 
         db_session.add(trial_session)
         await db_session.commit()
+        # 커밋 후에는 세션 레코드가 파일을 참조 (삭제 시 해제)
+        uploaded_path = None
         await db_session.refresh(trial_session)
 
         return TrialSessionUploadResponse(
@@ -139,12 +155,16 @@ async def upload_trial_image(
         )
 
     except HTTPException:
+        if uploaded_path:
+            await storage.discard_file(uploaded_path)
         await db_session.rollback()
         raise
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
         print(f"ERROR in trial upload: {error_trace}")  # 콘솔에 출력
+        if uploaded_path:
+            await storage.discard_file(uploaded_path)
         await db_session.rollback()
         raise HTTPException(
             status_code=500,
@@ -173,6 +193,53 @@ async def get_trial_session(
     return trial_session
 
 
+@router.post("/{session_id}/captions/stream")
+async def stream_trial_captions(
+    session_id: str,
+    request: TrialCaptionStreamRequest,
+    db_session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Stream caption generation for a trial session as Server-Sent Events
+    Emits `token`, `caption` (each complete caption), then `done` or `error`
+    """
+    result = await db_session.execute(
+        select(TrialSession).where(TrialSession.session_id == session_id)
+    )
+    trial_session = result.scalar_one_or_none()
+
+    if not trial_session:
+        raise HTTPException(status_code=404, detail="Trial session not found")
+
+    if trial_session.expires_at < datetime.now(timezone.utc):
+        raise HTTPException(status_code=410, detail="Trial session has expired")
+
+    try:
+        chunks = get_caption_text_stream(
+            product_description=request.product_description,
+            platform=request.platform,
+            style=request.style,
+            length=request.length,
+            regenerate=request.regenerate
+        )
+    except (ValueError, ImportError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    async def save_caption(captions: List[str]):
+        # 요청 세션은 응답 본문 전송 전에 닫히므로 새 세션 사용
+        async with async_session_maker() as db:
+            db_trial = await db.get(TrialSession, session_id)
+            if db_trial is not None:
+                db_trial.caption = captions[0]
+                await db.commit()
+
+    return StreamingResponse(
+        stream_caption_events(chunks, on_done=save_caption),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
 @router.delete("/{session_id}", status_code=204)
 async def delete_trial_session(
     session_id: str,
@@ -187,13 +254,18 @@ async def delete_trial_session(
     if not trial_session:
         raise HTTPException(status_code=404, detail="Trial session not found")
 
-    # TODO: Delete files from storage
-    # if storage_service:
-    #     await storage_service.delete_file(trial_session.original_image_url)
-    #     if trial_session.processed_image_url:
-    #         await storage_service.delete_file(trial_session.processed_image_url)
+    file_paths = {
+        storage.path_from_url(url)
+        for url in (trial_session.original_image_url, trial_session.processed_image_url)
+        if url
+    }
+    file_paths.discard(None)
 
     await db_session.delete(trial_session)
     await db_session.commit()
 
+    # 커밋 후 참조 해제 (다른 업로드와 공유하는 blob은 남음)
+    for file_path in file_paths:
+        await storage.delete_file(file_path)
+
     return None
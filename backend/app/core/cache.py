@@ -0,0 +1,201 @@
+"""
+캐시 유틸리티
+프로세스 내 LRU (바이트 크기 제한) + Redis (REDIS_URL) 2단계 캐시
+"""
+import time
+import hashlib
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+from app.core.config import settings
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    여러 값으로 결정적인 캐시 키 생성
+
+    Args:
+        parts: bytes, str 또는 JSON 직렬화 가능한 값
+
+    Returns:
+        SHA-256 hex 문자열
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(part)
+        elif isinstance(part, str):
+            digest.update(part.encode("utf-8"))
+        else:
+            digest.update(json.dumps(part, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class LRUByteCache:
+    """전체 바이트 크기로 제한되는 프로세스 내 LRU 캐시 (스레드 안전)"""
+
+    def __init__(self, max_bytes: int):
+        """
+        Args:
+            max_bytes: 저장 가능한 값의 총 바이트 수
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """키로 조회 (조회 시 최근 사용으로 갱신)"""
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        """값 저장, 용량 초과 시 오래된 항목부터 제거"""
+        size = len(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old)
+
+            self._items[key] = value
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+# ===== Redis 연결 =====
+_redis = None
+_redis_retry_at = 0.0
+REDIS_RETRY_INTERVAL = 30.0  # 연결 실패 후 재시도까지 대기 (초)
+
+
+def get_redis():
+    """
+    Redis 클라이언트 반환 (지연 생성)
+
+    Returns:
+        redis.asyncio.Redis 또는 None (패키지 미설치 / 최근 연결 실패)
+    """
+    global _redis
+    if aioredis is None or not settings.REDIS_URL:
+        return None
+    if time.monotonic() < _redis_retry_at:
+        return None
+    if _redis is None:
+        _redis = aioredis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=1.0,
+            socket_timeout=1.0
+        )
+    return _redis
+
+
+def mark_redis_unavailable(error: Exception) -> None:
+    """Redis 오류 발생 시 일정 시간 동안 Redis 계층을 건너뜀"""
+    global _redis_retry_at
+    _redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+    print(f"⚠️ Redis unavailable, skipping for {REDIS_RETRY_INTERVAL:.0f}s: {error}")
+
+
+async def close_redis() -> None:
+    """Redis 연결 종료 (애플리케이션 종료 시)"""
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
+
+
+# ===== 캐시 통계 레지스트리 =====
+_caches: Dict[str, Any] = {}
+
+
+def register_cache(name: str, cache: Any) -> None:
+    """/health/cache 통계에 포함할 캐시 등록 (get_stats() 메서드 필요)"""
+    _caches[name] = cache
+
+
+# ===== 2단계 캐시 =====
+class TwoTierCache:
+    """프로세스 내 LRU → Redis 순서로 조회하는 바이트 캐시"""
+
+    def __init__(self, namespace: str, max_memory_bytes: int, ttl: int):
+        """
+        Args:
+            namespace: 캐시 이름 (Redis 키 접두사 및 통계 이름)
+            max_memory_bytes: 프로세스 내 계층 최대 바이트 수
+            ttl: Redis 계층 만료 시간 (초)
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.memory = LRUByteCache(max_memory_bytes)
+        self.stats = {"memory_hits": 0, "redis_hits": 0, "misses": 0}
+        register_cache(namespace, self)
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """캐시 조회 (Redis 히트는 메모리 계층에도 채움)"""
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats["memory_hits"] += 1
+            return value
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                value = await redis.get(self._redis_key(key))
+            except Exception as e:
+                mark_redis_unavailable(e)
+                value = None
+            if value is not None:
+                self.stats["redis_hits"] += 1
+                self.memory.set(key, value)
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: bytes) -> None:
+        """두 계층 모두에 저장"""
+        self.memory.set(key, value)
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.set(self._redis_key(key), value, ex=self.ttl)
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """히트/미스 통계"""
+        hits = self.stats["memory_hits"] + self.stats["redis_hits"]
+        total = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.current_bytes
+        }
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """등록된 모든 캐시의 통계 반환"""
+    return {name: cache.get_stats() for name, cache in _caches.items()}
@@ -23,6 +23,12 @@ class Settings(BaseSettings):
     SUPABASE_URL: Optional[str] = None
     SUPABASE_KEY: Optional[str] = None
     SUPABASE_BUCKET: str = "images"
+    # Storage REST API 주소 (기본: {SUPABASE_URL}/storage/v1, 로컬 대체 서버로 바꿔 테스트 가능)
+    SUPABASE_STORAGE_URL: Optional[str] = None
+    SUPABASE_STORAGE_TIMEOUT: float = 60.0
+    # 이보다 큰 객체는 Range 요청으로 나눠 병렬 다운로드
+    SUPABASE_DOWNLOAD_PART_SIZE: int = 8 * 1024 * 1024
+    SUPABASE_DOWNLOAD_CONCURRENCY: int = 4
 
     # ===== Redis =====
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -37,16 +43,93 @@ class Settings(BaseSettings):
     # ===== AI Services =====
     # Google Gemini
     GEMINI_API_KEY: Optional[str] = None
+    GEMINI_MAX_CONCURRENCY: int = 10  # 프로세스당 동시 Gemini 호출 수
+    GEMINI_TIMEOUT: float = 30.0  # 호출당 타임아웃 (초)
+    # 체험 업로드에서 분석 + 문구 생성을 한 번의 호출로 처리
+    TRIAL_COMBINED_ANALYSIS: bool = True
 
     # OpenAI
     OPENAI_API_KEY: Optional[str] = None
     OPENAI_ORG_ID: Optional[str] = None
+    CAPTION_MAX_CONCURRENCY: int = 8  # 프로세스당 동시 문구 생성 호출 수
 
     # Unsplash
     UNSPLASH_ACCESS_KEY: Optional[str] = None
+    UNSPLASH_TIMEOUT: float = 10.0
 
     # Rembg Service
     REMBG_API_URL: str = "http://localhost:5000"  # Docker 컨테이너 또는 Render.com
+    REMBG_TIMEOUT: float = 60.0
+    # 긴 변이 이 값보다 큰 사진은 축소본으로 마스크 추론 후 원본에 적용 (0 = 사이드카 기본값)
+    REMBG_MAX_SIDE: int = 0
+    # 배경 제거 결과 캐시 (입력 이미지 해시 + 파라미터 기준)
+    REMBG_CACHE_ENABLED: bool = True
+    REMBG_CACHE_MEMORY_BYTES: int = 256 * 1024 * 1024  # 프로세스 내 LRU 최대 256MB
+    REMBG_CACHE_TTL: int = 60 * 60 * 24 * 7  # Redis 계층 7일
+    # /remove/batch 요청당 최대 이미지 수 (사이드카가 알려주는 max_batch/대기열 용량으로 더 줄어듦)
+    REMBG_BATCH_SIZE: int = 32
+    REMBG_BATCH_RETRIES: int = 3  # 대기열이 가득 찼을 때(503) 재시도 횟수
+
+    # ===== Vision LLM 이미지 전처리 =====
+    VISION_MAX_SIDE: int = 1024  # 모델 입력 해상도 (긴 변 픽셀)
+    VISION_IMAGE_FORMAT: str = "JPEG"  # JPEG 또는 WEBP
+    VISION_IMAGE_QUALITY: int = 85
+    VISION_PREP_CACHE_BYTES: int = 64 * 1024 * 1024  # 전처리 결과 캐시 64MB
+
+    # ===== 상품 분석 캐시 (지각 해시) =====
+    ANALYSIS_CACHE_ENABLED: bool = True
+    ANALYSIS_CACHE_MAX_DISTANCE: int = 6  # 64비트 dHash 해밍 거리 임계값
+    ANALYSIS_CACHE_TTL: int = 60 * 60 * 24  # 24시간
+    ANALYSIS_CACHE_MAX_ENTRIES: int = 5000
+
+    # ===== 광고 문구 캐시 (정규화된 프롬프트 입력 기준) =====
+    CAPTION_CACHE_ENABLED: bool = True
+    CAPTION_CACHE_MEMORY_BYTES: int = 32 * 1024 * 1024  # 프로세스 내 LRU 최대 32MB
+    CAPTION_CACHE_TTL: int = 60 * 60 * 24 * 3  # Redis 계층 3일
+    CAPTION_CACHE_STATS_MAX_KEYS: int = 1000  # 키별 히트 통계를 유지할 최대 키 수
+    CAPTION_CACHE_STATS_FLUSH_INTERVAL: float = 10.0  # Redis 통계를 모아서 보내는 주기 (초)
+
+    # ===== CPU 작업 프로세스 풀 =====
+    CPU_POOL_WORKERS: int = 0  # 0 = CPU 코어 수
+
+    # ===== 배경 합성 =====
+    COMPOSITE_CANVAS_SIZE: int = 1080  # 단색/그라데이션 배경 캔버스 (정사각형 픽셀)
+    COMPOSITE_MAX_SIDE: int = 2048  # 사진 배경 사용 시 결과 긴 변 최대 픽셀
+    COMPOSITE_PADDING: float = 0.12  # 상품 주변 여백 (캔버스 대비 비율)
+    COMPOSITE_SHADOW: bool = True  # 그림자 기본 사용 여부
+    COMPOSITE_FEATHER_RADIUS: float = 1.5  # 가장자리 부드럽게 (픽셀, 0 = 사용 안 함)
+    COMPOSITE_OUTPUT_FORMAT: str = "JPEG"  # JPEG, PNG 또는 WEBP
+    COMPOSITE_OUTPUT_QUALITY: int = 90
+    # Unsplash 배경 이미지 캐시 (메모리 LRU + Redis)
+    BACKGROUND_CACHE_MEMORY_BYTES: int = 128 * 1024 * 1024
+    BACKGROUND_CACHE_TTL: int = 60 * 60  # 1시간
+
+    # ===== 파생 이미지 (플랫폼별 내보내기 / 목록 썸네일) =====
+    VARIANT_JPEG_QUALITY: int = 88
+    THUMBNAIL_WEBP_QUALITY: int = 80
+    THUMBNAIL_RETRY_INTERVAL: int = 60 * 60  # 목록 조회에서 썸네일 생성에 실패한 원본의 재시도 간격 (초)
+
+    # ===== 즉석 이미지 변환 (/files/{path}?w=&fmt=&q=) =====
+    TRANSFORM_MAX_WIDTH: int = 2048  # w 상한 (없으면 이 너비로 제한, 확대는 하지 않음)
+    TRANSFORM_DEFAULT_QUALITY: int = 80
+    TRANSFORM_ALLOWED_QUALITIES: List[int] = [60, 75, 80, 90]  # q 허용 값 (w는 썸네일/내보내기 너비만 허용)
+    TRANSFORM_CACHE_DIR: str = "./cache/transforms"
+    TRANSFORM_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 변환 결과 디스크 캐시 총량 (LRU)
+
+    # ===== 비동기 작업 파이프라인 (업로드 → 배경 제거 → 합성 → 문구) =====
+    JOB_QUEUE_NAME: str = "jobs:image"  # Redis 리스트 키 (REDIS_URL)
+    JOB_WORKER_CONCURRENCY: int = 4  # 워커 프로세스당 동시 처리 작업 수
+    JOB_STAGE_MAX_ATTEMPTS: int = 3  # 단계별 최대 시도 횟수
+    JOB_RETRY_BACKOFF: float = 2.0  # 재시도 대기 (초, 시도마다 2배)
+    JOB_STALE_AFTER: int = 600  # 이 시간(초) 동안 갱신 없는 queued/running 작업은 워커 시작 시 재등록
+    JOB_INLINE_FALLBACK: bool = True  # Redis 미사용 시 API 프로세스에서 직접 실행 (개발용)
+
+    # ===== 외부 HTTP 클라이언트 (업스트림별 공유 커넥션 풀) =====
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_DEFAULT_TIMEOUT: float = 30.0
+    HTTP2_ENABLED: bool = True  # h2 패키지 설치 시 HTTPS 업스트림에 HTTP/2 사용
 
     # ===== 크레딧 시스템 =====
     WELCOME_CREDITS: int = 10  # 가입 시 무료 크레딧
@@ -62,6 +145,23 @@ class Settings(BaseSettings):
 
     # ===== 파일 업로드 =====
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 스트리밍 저장 시 한 번에 읽는 크기 (1MB)
+
+    # ===== 파일 저장소 (local | supabase | s3) =====
+    STORAGE_BACKEND: str = "local"  # 회원 원본/처리 결과 등 장기 보관 자산
+    TRIAL_STORAGE_BACKEND: str = "local"  # 체험 업로드 (24시간 핫 데이터)
+    LOCAL_STORAGE_DIR: str = "./uploads"
+    LOCAL_STORAGE_BASE_URL: str = "http://localhost:8000/files"
+    STORAGE_PRESIGN_EXPIRES: int = 3600  # 초
+    # S3 호환 저장소 (AWS S3, MinIO 등 / 경로 방식 주소)
+    S3_ENDPOINT_URL: Optional[str] = None  # 없으면 https://s3.{region}.amazonaws.com
+    S3_REGION: str = "us-east-1"
+    S3_BUCKET: str = "images"
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_PUBLIC_URL: Optional[str] = None  # 공개 읽기 URL 접두사 (CDN 등), 없으면 {endpoint}/{bucket}
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+    S3_TIMEOUT: float = 60.0
     ALLOWED_IMAGE_TYPES: List[str] = ["image/jpeg", "image/png"]
 
     # ===== CORS =====
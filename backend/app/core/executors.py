@@ -0,0 +1,56 @@
+"""
+CPU 작업용 프로세스 풀
+이미지 합성/변환 등 CPU 바운드 작업을 이벤트 루프와 GIL 밖에서 실행
+"""
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional
+from app.core.config import settings
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    프로세스 풀 반환 (지연 생성)
+
+    이벤트 루프/DB 커넥션/스레드를 가진 부모를 fork하지 않도록 spawn 컨텍스트 사용.
+    """
+    global _process_pool
+    if _process_pool is None:
+        workers = settings.CPU_POOL_WORKERS or os.cpu_count() or 1
+        _process_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+async def run_in_process(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    함수를 프로세스 풀에서 실행
+
+    func와 인자는 pickle 가능해야 한다 (모듈 최상위 함수, bytes/dict 인자).
+    워커 프로세스가 비정상 종료되어 풀이 깨지면 한 번 새로 만들어 재시도한다.
+    """
+    global _process_pool
+    loop = asyncio.get_running_loop()
+    call = partial(func, *args, **kwargs)
+    try:
+        return await loop.run_in_executor(get_process_pool(), call)
+    except BrokenProcessPool:
+        print("⚠️ Process pool broken, recreating")
+        shutdown_process_pool()
+        return await loop.run_in_executor(get_process_pool(), call)
+
+
+def shutdown_process_pool() -> None:
+    """프로세스 풀 종료 (애플리케이션 종료 시)"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
@@ -0,0 +1,85 @@
+"""
+공유 HTTP 클라이언트
+업스트림별로 애플리케이션 수명 동안 재사용되는 httpx.AsyncClient (커넥션 풀, keep-alive)
+"""
+import importlib.util
+from typing import Dict
+import httpx
+from app.core.config import settings
+
+# h2 패키지가 설치된 경우에만 HTTP/2 사용 가능
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _upstream_options(name: str) -> dict:
+    """업스트림별 타임아웃 / HTTP/2 설정"""
+    upstreams = {
+        # 내부 사이드카: 평문 HTTP/1.1, 추론 시간이 길어 read 타임아웃을 넉넉히
+        "rembg": {
+            "timeout": httpx.Timeout(settings.REMBG_TIMEOUT, connect=5.0),
+            "http2": False,
+        },
+        # Supabase Storage: 대용량 전송이 있어 read/write 타임아웃을 별도로
+        "supabase": {
+            "timeout": httpx.Timeout(settings.SUPABASE_STORAGE_TIMEOUT, connect=5.0),
+            "http2": settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+        },
+        # S3 호환 저장소 (MinIO 등은 평문 HTTP/1.1일 수 있음)
+        "s3": {
+            "timeout": httpx.Timeout(settings.S3_TIMEOUT, connect=5.0),
+            "http2": settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+        },
+        # 외부 HTTPS API: TLS 핸드셰이크 재사용 + HTTP/2 멀티플렉싱
+        "unsplash": {
+            "timeout": httpx.Timeout(settings.UNSPLASH_TIMEOUT, connect=5.0),
+            "http2": settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+        },
+    }
+    return upstreams.get(name, {
+        "timeout": httpx.Timeout(settings.HTTP_DEFAULT_TIMEOUT, connect=5.0),
+        "http2": settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+    })
+
+
+def _create_client(name: str) -> httpx.AsyncClient:
+    options = _upstream_options(name)
+    return httpx.AsyncClient(
+        timeout=options["timeout"],
+        http2=options["http2"],
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+    )
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """
+    업스트림 이름으로 공유 클라이언트 반환
+
+    lifespan 밖(스크립트, 워커 등)에서 호출되면 지연 생성한다.
+
+    Args:
+        name: 업스트림 이름 ("rembg", "unsplash", "supabase", "s3", ...)
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _create_client(name)
+        _clients[name] = client
+    return client
+
+
+async def init_http_clients() -> None:
+    """알려진 업스트림 클라이언트를 미리 생성 (애플리케이션 시작 시)"""
+    for name in ("rembg", "unsplash"):
+        get_http_client(name)
+
+
+async def close_http_clients() -> None:
+    """모든 공유 클라이언트 종료 (애플리케이션 종료 시)"""
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
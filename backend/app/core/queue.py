@@ -0,0 +1,133 @@
+"""
+작업 큐
+Redis 리스트 기반 작업 큐 (REDIS_URL) + 작업 진행 상황 pub/sub
+"""
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+from app.core.config import settings
+from app.core.cache import get_redis, mark_redis_unavailable
+
+
+# ===== 큐 연결 =====
+# BRPOP은 오래 블로킹하므로 캐시용 클라이언트(짧은 socket_timeout)와 별도 연결 사용
+_queue_redis = None
+
+
+def get_queue_redis():
+    """
+    큐 전용 Redis 클라이언트 반환 (지연 생성)
+
+    Returns:
+        redis.asyncio.Redis 또는 None (패키지 미설치 / REDIS_URL 미설정)
+    """
+    global _queue_redis
+    if aioredis is None or not settings.REDIS_URL:
+        return None
+    if _queue_redis is None:
+        _queue_redis = aioredis.from_url(settings.REDIS_URL, socket_connect_timeout=1.0)
+    return _queue_redis
+
+
+async def close_queue_redis() -> None:
+    """큐 Redis 연결 종료"""
+    global _queue_redis
+    if _queue_redis is not None:
+        await _queue_redis.close()
+        _queue_redis = None
+
+
+async def enqueue_job(job_id: int) -> bool:
+    """
+    작업 ID를 큐에 등록
+
+    Returns:
+        등록 성공 여부 (Redis 미사용/장애 시 False)
+    """
+    redis = get_queue_redis()
+    if redis is None:
+        return False
+    try:
+        await redis.lpush(settings.JOB_QUEUE_NAME, job_id)
+        return True
+    except Exception as e:
+        print(f"⚠️ Failed to enqueue job {job_id}: {e}")
+        return False
+
+
+async def dequeue_job(timeout: int = 5) -> Optional[int]:
+    """
+    큐에서 작업 ID 하나를 꺼냄 (최대 timeout초 대기)
+
+    Returns:
+        작업 ID 또는 None (대기 시간 초과)
+    """
+    redis = get_queue_redis()
+    if redis is None:
+        raise RuntimeError("Job queue requires redis package and REDIS_URL")
+    item = await redis.brpop(settings.JOB_QUEUE_NAME, timeout=timeout)
+    if item is None:
+        return None
+    _, job_id = item
+    return int(job_id)
+
+
+async def queue_length() -> Optional[int]:
+    """대기 중인 작업 수 (Redis 미사용 시 None)"""
+    redis = get_queue_redis()
+    if redis is None:
+        return None
+    try:
+        return await redis.llen(settings.JOB_QUEUE_NAME)
+    except Exception:
+        return None
+
+
+# ===== 진행 상황 이벤트 =====
+def job_events_channel(image_id: int) -> str:
+    """이미지별 작업 이벤트 pub/sub 채널명"""
+    return f"{settings.JOB_QUEUE_NAME}:events:{image_id}"
+
+
+async def publish_job_event(image_id: int, event: Dict[str, Any]) -> None:
+    """작업 상태 변경 이벤트 발행 (실패해도 작업에는 영향 없음)"""
+    redis = get_redis()
+    if redis is None:
+        return
+    try:
+        await redis.publish(job_events_channel(image_id), json.dumps(event, ensure_ascii=False, default=str))
+    except Exception as e:
+        mark_redis_unavailable(e)
+
+
+async def subscribe_job_events(image_id: int, timeout: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    작업 이벤트 구독
+
+    Yields:
+        이벤트 dict. 구독 직후 한 번, 그리고 timeout초 동안 이벤트가 없을 때마다 None
+        (호출 측에서 DB 상태를 재확인해 구독 전에 발행된 이벤트를 놓치지 않도록)
+
+    Raises:
+        RuntimeError: Redis를 사용할 수 없을 때
+    """
+    redis = get_queue_redis()
+    if redis is None:
+        raise RuntimeError("Job events require redis package and REDIS_URL")
+
+    pubsub = redis.pubsub()
+    await pubsub.subscribe(job_events_channel(image_id))
+    try:
+        yield None
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+            if message is None:
+                yield None
+                continue
+            yield json.loads(message["data"])
+    finally:
+        await pubsub.unsubscribe(job_events_channel(image_id))
+        await pubsub.close()
@@ -0,0 +1,101 @@
+"""
+Single-flight 요청 병합
+같은 키로 동시에 들어온 호출은 첫 번째 호출(리더)의 결과를 공유한다.
+"""
+import copy
+import asyncio
+import concurrent.futures
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """진행 중인 동일 요청을 하나의 업스트림 호출로 병합"""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._sync_calls: Dict[str, concurrent.futures.Future] = {}
+        self._lock = Lock()
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        **kwargs
+    ) -> Any:
+        """
+        코루틴 함수 실행 (같은 키의 호출이 진행 중이면 그 결과를 기다림)
+
+        실제 호출은 어떤 호출자에도 묶이지 않은 별도 Task로 실행되고, 모든 호출자는
+        shield로 기다린다. 그래서 호출자 하나가 취소되어도(클라이언트 연결 끊김 등)
+        그 호출자만 CancelledError를 받고 나머지는 결과를 그대로 받는다.
+
+        결과는 첫 호출자에게 그대로, 이후 호출자에게는 deepcopy로 전달하므로
+        호출자끼리 결과 객체를 수정해도 서로 영향을 주지 않는다.
+
+        Args:
+            key: 요청 식별 키 (콘텐츠 해시 + 파라미터)
+            func: 실행할 코루틴 함수
+
+        Returns:
+            func의 결과
+        """
+        task = self._calls.get(key)
+        follower = task is not None
+        if not follower:
+            task = asyncio.get_running_loop().create_task(func(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result) if follower else result
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        """완료된 호출 정리 (기다리는 호출자가 없어도 예외를 회수해 경고 방지)"""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
+
+    def do_sync(
+        self,
+        key: str,
+        func: Callable[..., Any],
+        *args,
+        **kwargs
+    ) -> Any:
+        """
+        동기 함수 실행 (스레드 풀에서 호출되는 동기 서비스용)
+
+        Args:
+            key: 요청 식별 키
+            func: 실행할 동기 함수
+
+        Returns:
+            func의 결과 (동시 호출자끼리 같은 객체를 공유하므로 수정하지 말 것)
+        """
+        with self._lock:
+            future = self._sync_calls.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._sync_calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._sync_calls.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._calls) + len(self._sync_calls)
@@ -1,11 +1,17 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from pathlib import Path
 from app.core.config import settings
 from app.core.database import create_db_and_tables
+from app.core.cache import close_redis, get_cache_stats
+from app.core.http import init_http_clients, close_http_clients
+from app.core.queue import close_queue_redis
+from app.core.executors import shutdown_process_pool
+from app.services.caption_cache_service import get_caption_cache
+from app.services.image_transform_service import get_image_transform_service
 from app.api import api_router
+from app.api.endpoints import files
 
 
 @asynccontextmanager
@@ -13,8 +19,17 @@ async def lifespan(app: FastAPI):
     """Lifespan events for FastAPI application"""
     # Startup: Create database tables
     await create_db_and_tables()
+    # Startup: Create pooled HTTP clients for upstream services
+    await init_http_clients()
     yield
-    # Shutdown: Cleanup (if needed)
+    # Shutdown: Send buffered cache stats, then close shared connections
+    caption_cache = get_caption_cache()
+    if caption_cache is not None:
+        await caption_cache.flush_stats()
+    await close_http_clients()
+    await close_queue_redis()
+    await close_redis()
+    shutdown_process_pool()
 
 
 app = FastAPI(
@@ -33,6 +48,29 @@ app.add_middleware(
 )
 
 
+# multipart 경계/헤더 여유분
+UPLOAD_OVERHEAD_BYTES = 64 * 1024
+
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """
+    Content-Length가 업로드 한도를 넘는 요청은 본문을 받기 전에 413으로 거부
+    (길이를 알리지 않는 chunked 요청은 저장 중 스트리밍 검사로 차단)
+    """
+    content_length = request.headers.get("content-length")
+    if (
+        content_length
+        and content_length.isdigit()
+        and int(content_length) > settings.MAX_UPLOAD_SIZE + UPLOAD_OVERHEAD_BYTES
+    ):
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request body too large. Maximum upload size: {settings.MAX_UPLOAD_SIZE} bytes"}
+        )
+    return await call_next(request)
+
+
 @app.get("/")
 async def root():
     return {
@@ -47,10 +85,33 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/cache")
+async def cache_stats():
+    """캐시별 히트/미스 통계"""
+    return get_cache_stats()
+
+
+@app.get("/health/cache/captions")
+async def caption_cache_stats():
+    """광고 문구 캐시 키별 히트 통계 (Redis 누적, 모든 인스턴스 합산)"""
+    caption_cache = get_caption_cache()
+    if caption_cache is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "local": caption_cache.get_stats(),
+        "global": await caption_cache.get_global_stats()
+    }
+
+
+@app.get("/health/cache/transforms")
+async def transform_cache_stats():
+    """즉석 이미지 변환 디스크 캐시 사용량 (이 프로세스 기준)"""
+    return get_image_transform_service().cache.get_stats()
+
+
 # Include API routers
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
-# Mount static files for uploaded images
-uploads_dir = Path("./uploads")
-uploads_dir.mkdir(exist_ok=True)
-app.mount("/files", StaticFiles(directory=str(uploads_dir)), name="files")
+# Serve uploaded images (local storage backend) with ETag / range / cache headers
+app.include_router(files.router, prefix="/files", tags=["files"])
@@ -1,17 +1,21 @@
 from app.models.user import User
 from app.models.project import Project
 from app.models.image import Image
+from app.models.image_job import ImageJob
 from app.models.credit_transaction import CreditTransaction
 from app.models.onboarding_progress import OnboardingProgress
 from app.models.trial_session import TrialSession
 from app.models.prompt_violation import PromptViolation
+from app.models.stored_blob import StoredBlob
 
 __all__ = [
     "User",
     "Project",
     "Image",
+    "ImageJob",
     "CreditTransaction",
     "OnboardingProgress",
     "TrialSession",
     "PromptViolation",
+    "StoredBlob",
 ]
@@ -0,0 +1,46 @@
+"""
+이미지 처리 작업 모델
+"""
+from datetime import datetime
+from sqlalchemy import String, Integer, ForeignKey, Text, JSON, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional, Dict, Any
+
+from app.models.base import Base, IDMixin, TimestampMixin
+
+
+class ImageJob(Base, IDMixin, TimestampMixin):
+    """이미지 처리 작업 테이블 - 업로드 후 배경 제거 → 합성 → 문구 생성 파이프라인 상태"""
+    __tablename__ = "image_jobs"
+
+    # Foreign keys
+    image_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("images.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id"),
+        nullable=False,
+        index=True
+    )
+
+    # 상태: 'queued', 'running', 'succeeded', 'failed'
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued", index=True)
+    stage: Mapped[Optional[str]] = mapped_column(String(30), nullable=True)  # 현재(또는 실패한) 단계
+    progress: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # 0-100
+
+    # 작업 입력 (원본 저장 경로, 스타일, 플랫폼 등)
+    options: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False, default=dict)
+    # 단계별 시도 횟수 {stage: count} / 단계별 결과 {stage: {...}}
+    attempts: Mapped[Dict[str, int]] = mapped_column(JSON, nullable=False, default=dict)
+    results: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False, default=dict)
+
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<ImageJob(id={self.id}, image_id={self.image_id}, status={self.status}, stage={self.stage})>"
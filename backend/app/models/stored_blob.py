@@ -0,0 +1,26 @@
+"""
+저장 파일 본문(blob) 모델
+"""
+from sqlalchemy import String, Integer, BigInteger, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin
+
+
+class StoredBlob(Base, TimestampMixin):
+    """내용 주소 저장소 테이블 - SHA-256이 같은 파일은 한 번만 저장하고 참조 수로 삭제 시점 결정"""
+    __tablename__ = "stored_blobs"
+
+    # Primary Key (저장소 역할 + 내용 해시)
+    store: Mapped[str] = mapped_column(String(32), primary_key=True, default="assets")  # 'assets', 'trial'
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+    # 저장소 상대 경로: [{역할}/]blobs/ab/cd/<sha256><ext>
+    path: Mapped[str] = mapped_column(Text, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    # 이 blob을 가리키는 저장 요청 수 (0이 되면 파일 삭제)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f"<StoredBlob(store={self.store}, sha256={self.sha256[:12]}, refs={self.ref_count})>"
@@ -26,6 +26,10 @@ class ImageRead(BaseModel):
     caption: Optional[str] = None
     caption_metadata: Optional[Dict[str, Any]] = None
     quality_score: Optional[float] = None
+    thumbnail_urls: Optional[Dict[str, str]] = Field(
+        None,
+        description="Thumbnail URLs keyed by width (e.g. '160', '320', '640'); null until generated"
+    )
     created_at: datetime
     updated_at: datetime
 
@@ -38,6 +42,24 @@ class ImageUploadResponse(BaseModel):
     image_id: int
     original_url: str
     message: str
+    job_id: Optional[int] = Field(None, description="Processing job ID")
+    status: Optional[str] = Field(None, description="Job status: 'queued', 'running', 'succeeded', 'failed'")
+
+
+class ImageJobStatus(BaseModel):
+    """Schema for image processing job status"""
+    image_id: int
+    job_id: int
+    status: str = Field(..., description="Job status: 'queued', 'running', 'succeeded', 'failed'")
+    stage: Optional[str] = Field(None, description="Current (or failed) stage: 'remove_bg', 'composite', 'thumbnails', 'caption'")
+    progress: int = Field(..., description="Progress percentage (0-100)")
+    attempts: Dict[str, int] = Field(default_factory=dict, description="Attempts per stage")
+    error: Optional[str] = None
+    processed_url: Optional[str] = None
+    caption: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: datetime
 
 
 class CaptionGenerateRequest(BaseModel):
@@ -54,3 +76,13 @@ class CaptionGenerateResponse(BaseModel):
     caption: str
     caption_metadata: Dict[str, Any]
     message: str
+
+
+class CaptionStreamRequest(BaseModel):
+    """Schema for streaming caption generation request (Server-Sent Events)"""
+    image_id: int
+    product_description: str = Field(..., min_length=1, description="Product description used as caption context")
+    platform: str = Field("instagram", description="Platform: 'instagram', 'facebook', 'kakao'")
+    style: Optional[str] = Field(None, description="Caption style (provider default if omitted)")
+    length: str = Field("medium", description="Length: 'short', 'medium', 'long'")
+    regenerate: bool = Field(False, description="Skip the caption cache and generate fresh captions")
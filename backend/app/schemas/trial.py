@@ -34,3 +34,12 @@ class TrialSessionUploadResponse(BaseModel):
     expires_at: datetime
     analysis: Optional[Dict] = Field(None, description="Image analysis result from Gemini")
     captions: Optional[List[str]] = Field(None, description="Generated ad captions")
+
+
+class TrialCaptionStreamRequest(BaseModel):
+    """Schema for streaming trial caption generation request (Server-Sent Events)"""
+    product_description: str = Field(..., min_length=1, description="Product description used as caption context")
+    platform: str = Field("instagram", description="Platform: 'instagram', 'facebook', 'kakao'")
+    style: Optional[str] = Field(None, description="Caption style (provider default if omitted)")
+    length: str = Field("medium", description="Length: 'short', 'medium', 'long'")
+    regenerate: bool = Field(False, description="Skip the caption cache and generate fresh captions")
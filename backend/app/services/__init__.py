@@ -1,4 +1,5 @@
 from app.services.storage_service import StorageService, get_storage_service
+from app.services.file_storage_service import FileStorageService, get_file_storage
 from app.services.credit_service import CreditService
 
-__all__ = ["StorageService", "get_storage_service", "CreditService"]
+__all__ = ["StorageService", "get_storage_service", "FileStorageService", "get_file_storage", "CreditService"]
@@ -0,0 +1,172 @@
+"""
+상품 분석 결과 캐시 (지각 해시 기반)
+재촬영/재압축/크롭된 유사 이미지도 같은 분석 결과를 재사용
+"""
+import io
+import copy
+import time
+import asyncio
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+from PIL import Image
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from app.core.config import settings
+from app.core.cache import register_cache
+from app.services.image_preparation_service import ImagePreparationService, PreparedImage
+
+HASH_SIZE = 8  # 8x8 = 64비트 dHash
+
+
+def compute_dhash(image_data: bytes, hash_size: int = HASH_SIZE) -> int:
+    """
+    차이 해시(dHash) 계산
+
+    그레이스케일 (hash_size+1) x hash_size로 축소한 뒤 가로로 인접한 픽셀의 밝기 증감을 비트로 기록한다.
+    재압축, 약간의 크롭/리사이즈에 강하다.
+
+    Args:
+        image_data: 이미지 바이트 데이터
+
+    Returns:
+        hash_size² 비트 정수
+    """
+    image = Image.open(io.BytesIO(image_data))
+    image.draft("L", ((hash_size + 1) * 8, hash_size * 8))
+    gray = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+
+    if np is not None:
+        pixels = np.asarray(gray, dtype=np.int16)
+        bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+        return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+    # NumPy 미설치 시 순수 파이썬 계산
+    pixels = list(gray.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | int(pixels[offset + col + 1] > pixels[offset + col])
+    return value
+
+
+class PerceptualHashCache:
+    """
+    해밍 거리 임계값 이내의 지각 해시를 같은 키로 취급하는 캐시 (스레드 안전)
+
+    값은 복사본으로 저장/반환하므로 호출 측이 결과를 수정해도 캐시에 영향이 없다.
+    조회는 O(N) 스캔이므로 비동기 코드에서는 prepare_and_lookup_async()로 스레드에서 실행한다.
+    """
+
+    def __init__(self, name: str, max_distance: int, ttl: int, max_entries: int):
+        """
+        Args:
+            name: 캐시 이름 (통계용)
+            max_distance: 히트로 인정할 최대 해밍 거리 (64비트 기준)
+            ttl: 항목 만료 시간 (초)
+            max_entries: 최대 항목 수 (초과 시 오래된 항목부터 제거)
+        """
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # phash → (만료 시각, 값)
+        self._items: "OrderedDict[int, Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self.stats = {"exact_hits": 0, "near_hits": 0, "misses": 0}
+        register_cache(name, self)
+
+    def get(self, phash: int) -> Optional[Any]:
+        """가장 가까운 유사 이미지의 값 조회"""
+        now = time.monotonic()
+        with self._lock:
+            best_key, best_distance = None, self.max_distance + 1
+            expired = []
+            for key, (expires_at, _) in self._items.items():
+                if expires_at < now:
+                    expired.append(key)
+                    continue
+                distance = (key ^ phash).bit_count()
+                if distance < best_distance:
+                    best_key, best_distance = key, distance
+                    if distance == 0:
+                        break
+
+            for key in expired:
+                del self._items[key]
+
+            if best_key is None:
+                self.stats["misses"] += 1
+                return None
+
+            self._items.move_to_end(best_key)
+            self.stats["exact_hits" if best_distance == 0 else "near_hits"] += 1
+            value = self._items[best_key][1]
+        return copy.deepcopy(value)
+
+    def lookup(self, image_data: bytes) -> Tuple[int, Optional[Any]]:
+        """이미지의 지각 해시 계산 후 조회 → (해시, 값 또는 None)"""
+        phash = compute_dhash(image_data)
+        return phash, self.get(phash)
+
+    def set(self, phash: int, value: Any) -> None:
+        """값 저장"""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._items[phash] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(phash)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """히트/미스 통계"""
+        hits = self.stats["exact_hits"] + self.stats["near_hits"]
+        total = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "entries": len(self._items)
+        }
+
+
+def prepare_and_lookup(
+    image_prep: ImagePreparationService,
+    cache: Optional[PerceptualHashCache],
+    image_data: bytes
+) -> Tuple[PreparedImage, Optional[int], Optional[Any]]:
+    """
+    모델 입력 이미지 준비 + 분석 캐시 조회
+
+    Returns:
+        (준비된 이미지, 지각 해시 또는 None, 캐시된 값 또는 None)
+    """
+    prepared = image_prep.prepare(image_data)
+    if cache is None:
+        return prepared, None, None
+    phash, cached = cache.lookup(prepared.data)
+    return prepared, phash, cached
+
+
+async def prepare_and_lookup_async(
+    image_prep: ImagePreparationService,
+    cache: Optional[PerceptualHashCache],
+    image_data: bytes
+) -> Tuple[PreparedImage, Optional[int], Optional[Any]]:
+    """prepare_and_lookup()을 스레드 풀에서 한 번에 실행 (디코딩/해시/스캔이 이벤트 루프를 막지 않도록)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, prepare_and_lookup, image_prep, cache, image_data)
+
+
+def create_analysis_cache(name: str) -> Optional[PerceptualHashCache]:
+    """설정에 따라 분석 캐시 생성 (비활성화 시 None)"""
+    if not settings.ANALYSIS_CACHE_ENABLED:
+        return None
+    return PerceptualHashCache(
+        name=name,
+        max_distance=settings.ANALYSIS_CACHE_MAX_DISTANCE,
+        ttl=settings.ANALYSIS_CACHE_TTL,
+        max_entries=settings.ANALYSIS_CACHE_MAX_ENTRIES
+    )
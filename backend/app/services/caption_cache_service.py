@@ -0,0 +1,294 @@
+"""
+광고 문구 캐시
+정규화된 프롬프트 입력(설명, 플랫폼, 스타일, 길이, 이모지/해시태그 옵션)을 키로 생성 결과 재사용
+"""
+import re
+import json
+import asyncio
+import unicodedata
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.cache import TwoTierCache, get_redis, make_cache_key, mark_redis_unavailable, register_cache
+
+NAMESPACE = "captions"
+
+# Redis 통계 키 (키별 항목은 히트 상위 N개만 유지)
+STATS_TOP_HITS_KEY = f"cache:{NAMESPACE}:stats:top_hits"  # ZSET: 캐시 키 → 히트 수
+STATS_MISSES_KEY = f"cache:{NAMESPACE}:stats:top_misses"  # HASH: 캐시 키 → 미스 수 (ZSET에 남은 키만)
+STATS_LABELS_KEY = f"cache:{NAMESPACE}:stats:top_labels"  # HASH: 캐시 키 → 표시용 요약
+STATS_TOTAL_HITS_KEY = f"cache:{NAMESPACE}:stats:total_hits"
+STATS_TOTAL_MISSES_KEY = f"cache:{NAMESPACE}:stats:total_misses"
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """
+    캐시 키용 텍스트 정규화
+
+    유니코드 NFKC, 소문자화, 연속 공백 축약, 끝 문장부호 제거.
+    공백/대소문자/전각 문자만 다른 설명을 같은 키로 묶는다.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    text = re.sub(r"\s+", " ", text).strip().lower()
+    return text.rstrip(".!?~ ")
+
+
+class CaptionCache:
+    """
+    광고 문구 생성 결과 캐시 (프로세스 내 LRU + Redis, JSON 값)
+
+    키별 히트/미스를 프로세스 내(최근 키 N개)와 Redis(클러스터 전체, 히트 상위 N개)에 함께 기록해
+    캐시가 절약한 LLM 호출 수를 확인할 수 있다. Redis 기록은 조회 경로에서 빼서
+    일정 주기로 모아서 보낸다.
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int,
+        ttl: int,
+        stats_max_keys: int,
+        stats_flush_interval: float = 10.0
+    ):
+        """
+        Args:
+            max_memory_bytes: 프로세스 내 계층 최대 바이트 수
+            ttl: Redis 계층 만료 시간 (초)
+            stats_max_keys: 키별 통계를 유지할 최대 키 수 (프로세스 내: 오래된 키부터, Redis: 히트 하위부터 제거)
+            stats_flush_interval: Redis 통계를 모아서 보내는 주기 (초)
+        """
+        self.store = TwoTierCache(NAMESPACE, max_memory_bytes, ttl)
+        self.ttl = ttl
+        self.stats_max_keys = stats_max_keys
+        self.stats_flush_interval = stats_flush_interval
+        # 키 → {"label", "hits", "misses"}
+        self._key_stats: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = Lock()
+        # 아직 Redis에 보내지 않은 키별 증분 (키 → {"label", "hits", "misses"})
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self.bypassed = 0
+        # TwoTierCache 통계 대신 키별 통계를 포함한 통계로 등록
+        register_cache(NAMESPACE, self)
+
+    def make_key(
+        self,
+        provider: str,
+        product_description: str,
+        platform: str,
+        style: Optional[str],
+        length: Any,
+        **options: Any
+    ) -> Dict[str, str]:
+        """
+        정규화된 입력으로 캐시 키 생성
+
+        Args:
+            provider: 생성 제공자 (openai, gemini) - 프롬프트가 다르므로 분리
+            product_description: 상품 설명
+            platform: SNS 플랫폼
+            style: 문구 스타일
+            length: 길이 (short/medium/long 또는 최대 글자 수)
+            options: 그 외 프롬프트에 영향을 주는 값 (include_emoji, include_hashtags, mood 등)
+
+        Returns:
+            {"key": 캐시 키, "label": 통계 표시용 요약}
+        """
+        normalized_options = {
+            name: normalize_text(value) if isinstance(value, str) else value
+            for name, value in options.items()
+        }
+        description = normalize_text(product_description)
+        key = make_cache_key(
+            provider,
+            description,
+            normalize_text(platform),
+            normalize_text(style),
+            length,
+            normalized_options
+        )
+        label = f"{provider}/{normalize_text(platform)}/{normalize_text(style)}/{length}: {description[:40]}"
+        return {"key": key, "label": label}
+
+    def _record(self, cache_key: Dict[str, str], hit: bool) -> None:
+        """프로세스 내 키별 통계 기록"""
+        field = "hits" if hit else "misses"
+        with self._lock:
+            entry = self._key_stats.pop(cache_key["key"], None)
+            if entry is None:
+                entry = {"label": cache_key["label"], "hits": 0, "misses": 0}
+            entry[field] += 1
+            self._key_stats[cache_key["key"]] = entry
+            while len(self._key_stats) > self.stats_max_keys:
+                self._key_stats.popitem(last=False)
+
+    def _record_redis(self, cache_key: Dict[str, str], hit: bool) -> None:
+        """
+        Redis 통계 증분을 모아 두고 주기적 전송 예약 (조회 경로에서는 Redis를 호출하지 않음)
+        """
+        entry = self._pending.get(cache_key["key"])
+        if entry is None:
+            entry = self._pending[cache_key["key"]] = {"label": cache_key["label"], "hits": 0, "misses": 0}
+        entry["hits" if hit else "misses"] += 1
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.stats_flush_interval)
+        await self.flush_stats()
+
+    async def flush_stats(self) -> None:
+        """
+        모아 둔 증분을 Redis에 반영하고 키별 항목을 히트 상위 stats_max_keys개로 정리
+
+        ZSET(히트 수)에서 밀려난 키는 미스/라벨 해시에서도 지워 전체 크기가 제한된다.
+        """
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        redis = get_redis()
+        if redis is None:
+            return
+
+        try:
+            pipe = redis.pipeline()
+            for key, entry in pending.items():
+                # 히트 0이어도 ZINCRBY로 멤버를 만들어 순위 정리 대상에 포함
+                pipe.zincrby(STATS_TOP_HITS_KEY, entry["hits"], key)
+                if entry["misses"]:
+                    pipe.hincrby(STATS_MISSES_KEY, key, entry["misses"])
+                pipe.hsetnx(STATS_LABELS_KEY, key, entry["label"])
+            pipe.incrby(STATS_TOTAL_HITS_KEY, sum(entry["hits"] for entry in pending.values()))
+            pipe.incrby(STATS_TOTAL_MISSES_KEY, sum(entry["misses"] for entry in pending.values()))
+            # 히트가 적은 순서로 상위 N개 밖의 키
+            pipe.zrange(STATS_TOP_HITS_KEY, 0, -(self.stats_max_keys + 1))
+            evicted = (await pipe.execute())[-1]
+
+            if evicted:
+                pipe = redis.pipeline()
+                pipe.zrem(STATS_TOP_HITS_KEY, *evicted)
+                pipe.hdel(STATS_MISSES_KEY, *evicted)
+                pipe.hdel(STATS_LABELS_KEY, *evicted)
+                await pipe.execute()
+        except Exception as e:
+            mark_redis_unavailable(e)
+
+    async def get(self, cache_key: Dict[str, str]) -> Optional[Any]:
+        """캐시 조회 (메모리 → Redis)"""
+        raw = await self.store.get(cache_key["key"])
+        hit = raw is not None
+        self._record(cache_key, hit)
+        self._record_redis(cache_key, hit)
+        return json.loads(raw) if hit else None
+
+    async def set(self, cache_key: Dict[str, str], value: Any) -> None:
+        """두 계층 모두에 저장"""
+        await self.store.set(cache_key["key"], json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def get_local(self, cache_key: Dict[str, str]) -> Optional[Any]:
+        """동기 경로용 조회 (프로세스 내 계층만)"""
+        raw = self.store.memory.get(cache_key["key"])
+        self._record(cache_key, raw is not None)
+        return json.loads(raw) if raw is not None else None
+
+    def set_local(self, cache_key: Dict[str, str], value: Any) -> None:
+        """동기 경로용 저장 (프로세스 내 계층만)"""
+        self.store.memory.set(cache_key["key"], json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def record_bypass(self) -> None:
+        """regenerate 요청으로 캐시를 건너뛴 횟수 기록"""
+        self.bypassed += 1
+
+    def _top_keys(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._key_stats.values())
+        entries.sort(key=lambda entry: entry["hits"], reverse=True)
+        return [
+            {
+                **entry,
+                "hit_rate": round(entry["hits"] / (entry["hits"] + entry["misses"]), 4)
+            }
+            for entry in entries[:limit]
+        ]
+
+    def get_stats(self, top: int = 10) -> Dict[str, Any]:
+        """계층별 히트/미스 + 키별 상위 통계 (프로세스 내)"""
+        stats = self.store.get_stats()
+        hits = stats["memory_hits"] + stats["redis_hits"]
+        return {
+            **stats,
+            "regenerate_bypasses": self.bypassed,
+            "llm_calls_saved": hits,
+            "tracked_keys": len(self._key_stats),
+            "top_keys": self._top_keys(top)
+        }
+
+    async def get_global_stats(self, top: int = 20) -> Dict[str, Any]:
+        """
+        Redis에 누적된 히트/미스 (모든 인스턴스 합산, 아직 전송 전인 증분은 제외)
+
+        Returns:
+            {"llm_calls_saved", "misses", "hit_rate", "top_keys"} 또는 Redis 미사용 시 {"available": False}
+        """
+        redis = get_redis()
+        if redis is None:
+            return {"available": False}
+        try:
+            pipe = redis.pipeline()
+            pipe.get(STATS_TOTAL_HITS_KEY)
+            pipe.get(STATS_TOTAL_MISSES_KEY)
+            pipe.zrevrange(STATS_TOP_HITS_KEY, 0, top - 1, withscores=True)
+            total_hits, total_misses, top_hits = await pipe.execute()
+
+            keys = [key for key, _ in top_hits]
+            misses, labels = [], []
+            if keys:
+                pipe = redis.pipeline()
+                pipe.hmget(STATS_MISSES_KEY, keys)
+                pipe.hmget(STATS_LABELS_KEY, keys)
+                misses, labels = await pipe.execute()
+        except Exception as e:
+            mark_redis_unavailable(e)
+            return {"available": False}
+
+        entries = []
+        for (_, score), key_misses, label in zip(top_hits, misses, labels):
+            key_hits, key_misses = int(score), int(key_misses or 0)
+            lookups = key_hits + key_misses
+            entries.append({
+                "label": (label or b"").decode("utf-8"),
+                "hits": key_hits,
+                "misses": key_misses,
+                "hit_rate": round(key_hits / lookups, 4) if lookups else 0.0
+            })
+
+        total_hits, total_misses = int(total_hits or 0), int(total_misses or 0)
+        total = total_hits + total_misses
+        return {
+            "available": True,
+            "llm_calls_saved": total_hits,
+            "misses": total_misses,
+            "hit_rate": round(total_hits / total, 4) if total else 0.0,
+            "top_keys": entries
+        }
+
+
+# Singleton instance
+_caption_cache = None
+
+
+def get_caption_cache() -> Optional[CaptionCache]:
+    """Get or create CaptionCache singleton (비활성화 시 None)"""
+    global _caption_cache
+    if not settings.CAPTION_CACHE_ENABLED:
+        return None
+    if _caption_cache is None:
+        _caption_cache = CaptionCache(
+            max_memory_bytes=settings.CAPTION_CACHE_MEMORY_BYTES,
+            ttl=settings.CAPTION_CACHE_TTL,
+            stats_max_keys=settings.CAPTION_CACHE_STATS_MAX_KEYS,
+            stats_flush_interval=settings.CAPTION_CACHE_STATS_FLUSH_INTERVAL
+        )
+    return _caption_cache
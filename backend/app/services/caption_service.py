@@ -1,10 +1,15 @@
 """
 GPT-4o-mini 광고 문구 생성 서비스
 """
-from typing import Optional, List, Dict, Any
+import json
+import asyncio
+from typing import Optional, List, Dict, Any, AsyncIterator
 import openai
 from fastapi import HTTPException
 from app.core.config import settings
+from app.core.cache import make_cache_key
+from app.core.singleflight import SingleFlight
+from app.services.caption_cache_service import get_caption_cache
 
 
 class CaptionGenerationService:
@@ -22,6 +27,18 @@ class CaptionGenerationService:
         self.max_tokens = 500
         self.temperature = 0.8  # 창의성 높임
 
+        # 동일 파라미터로 동시에 들어온 요청은 한 번만 호출
+        self._inflight = SingleFlight()
+
+        # 서비스 전체 동시 OpenAI 호출 수 제한
+        self._semaphore = asyncio.Semaphore(settings.CAPTION_MAX_CONCURRENCY)
+
+        # 정규화된 입력 기준 생성 결과 캐시 (비활성화 시 None)
+        self.cache = get_caption_cache()
+
+    # 다중 플랫폼 생성 대상
+    PLATFORMS = ["instagram", "facebook", "kakao"]
+
     async def generate_caption(
         self,
         product_description: str,
@@ -30,7 +47,8 @@ class CaptionGenerationService:
         mood: Optional[str] = None,
         max_length: int = 100,
         include_emoji: bool = True,
-        include_hashtags: bool = True
+        include_hashtags: bool = True,
+        regenerate: bool = False
     ) -> Dict[str, Any]:
         """
         광고 문구 생성
@@ -43,6 +61,7 @@ class CaptionGenerationService:
             max_length: 최대 글자 수
             include_emoji: 이모지 포함 여부
             include_hashtags: 해시태그 포함 여부
+            regenerate: True면 캐시를 건너뛰고 새로 생성 (결과로 캐시 갱신)
 
         Returns:
             {
@@ -52,39 +71,100 @@ class CaptionGenerationService:
                 "platform": str
             }
         """
-        try:
-            # 플랫폼별 특성 정의
-            platform_specs = {
-                "instagram": {
-                    "max_length": 2200,
-                    "tone": "visual and trendy",
-                    "hashtag_count": "5-10"
-                },
-                "facebook": {
-                    "max_length": 500,
-                    "tone": "friendly and conversational",
-                    "hashtag_count": "3-5"
-                },
-                "kakao": {
-                    "max_length": 1000,
-                    "tone": "casual and personal",
-                    "hashtag_count": "3-7"
-                }
-            }
+        cache_key = self._caption_cache_key(
+            product_description, platform, style, mood,
+            max_length, include_emoji, include_hashtags
+        )
+        if cache_key is not None:
+            if regenerate:
+                self.cache.record_bypass()
+            else:
+                cached = await self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+        result = await self._inflight.do(
+            make_cache_key(
+                "generate_caption",
+                product_description, platform, style, mood,
+                max_length, include_emoji, include_hashtags, regenerate
+            ),
+            self._generate_caption,
+            product_description,
+            platform,
+            style,
+            mood,
+            max_length,
+            include_emoji,
+            include_hashtags
+        )
+
+        # 파싱 실패 응답은 캐시하지 않음
+        if cache_key is not None and result.get("success"):
+            await self.cache.set(cache_key, result)
+        return result
 
-            spec = platform_specs.get(platform.lower(), platform_specs["instagram"])
+    def _caption_cache_key(
+        self,
+        product_description: str,
+        platform: str,
+        style: str,
+        mood: Optional[str],
+        max_length: int,
+        include_emoji: bool,
+        include_hashtags: bool
+    ) -> Optional[Dict[str, str]]:
+        """문구 캐시 키 (캐시 비활성화 시 None)"""
+        if self.cache is None:
+            return None
+        return self.cache.make_key(
+            "openai", product_description, platform, style, max_length,
+            mood=mood, include_emoji=include_emoji, include_hashtags=include_hashtags
+        )
 
-            # 스타일별 지침
-            style_prompts = {
-                "engaging": "Create engaging, emotional captions that connect with the audience",
-                "question": "Use questions to spark curiosity and engagement",
-                "concise": "Keep it short, punchy, and memorable"
+    def _build_caption_prompt(
+        self,
+        product_description: str,
+        platform: str,
+        style: str,
+        mood: Optional[str],
+        max_length: int,
+        include_emoji: bool,
+        include_hashtags: bool
+    ) -> str:
+        """광고 문구 생성 프롬프트 구성"""
+        # 플랫폼별 특성 정의
+        platform_specs = {
+            "instagram": {
+                "max_length": 2200,
+                "tone": "visual and trendy",
+                "hashtag_count": "5-10"
+            },
+            "facebook": {
+                "max_length": 500,
+                "tone": "friendly and conversational",
+                "hashtag_count": "3-5"
+            },
+            "kakao": {
+                "max_length": 1000,
+                "tone": "casual and personal",
+                "hashtag_count": "3-7"
             }
+        }
+
+        spec = platform_specs.get(platform.lower(), platform_specs["instagram"])
 
-            style_guide = style_prompts.get(style.lower(), style_prompts["engaging"])
+        # 스타일별 지침
+        style_prompts = {
+            "engaging": "Create engaging, emotional captions that connect with the audience",
+            "question": "Use questions to spark curiosity and engagement",
+            "concise": "Keep it short, punchy, and memorable"
+        }
 
-            # 프롬프트 구성
-            prompt = f"""
+        style_guide = style_prompts.get(style.lower(), style_prompts["engaging"])
+
+        # 프롬프트 구성
+        return f"""
 Generate 3 different {platform} ad captions for this product:
 
 Product: {product_description}
@@ -106,27 +186,44 @@ Return in JSON format:
 Make each caption unique and compelling. Focus on benefits and emotional appeal.
 """
 
-            # OpenAI API 호출
-            response = await openai.ChatCompletion.acreate(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a creative social media copywriter specialized in product marketing."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
+    async def _generate_caption(
+        self,
+        product_description: str,
+        platform: str,
+        style: str,
+        mood: Optional[str],
+        max_length: int,
+        include_emoji: bool,
+        include_hashtags: bool
+    ) -> Dict[str, Any]:
+        """generate_caption 실제 호출 (single-flight 리더만 실행)"""
+        try:
+            prompt = self._build_caption_prompt(
+                product_description, platform, style, mood,
+                max_length, include_emoji, include_hashtags
             )
 
+            # OpenAI API 호출 (동시 호출 수 제한)
+            async with self._semaphore:
+                response = await openai.ChatCompletion.acreate(
+                    model=self.model,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a creative social media copywriter specialized in product marketing."
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    max_tokens=self.max_tokens,
+                    temperature=self.temperature
+                )
+
             result = response.choices[0].message.content
 
             # JSON 파싱
-            import json
             try:
                 parsed = json.loads(result)
                 return {
@@ -151,37 +248,281 @@ Make each caption unique and compelling. Focus on benefits and emotional appeal.
                 detail=f"Failed to generate caption: {str(e)}"
             )
 
+    async def stream_caption(
+        self,
+        product_description: str,
+        platform: str = "instagram",
+        style: str = "engaging",
+        mood: Optional[str] = None,
+        max_length: int = 100,
+        include_emoji: bool = True,
+        include_hashtags: bool = True,
+        regenerate: bool = False
+    ) -> AsyncIterator[str]:
+        """
+        광고 문구 생성 (스트리밍)
+
+        Args:
+            generate_caption()과 동일
+
+        Yields:
+            모델 출력 텍스트 조각 ({"captions": [...], "hashtags": [...]} JSON의 일부)
+            캐시 히트 시 전체 JSON을 한 번에 반환
+        """
+        cache_key = self._caption_cache_key(
+            product_description, platform, style, mood,
+            max_length, include_emoji, include_hashtags
+        )
+        if cache_key is not None:
+            if regenerate:
+                self.cache.record_bypass()
+            else:
+                cached = await self.cache.get(cache_key)
+                if cached is not None:
+                    yield json.dumps(
+                        {"captions": cached.get("captions", []), "hashtags": cached.get("hashtags", [])},
+                        ensure_ascii=False
+                    )
+                    return
+
+        prompt = self._build_caption_prompt(
+            product_description, platform, style, mood,
+            max_length, include_emoji, include_hashtags
+        )
+
+        parts = []
+        async with self._semaphore:
+            response = await openai.ChatCompletion.acreate(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are a creative social media copywriter specialized in product marketing."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                stream=True
+            )
+
+            async for chunk in response:
+                delta = chunk.choices[0].delta.get("content")
+                if delta:
+                    parts.append(delta)
+                    yield delta
+
+        # 완성된 응답을 generate_caption()과 같은 형태로 캐시
+        if cache_key is not None:
+            try:
+                parsed = json.loads("".join(parts))
+            except json.JSONDecodeError:
+                return
+            await self.cache.set(cache_key, {
+                "success": True,
+                "captions": parsed.get("captions", []),
+                "hashtags": parsed.get("hashtags", []),
+                "platform": platform
+            })
+
     async def generate_multi_platform_captions(
         self,
         product_description: str,
-        mood: Optional[str] = None
+        mood: Optional[str] = None,
+        single_prompt: bool = False,
+        regenerate: bool = False
     ) -> Dict[str, Any]:
         """
-        모든 플랫폼용 광고 문구 생성
+        모든 플랫폼용 광고 문구 생성 (플랫폼별 요청을 동시에 실행)
 
         Args:
             product_description: 상품 설명
             mood: 분위기 (선택)
+            single_prompt: True면 하나의 프롬프트로 모든 플랫폼 문구를 한 번에 생성
+            regenerate: True면 플랫폼별 문구 캐시를 건너뛰고 새로 생성
 
         Returns:
-            플랫폼별 광고 문구
+            {
+                "success": bool,  # 모든 플랫폼 성공 여부
+                "platforms": {platform: generate_caption() 결과},
+                "errors": {platform: 에러 메시지}  # 실패한 플랫폼만
+            }
         """
-        try:
-            results = {}
+        if single_prompt:
+            return await self._generate_multi_platform_single_prompt(product_description, mood, regenerate)
 
-            for platform in ["instagram", "facebook", "kakao"]:
-                result = await self.generate_caption(
+        results = await asyncio.gather(
+            *(
+                self.generate_caption(
                     product_description=product_description,
                     platform=platform,
                     style="engaging",
-                    mood=mood
+                    mood=mood,
+                    regenerate=regenerate
                 )
-                results[platform] = result
+                for platform in self.PLATFORMS
+            ),
+            return_exceptions=True
+        )
 
-            return {
-                "success": True,
-                "platforms": results
-            }
+        platforms: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        for platform, result in zip(self.PLATFORMS, results):
+            if isinstance(result, HTTPException):
+                errors[platform] = str(result.detail)
+            elif isinstance(result, Exception):
+                errors[platform] = str(result)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                platforms[platform] = result
+
+        if not platforms:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to generate multi-platform captions: {errors}"
+            )
+
+        return {
+            "success": not errors,
+            "platforms": platforms,
+            "errors": errors
+        }
+
+    async def _generate_multi_platform_single_prompt(
+        self,
+        product_description: str,
+        mood: Optional[str] = None,
+        regenerate: bool = False
+    ) -> Dict[str, Any]:
+        """
+        하나의 구조화된 프롬프트로 모든 플랫폼 문구 생성 (LLM 왕복 1회)
+
+        플랫폼별 문구 캐시는 동시 실행 경로와 같은 키를 사용하며, 캐시에 없는 플랫폼만 요청한다.
+
+        Returns:
+            generate_multi_platform_captions()와 동일
+        """
+        cache_keys = {
+            platform: self._caption_cache_key(product_description, platform, "engaging", mood, 100, True, True)
+            for platform in self.PLATFORMS
+        }
+
+        platforms: Dict[str, Any] = {}
+        for platform, cache_key in cache_keys.items():
+            if cache_key is None:
+                continue
+            if regenerate:
+                self.cache.record_bypass()
+                continue
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                platforms[platform] = cached
+
+        errors: Dict[str, str] = {}
+        missing = [platform for platform in self.PLATFORMS if platform not in platforms]
+        if missing:
+            try:
+                parsed = await self._inflight.do(
+                    make_cache_key(
+                        "generate_multi_platform", product_description, mood, ",".join(missing), regenerate
+                    ),
+                    self._generate_platforms_single_prompt,
+                    product_description,
+                    mood,
+                    missing
+                )
+            except HTTPException as e:
+                parsed = {}
+                errors = {platform: str(e.detail) for platform in missing}
+
+            for platform in missing:
+                if platform in errors:
+                    continue
+                data = parsed.get(platform)
+                if not isinstance(data, dict) or not data.get("captions"):
+                    errors[platform] = "Missing captions in response"
+                    continue
+                result = {
+                    "success": True,
+                    "captions": data.get("captions", []),
+                    "hashtags": data.get("hashtags", []),
+                    "platform": platform
+                }
+                if cache_keys[platform] is not None:
+                    await self.cache.set(cache_keys[platform], result)
+                platforms[platform] = result
+
+        if not platforms:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to generate multi-platform captions: {errors}"
+            )
+
+        return {
+            "success": not errors,
+            "platforms": platforms,
+            "errors": errors
+        }
+
+    async def _generate_platforms_single_prompt(
+        self,
+        product_description: str,
+        mood: Optional[str],
+        platforms: List[str]
+    ) -> Dict[str, Any]:
+        """_generate_multi_platform_single_prompt 실제 호출 (single-flight 리더만 실행)"""
+        platform_guides = {
+            "instagram": "visual and trendy, relevant emojis, 5-10 hashtags",
+            "facebook": "friendly and conversational, 3-5 hashtags",
+            "kakao": "casual and personal, 3-7 hashtags",
+        }
+        requirements = "\n".join(f"- {platform}: {platform_guides[platform]}" for platform in platforms)
+        example = ",\n".join(
+            f'    "{platform}": {{"captions": ["caption1", "caption2", "caption3"], "hashtags": ["tag1", ...]}}'
+            for platform in platforms
+        )
+
+        prompt = f"""
+Generate ad captions for this product for each platform: {", ".join(platforms)}.
+
+Product: {product_description}
+{f"Mood/Vibe: {mood}" if mood else ""}
+
+Requirements:
+{requirements}
+- 3 unique captions per platform, each under 100 characters
+- Create engaging, emotional captions that connect with the audience
+
+Return in JSON format:
+{{
+{example}
+}}
+"""
+
+        try:
+            async with self._semaphore:
+                response = await openai.ChatCompletion.acreate(
+                    model=self.model,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a creative social media copywriter specialized in product marketing."
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    max_tokens=self.max_tokens * len(platforms),
+                    temperature=self.temperature,
+                    response_format={"type": "json_object"}
+                )
+
+            return json.loads(response.choices[0].message.content)
 
         except Exception as e:
             raise HTTPException(
@@ -0,0 +1,171 @@
+"""
+광고 문구 스트리밍 서비스
+LLM 스트리밍 응답을 점진적으로 파싱해 문구가 완성되는 즉시 Server-Sent Events로 전달
+"""
+import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+
+class IncrementalCaptionParser:
+    """
+    {"captions": ["...", "..."]} 형태의 JSON 스트림 점진 파서
+
+    청크가 들어올 때마다 완성된 문구 문자열만 반환한다. 코드 블록(```json) 등 앞뒤 텍스트는 무시.
+    """
+
+    def __init__(self, key: str = "captions"):
+        self._key = f'"{key}"'
+        self._buffer = ""
+        self._pos = 0
+        self._state = "seek_key"  # seek_key → seek_array → in_array ⇄ in_string → done
+        self._string_start = 0
+        self.captions: List[str] = []
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        텍스트 청크 추가
+
+        Returns:
+            이번 청크로 새로 완성된 문구 목록
+        """
+        self._buffer += chunk
+        completed: List[str] = []
+
+        while self._pos < len(self._buffer) and self._state != "done":
+            if self._state == "seek_key":
+                index = self._buffer.find(self._key, self._pos)
+                if index < 0:
+                    # 키가 청크 경계에 걸칠 수 있으므로 끝부분은 남겨 둠
+                    self._pos = max(self._pos, len(self._buffer) - len(self._key))
+                    break
+                self._pos = index + len(self._key)
+                self._state = "seek_array"
+
+            elif self._state == "seek_array":
+                index = self._buffer.find("[", self._pos)
+                if index < 0:
+                    self._pos = len(self._buffer)
+                    break
+                self._pos = index + 1
+                self._state = "in_array"
+
+            elif self._state == "in_array":
+                char = self._buffer[self._pos]
+                if char == '"':
+                    self._string_start = self._pos
+                    self._state = "in_string"
+                elif char == "]":
+                    self._state = "done"
+                self._pos += 1
+
+            elif self._state == "in_string":
+                char = self._buffer[self._pos]
+                if char == "\\":
+                    # 이스케이프된 다음 문자가 아직 도착하지 않았으면 대기
+                    if self._pos + 1 >= len(self._buffer):
+                        break
+                    self._pos += 2
+                    continue
+                if char == '"':
+                    raw = self._buffer[self._string_start:self._pos + 1]
+                    caption = json.loads(raw)
+                    self.captions.append(caption)
+                    completed.append(caption)
+                    self._state = "in_array"
+                self._pos += 1
+
+        return completed
+
+
+# SSE 응답 헤더 (프록시 버퍼링/캐시 방지)
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data: Dict) -> str:
+    """Server-Sent Events 메시지 포맷"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_caption_events(
+    chunks: AsyncIterator[str],
+    on_done: Optional[Callable[[List[str]], Awaitable[None]]] = None
+) -> AsyncIterator[str]:
+    """
+    LLM 텍스트 청크 스트림을 SSE 이벤트 스트림으로 변환
+
+    Args:
+        chunks: 모델 출력 텍스트 조각 스트림
+        on_done: 스트림 완료 후 완성된 문구 목록으로 호출 (DB 저장 등)
+
+    Events:
+        token: {"text": str}  - 모델 출력 조각
+        caption: {"index": int, "caption": str}  - 문구 하나가 완성될 때마다
+        done: {"captions": list[str]}  - 스트림 종료
+        error: {"detail": str}  - 생성 실패 (응답 헤더가 이미 전송되었으므로 이벤트로 전달)
+    """
+    parser = IncrementalCaptionParser()
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            yield sse_event("token", {"text": chunk})
+            for caption in parser.feed(chunk):
+                yield sse_event("caption", {"index": len(parser.captions) - 1, "caption": caption})
+
+        if not parser.captions:
+            raise ValueError("Failed to parse captions from model response")
+
+        if on_done is not None:
+            await on_done(parser.captions)
+
+    except Exception as e:
+        detail = getattr(e, "detail", None) or str(e)
+        print(f"❌ Caption stream failed: {detail}")
+        yield sse_event("error", {"detail": f"Failed to generate caption: {detail}"})
+        return
+
+    yield sse_event("done", {"captions": parser.captions})
+
+
+def get_caption_text_stream(
+    product_description: str,
+    platform: str = "instagram",
+    style: Optional[str] = None,
+    length: str = "medium",
+    regenerate: bool = False
+) -> AsyncIterator[str]:
+    """
+    설정된 LLM 제공자의 문구 생성 텍스트 스트림 반환 (Gemini 우선, 없으면 OpenAI)
+
+    regenerate=False면 문구 캐시 히트 시 모델 호출 없이 캐시된 JSON을 한 번에 반환
+
+    Raises:
+        ValueError: 사용할 수 있는 제공자가 없을 때
+    """
+    if settings.GEMINI_API_KEY:
+        from app.services.gemini_service import get_gemini_service
+        return get_gemini_service().stream_caption(
+            product_description=product_description,
+            platform=platform,
+            style=style or "감성형",
+            length=length,
+            regenerate=regenerate
+        )
+
+    if settings.OPENAI_API_KEY:
+        from app.services.caption_service import get_caption_service
+        max_length = {"short": 50, "medium": 100, "long": 150}.get(length, 100)
+        return get_caption_service().stream_caption(
+            product_description=product_description,
+            platform=platform,
+            style=style or "engaging",
+            max_length=max_length,
+            regenerate=regenerate
+        )
+
+    raise ValueError("No caption provider configured (GEMINI_API_KEY or OPENAI_API_KEY)")
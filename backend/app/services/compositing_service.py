@@ -0,0 +1,391 @@
+"""
+배경 합성 서비스
+배경 제거된 RGBA 상품 이미지를 배경(단색/그라데이션 프리셋 또는 Unsplash 사진)에 합성
+
+합성 자체는 프로세스 풀에서 실행되므로 composite_images()와 하위 함수는
+모듈 최상위에 두고 bytes/dict만 주고받는다.
+"""
+import io
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from PIL import Image, ImageChops, ImageFilter, ImageOps
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from app.core.config import settings
+from app.core.cache import TwoTierCache, make_cache_key
+from app.core.executors import run_in_process
+from app.core.http import get_http_client
+
+
+# 스타일 → 배경 프리셋 (프론트엔드 StyleSelector id 기준)
+BACKGROUND_PRESETS: Dict[str, Dict[str, Any]] = {
+    "minimal-white": {"color": (255, 255, 255)},
+    "minimal-gray": {"color": (240, 240, 240)},
+    "gradient-purple": {"gradient": ((243, 232, 255), (167, 139, 250))},
+    "gradient-blue": {"gradient": ((224, 242, 254), (96, 165, 250))},
+    "studio-soft": {"gradient": ((252, 252, 252), (214, 214, 218))},
+    "studio-dramatic": {"gradient": ((72, 72, 82), (12, 12, 16)), "shadow_opacity": 0.6},
+    "clean_white": {"color": (255, 255, 255)},
+}
+
+# 사진 배경이 필요한 스타일 → Unsplash 검색어 (그 외 알 수 없는 스타일은 스타일 문자열로 검색)
+UNSPLASH_QUERIES = {
+    "natural-wood": "wooden table texture background",
+    "natural-marble": "white marble texture background",
+    "luxury_marble": "luxury marble background",
+}
+
+DEFAULT_STYLE = "minimal-white"
+
+# 출력 포맷 → (MIME 타입, 확장자)
+OUTPUT_FORMATS = {
+    "JPEG": ("image/jpeg", "jpg"),
+    "PNG": ("image/png", "png"),
+    "WEBP": ("image/webp", "webp"),
+}
+
+ALPHA_THRESHOLD = 8  # 이 값 이하의 알파는 상품 영역(bbox) 계산에서 배경으로 취급
+DEFAULT_SHADOW_OPACITY = 0.35
+
+
+# ===== 합성 (프로세스 풀에서 실행) =====
+def crop_to_alpha(image: Image.Image) -> Image.Image:
+    """알파 채널 bbox로 상품 영역만 잘라냄"""
+    mask = image.getchannel("A").point(lambda a: 255 if a > ALPHA_THRESHOLD else 0)
+    bbox = mask.getbbox()
+    if bbox is None:
+        raise ValueError("Product image is fully transparent")
+    return image.crop(bbox)
+
+
+def resize_rgba(image: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """알파 premultiply 상태로 리사이즈 (가장자리 검은 테두리 방지)"""
+    return image.convert("RGBa").resize(size, Image.LANCZOS).convert("RGBA")
+
+
+def feather_alpha(alpha: Image.Image, radius: float) -> Image.Image:
+    """가장자리만 안쪽으로 부드럽게 (원본 알파와 블러 알파의 최솟값)"""
+    return ImageChops.darker(alpha, alpha.filter(ImageFilter.GaussianBlur(radius)))
+
+
+def render_background(background: Dict[str, Any], options: Dict[str, Any]) -> Image.Image:
+    """
+    배경 캔버스 생성
+
+    Args:
+        background: {"image": bytes} | {"gradient": (top, bottom)} | {"color": (r, g, b)}
+        options: canvas_size, max_side
+
+    Returns:
+        RGB 이미지
+    """
+    if background.get("image"):
+        max_side = options["max_side"]
+        canvas = Image.open(io.BytesIO(background["image"]))
+        canvas.draft("RGB", (max_side, max_side))
+        canvas = ImageOps.exif_transpose(canvas).convert("RGB")
+        canvas.thumbnail((max_side, max_side), Image.LANCZOS)
+        return canvas
+
+    size = (options["canvas_size"], options["canvas_size"])
+    if background.get("gradient"):
+        top, bottom = background["gradient"]
+        # 세로 그라데이션 (256단계 마스크를 캔버스 크기로 확대)
+        mask = Image.linear_gradient("L").resize(size, Image.BILINEAR)
+        return Image.composite(
+            Image.new("RGB", size, tuple(bottom)),
+            Image.new("RGB", size, tuple(top)),
+            mask
+        )
+
+    return Image.new("RGB", size, tuple(background.get("color") or (255, 255, 255)))
+
+
+def _shadow_layer(
+    alpha: Image.Image,
+    canvas_size: Tuple[int, int],
+    position: Tuple[int, int]
+) -> Tuple[Image.Image, Tuple[int, int, int, int]]:
+    """
+    그림자 알파 레이어 생성 (상품 주변 영역만 계산)
+
+    Returns:
+        (블러된 그림자 알파, 캔버스 내 영역 (x0, y0, x1, y1))
+    """
+    width, height = alpha.size
+    offset = max(1, round(height * 0.03))
+    radius = max(2.0, max(width, height) * 0.025)
+    margin = int(radius * 3) + offset
+
+    x, y = position
+    x0, y0 = max(0, x - margin), max(0, y - margin)
+    x1, y1 = min(canvas_size[0], x + width + margin), min(canvas_size[1], y + height + margin)
+
+    layer = Image.new("L", (x1 - x0, y1 - y0), 0)
+    layer.paste(alpha, (x - x0, y - y0 + offset))
+    return layer.filter(ImageFilter.GaussianBlur(radius)), (x0, y0, x1, y1)
+
+
+def blend(
+    canvas: Image.Image,
+    product: Image.Image,
+    alpha: Image.Image,
+    position: Tuple[int, int],
+    shadow_opacity: float
+) -> Image.Image:
+    """
+    그림자 + 상품 알파 블렌딩 (상품 영역만 NumPy 정수 연산)
+
+    Args:
+        canvas: RGB 배경
+        product: RGBA 상품 (캔버스 크기에 맞춘 상태)
+        alpha: 상품 알파 (페더링 적용된 것)
+        position: 상품 좌상단 좌표
+        shadow_opacity: 그림자 불투명도 (0 = 그림자 없음)
+
+    Returns:
+        합성된 RGB 이미지
+    """
+    x, y = position
+    width, height = product.size
+    rgb = product.convert("RGB")
+
+    if np is None:
+        # NumPy 미설치 시 Pillow 합성
+        if shadow_opacity > 0:
+            layer, (x0, y0, x1, y1) = _shadow_layer(alpha, canvas.size, position)
+            layer = layer.point(lambda a: int(a * shadow_opacity))
+            region = canvas.crop((x0, y0, x1, y1))
+            region = Image.composite(Image.new("RGB", region.size, (0, 0, 0)), region, layer)
+            canvas.paste(region, (x0, y0))
+        canvas.paste(rgb, position, alpha)
+        return canvas
+
+    pixels = np.array(canvas)  # 쓰기 가능한 HxWx3 uint8 복사본
+
+    if shadow_opacity > 0:
+        layer, (x0, y0, x1, y1) = _shadow_layer(alpha, canvas.size, position)
+        shadow = (np.asarray(layer, dtype=np.uint16) * int(shadow_opacity * 256)) >> 8
+        region = pixels[y0:y1, x0:x1]
+        region[:] = (region * (255 - shadow)[..., None] + 127) // 255
+
+    a = np.asarray(alpha, dtype=np.uint16)[..., None]
+    foreground = np.asarray(rgb, dtype=np.uint16)
+    region = pixels[y:y + height, x:x + width]
+    region[:] = (foreground * a + region * (255 - a) + 127) // 255
+
+    return Image.fromarray(pixels, "RGB")
+
+
+def encode_image(image: Image.Image, output_format: str, quality: int) -> bytes:
+    """합성 결과 인코딩"""
+    buffer = io.BytesIO()
+    if output_format == "PNG":
+        image.save(buffer, format="PNG", compress_level=6)
+    else:
+        image.save(buffer, format=output_format, quality=quality)
+    return buffer.getvalue()
+
+
+def composite_images(product_png: bytes, background: Dict[str, Any], options: Dict[str, Any]) -> bytes:
+    """
+    상품 이미지를 배경 중앙에 맞춰 합성
+
+    알파 bbox 기준으로 상품을 잘라낸 뒤 여백(padding)을 두고 캔버스에 맞게 확대/축소해 중앙 배치한다.
+
+    Args:
+        product_png: 배경 제거된 RGBA 이미지 (PNG/WebP)
+        background: render_background() 참고
+        options: canvas_size, max_side, padding, shadow_opacity, feather_radius, format, quality
+
+    Returns:
+        인코딩된 합성 이미지
+    """
+    product = crop_to_alpha(Image.open(io.BytesIO(product_png)).convert("RGBA"))
+    canvas = render_background(background, options)
+
+    canvas_width, canvas_height = canvas.size
+    padding = options["padding"]
+    box_width = max(1, int(canvas_width * (1 - 2 * padding)))
+    box_height = max(1, int(canvas_height * (1 - 2 * padding)))
+
+    scale = min(box_width / product.width, box_height / product.height)
+    size = (max(1, round(product.width * scale)), max(1, round(product.height * scale)))
+    if size != product.size:
+        product = resize_rgba(product, size)
+
+    position = ((canvas_width - size[0]) // 2, (canvas_height - size[1]) // 2)
+
+    alpha = product.getchannel("A")
+    if options["feather_radius"] > 0:
+        alpha = feather_alpha(alpha, options["feather_radius"])
+
+    result = blend(canvas, product, alpha, position, options["shadow_opacity"])
+    return encode_image(result, options["format"], options["quality"])
+
+
+# ===== 서비스 =====
+@dataclass
+class CompositeResult:
+    """합성 결과"""
+    data: bytes
+    mime_type: str
+    extension: str
+    background: str  # 'preset:<style>' 또는 'unsplash:<photo_id>'
+
+
+class CompositingService:
+    """배경 제거된 상품 이미지 배경 합성 서비스"""
+
+    def __init__(self):
+        self.format = settings.COMPOSITE_OUTPUT_FORMAT.upper()
+        if self.format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported COMPOSITE_OUTPUT_FORMAT: {self.format}")
+
+        # Unsplash 검색 결과/배경 이미지 캐시 (API 호출 한도 절약)
+        self.background_cache = TwoTierCache(
+            "backgrounds",
+            settings.BACKGROUND_CACHE_MEMORY_BYTES,
+            settings.BACKGROUND_CACHE_TTL
+        )
+
+    async def composite(
+        self,
+        product_png: bytes,
+        background: Dict[str, Any],
+        shadow: Optional[bool] = None,
+        shadow_opacity: Optional[float] = None,
+        feather_radius: Optional[float] = None,
+        padding: Optional[float] = None,
+        output_format: Optional[str] = None
+    ) -> bytes:
+        """
+        상품 이미지를 배경에 합성 (프로세스 풀에서 실행)
+
+        Args:
+            product_png: 배경 제거된 RGBA 이미지
+            background: {"image": bytes} | {"gradient": (top, bottom)} | {"color": (r, g, b)}
+            shadow: 그림자 사용 여부 (기본: COMPOSITE_SHADOW)
+            shadow_opacity: 그림자 불투명도 (기본: 0.35)
+            feather_radius: 가장자리 페더링 반경 (기본: COMPOSITE_FEATHER_RADIUS)
+            padding: 여백 비율 (기본: COMPOSITE_PADDING)
+            output_format: JPEG, PNG, WEBP (기본: COMPOSITE_OUTPUT_FORMAT)
+
+        Returns:
+            인코딩된 합성 이미지
+        """
+        use_shadow = settings.COMPOSITE_SHADOW if shadow is None else shadow
+        if shadow_opacity is None:
+            shadow_opacity = background.get("shadow_opacity", DEFAULT_SHADOW_OPACITY)
+
+        options = {
+            "canvas_size": settings.COMPOSITE_CANVAS_SIZE,
+            "max_side": settings.COMPOSITE_MAX_SIDE,
+            "padding": settings.COMPOSITE_PADDING if padding is None else padding,
+            "shadow_opacity": shadow_opacity if use_shadow else 0.0,
+            "feather_radius": settings.COMPOSITE_FEATHER_RADIUS if feather_radius is None else feather_radius,
+            "format": (output_format or self.format).upper(),
+            "quality": settings.COMPOSITE_OUTPUT_QUALITY,
+        }
+        return await run_in_process(composite_images, product_png, background, options)
+
+    async def composite_with_style(
+        self,
+        product_png: bytes,
+        style: Optional[str] = None,
+        seed: int = 0,
+        shadow: Optional[bool] = None
+    ) -> CompositeResult:
+        """
+        스타일 이름으로 배경을 골라 합성
+
+        Args:
+            product_png: 배경 제거된 RGBA 이미지
+            style: 배경 스타일 (프리셋 id, Unsplash 스타일, 또는 검색어)
+            seed: Unsplash 결과 중 선택 인덱스 (같은 이미지는 같은 배경)
+            shadow: 그림자 사용 여부
+
+        Returns:
+            CompositeResult
+        """
+        background, source = await self.resolve_background(style, seed)
+        data = await self.composite(product_png, background, shadow=shadow)
+        mime_type, extension = OUTPUT_FORMATS[self.format]
+        return CompositeResult(data=data, mime_type=mime_type, extension=extension, background=source)
+
+    async def resolve_background(self, style: Optional[str], seed: int = 0) -> Tuple[Dict[str, Any], str]:
+        """
+        스타일 → 배경 정의
+
+        프리셋은 로컬에서 생성하고, 사진 스타일은 Unsplash에서 가져온다.
+        Unsplash를 사용할 수 없으면 기본 프리셋으로 대체한다.
+
+        Returns:
+            (render_background() 입력, 배경 출처 문자열)
+        """
+        style = style or DEFAULT_STYLE
+        if style in BACKGROUND_PRESETS:
+            return BACKGROUND_PRESETS[style], f"preset:{style}"
+
+        if settings.UNSPLASH_ACCESS_KEY:
+            query = UNSPLASH_QUERIES.get(style, style)
+            try:
+                photo_id, image = await self._fetch_unsplash_background(query, seed)
+                return {"image": image}, f"unsplash:{photo_id}"
+            except Exception as e:
+                print(f"⚠️ Unsplash background unavailable for '{style}', using {DEFAULT_STYLE}: {e}")
+
+        return BACKGROUND_PRESETS[DEFAULT_STYLE], f"preset:{DEFAULT_STYLE}"
+
+    async def _fetch_unsplash_background(self, query: str, seed: int) -> Tuple[str, bytes]:
+        """Unsplash 검색 → 사진 다운로드 (검색 결과와 이미지 모두 캐시)"""
+        from app.services.unsplash_service import get_unsplash_service
+        unsplash = get_unsplash_service()
+
+        search_key = make_cache_key("search", query)
+        cached = await self.background_cache.get(search_key)
+        if cached is not None:
+            photos = json.loads(cached)
+        else:
+            result = await unsplash.search_photos(query=query, per_page=10, orientation="squarish")
+            photos = [
+                {
+                    "id": photo["id"],
+                    "url": photo["urls"]["regular"],
+                    "download_location": photo.get("links", {}).get("download_location")
+                }
+                for photo in result.get("results", [])
+            ]
+            if not photos:
+                raise ValueError(f"No Unsplash results for '{query}'")
+            await self.background_cache.set(search_key, json.dumps(photos).encode("utf-8"))
+
+        photo = photos[seed % len(photos)]
+        image_key = make_cache_key("photo", photo["id"])
+        image = await self.background_cache.get(image_key)
+        if image is None:
+            response = await get_http_client("unsplash").get(photo["url"])
+            response.raise_for_status()
+            image = response.content
+            await self.background_cache.set(image_key, image)
+            # Unsplash API 가이드라인: 사진 사용 시 다운로드 엔드포인트 호출
+            if photo["download_location"]:
+                await unsplash.download_photo(photo["id"], photo["download_location"])
+
+        return photo["id"], image
+
+
+# Singleton instance
+_compositing_service: Optional[CompositingService] = None
+
+
+def get_compositing_service() -> CompositingService:
+    """Get or create CompositingService singleton"""
+    global _compositing_service
+    if _compositing_service is None:
+        _compositing_service = CompositingService()
+    return _compositing_service
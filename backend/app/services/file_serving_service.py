@@ -0,0 +1,230 @@
+"""
+파일 제공 서비스
+/files 응답용 ETag(내용 해시), 캐시 정책, 조건부 요청(304), 바이트 범위(206) 처리
+"""
+import os
+import re
+import hashlib
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import aiofiles
+
+from app.core.config import settings
+from app.services.storage_backends.base import guess_content_type
+
+# 내용이 바뀌지 않는 경로 (경로에 SHA-256이 들어 있음)
+_CONTENT_ADDRESSED = re.compile(r"(^|/)blobs/[0-9a-f]{2}/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})(\.[A-Za-z0-9]+)?$")
+_SINGLE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+_RANGE_CHUNK_SIZE = 256 * 1024
+
+
+@dataclass
+class FileInfo:
+    """제공할 파일 정보"""
+    full_path: Path
+    stat: os.stat_result
+    size: int
+    etag: str  # 따옴표 포함 강한 ETag
+    last_modified: datetime
+    content_type: str
+    immutable: bool
+
+    def headers(self) -> Dict[str, str]:
+        """모든 응답(200/206/304)에 공통인 캐시 헤더"""
+        return {
+            "ETag": self.etag,
+            "Last-Modified": formatdate(self.last_modified.timestamp(), usegmt=True),
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if self.immutable else REVALIDATE_CACHE_CONTROL,
+            "Accept-Ranges": "bytes",
+        }
+
+
+def _hash_file(full_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(full_path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 비교 (약한 비교: W/ 접두사 무시, * 는 모두 일치)"""
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == etag
+        for candidate in candidates
+    )
+
+
+def is_not_modified(info: FileInfo, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+    """
+    조건부 GET 판단 (RFC 9110: If-None-Match가 있으면 If-Modified-Since는 무시)
+    """
+    if if_none_match:
+        return etag_matches(if_none_match, info.etag)
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(info.last_modified.timestamp()) <= int(since.timestamp())
+    return False
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    단일 바이트 범위 파싱
+
+    Returns:
+        (start, end) 포함 범위, 범위 요청이 아니거나 여러 범위면 None (전체 응답)
+
+    Raises:
+        ValueError: 만족할 수 없는 범위 (416)
+    """
+    if not header:
+        return None
+    match = _SINGLE_RANGE.match(header.strip())
+    if not match:
+        # 여러 범위/형식 오류는 무시하고 전체를 보냄 (RFC 허용)
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # 마지막 N바이트
+        length = int(last)
+        if length == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+def if_range_allows(header: Optional[str], info: FileInfo) -> bool:
+    """If-Range가 현재 파일과 맞을 때만 부분 응답 (강한 비교)"""
+    if not header:
+        return True
+    header = header.strip()
+    if header.startswith('"') or header.startswith("W/"):
+        return header == info.etag
+    try:
+        return int(info.last_modified.timestamp()) == int(parsedate_to_datetime(header).timestamp())
+    except (TypeError, ValueError):
+        return False
+
+
+async def iter_file_range(full_path: Path, start: int, end: int) -> AsyncIterator[bytes]:
+    """파일의 [start, end] 범위를 청크 단위로 읽기"""
+    remaining = end - start + 1
+    async with aiofiles.open(full_path, "rb") as f:
+        await f.seek(start)
+        while remaining > 0:
+            chunk = await f.read(min(_RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class FileServingService:
+    """로컬 저장소 파일 메타데이터/ETag 조회 서비스"""
+
+    def __init__(self, base_dir: str, max_cached_hashes: int = 4096):
+        """
+        Args:
+            base_dir: 제공할 파일의 기본 디렉토리
+            max_cached_hashes: 기억할 내용 해시 수 (내용 주소가 아닌 경로용)
+        """
+        self.base_dir = Path(base_dir).resolve()
+        self.max_cached_hashes = max_cached_hashes
+        # (경로, 크기, mtime_ns) → SHA-256, 파일이 바뀌면 키가 달라짐
+        self._hashes: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+
+    def resolve(self, file_path: str) -> Optional[Path]:
+        """요청 경로 → 절대 경로 (숨김/임시 파일, 기본 디렉토리 밖이면 None)"""
+        if any(part.startswith(".") for part in file_path.split("/")):
+            return None
+        full_path = (self.base_dir / file_path).resolve()
+        if not full_path.is_relative_to(self.base_dir):
+            return None
+        return full_path
+
+    async def _content_hash(self, file_path: str, full_path: Path, stat: os.stat_result) -> str:
+        key = (file_path, stat.st_size, stat.st_mtime_ns)
+        digest = self._hashes.get(key)
+        if digest is not None:
+            self._hashes.move_to_end(key)
+            return digest
+
+        digest = await asyncio.to_thread(_hash_file, full_path)
+        self._hashes[key] = digest
+        while len(self._hashes) > self.max_cached_hashes:
+            self._hashes.popitem(last=False)
+        return digest
+
+    async def get_file_info(self, file_path: str) -> Optional[FileInfo]:
+        """
+        파일 정보 조회
+
+        내용 주소 경로는 경로의 해시를 그대로 ETag로 쓰고 immutable로 표시한다.
+        그 밖의 경로는 내용 해시를 한 번 계산해 (크기, 수정 시각)별로 기억한다.
+
+        Args:
+            file_path: /files 아래 상대 경로
+
+        Returns:
+            FileInfo (없으면 None)
+        """
+        full_path = self.resolve(file_path)
+        if full_path is None:
+            return None
+        try:
+            stat = full_path.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not full_path.is_file():
+            return None
+
+        match = _CONTENT_ADDRESSED.search(file_path)
+        if match:
+            digest = match.group("sha256")
+        else:
+            digest = await self._content_hash(file_path, full_path, stat)
+
+        return FileInfo(
+            full_path=full_path,
+            stat=stat,
+            size=stat.st_size,
+            etag=f'"{digest}"',
+            last_modified=datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            content_type=guess_content_type(file_path),
+            immutable=match is not None
+        )
+
+
+# Singleton instance
+_file_serving_service = None
+
+
+def get_file_serving_service() -> FileServingService:
+    """Get or create FileServingService singleton"""
+    global _file_serving_service
+    if _file_serving_service is None:
+        _file_serving_service = FileServingService(settings.LOCAL_STORAGE_DIR)
+    return _file_serving_service
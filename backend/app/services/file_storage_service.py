@@ -0,0 +1,490 @@
+"""
+File Storage Service
+저장소 드라이버(local / supabase / s3) 위의 공통 파일 저장 서비스
+
+업로드/처리 결과는 내용 주소(blobs/ab/cd/<sha256>.ext)로 저장하고
+stored_blobs 테이블의 참조 수로 중복 저장과 삭제 시점을 관리한다.
+역할(assets, trial)마다 드라이버를 따로 고를 수 있다.
+"""
+import os
+import uuid
+import hashlib
+import aiofiles
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from fastapi import UploadFile, HTTPException
+from sqlalchemy import update, delete, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.models.stored_blob import StoredBlob
+from app.services.storage_backends import ObjectStat, StorageBackend, get_storage_backend
+
+BLOB_FOLDER = "blobs"
+
+# 역할별 드라이버 설정
+STORAGE_ROLES = {
+    "assets": lambda: settings.STORAGE_BACKEND,
+    "trial": lambda: settings.TRIAL_STORAGE_BACKEND,
+}
+
+# 같은 형식의 확장자 표기 통일
+_EXTENSION_ALIASES = {".jpeg": ".jpg", ".jpe": ".jpg"}
+
+
+@dataclass
+class SavedUpload:
+    """스트리밍 저장된 업로드 파일 정보"""
+    path: str  # 저장된 상대 경로
+    size: int  # 바이트 수
+    sha256: str  # 저장하면서 계산한 SHA-256 hex
+
+
+class FileStorageService:
+    """역할(assets / trial)별 파일 저장 서비스"""
+
+    def __init__(self, role: str, backend: StorageBackend):
+        """
+        Initialize file storage service
+
+        Args:
+            role: 저장소 역할 ('assets', 'trial')
+            backend: 저장소 드라이버
+        """
+        self.role = role
+        self.backend = backend
+        # 역할끼리 같은 드라이버/버킷을 써도 blob이 섞이지 않도록 접두사 분리
+        self.blob_prefix = f"{BLOB_FOLDER}/" if role == "assets" else f"{role}/{BLOB_FOLDER}/"
+        # 해시를 알기 전까지 업로드를 받아 두는 로컬 임시 디렉토리
+        self.temp_dir = Path(settings.LOCAL_STORAGE_DIR) / ".tmp"
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+
+    async def save_upload_file(
+        self,
+        file: UploadFile,
+        user_id: Optional[str] = None,
+        folder: str = "trial"
+    ) -> str:
+        """
+        파일을 저장하고 경로 반환
+
+        Args:
+            file: 업로드된 파일
+            user_id: 사용자 ID (없으면 session_id 사용)
+            folder: 저장 폴더명
+
+        Returns:
+            저장된 파일의 상대 경로
+        """
+        saved = await self.save_upload(file, user_id=user_id, folder=folder)
+        return saved.path
+
+    async def save_upload(
+        self,
+        file: UploadFile,
+        user_id: Optional[str] = None,
+        folder: str = "trial",
+        max_size: Optional[int] = None
+    ) -> SavedUpload:
+        """
+        업로드 파일을 청크 단위로 스트리밍 저장
+
+        파일 전체를 메모리에 올리지 않고 UPLOAD_CHUNK_SIZE씩 로컬 임시 파일에 쓰면서
+        SHA-256을 계산한다. max_size를 넘는 순간 중단하고 쓰던 파일을 지운다.
+        같은 내용이 이미 저장되어 있으면 기존 blob의 참조 수만 늘린다.
+
+        Args:
+            file: 업로드된 파일
+            user_id: 사용자 ID (호환용, 저장 위치는 내용 해시로 결정)
+            folder: 저장 폴더명 (호환용)
+            max_size: 최대 바이트 수 (기본 MAX_UPLOAD_SIZE)
+
+        Returns:
+            SavedUpload (경로, 크기, SHA-256)
+        """
+        max_size = max_size or settings.MAX_UPLOAD_SIZE
+
+        # 크기를 알 수 있으면 읽기 전에 거부
+        declared_size = getattr(file, "size", None)
+        if declared_size is not None and declared_size > max_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size: {max_size} bytes"
+            )
+
+        temp_path = self.temp_dir / f"{uuid.uuid4().hex}.tmp"
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(temp_path, 'wb') as f:
+                while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_size:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"File too large. Maximum size: {max_size} bytes"
+                        )
+                    digest.update(chunk)
+                    await f.write(chunk)
+
+            sha256 = digest.hexdigest()
+
+            async def place(blob_path: str) -> None:
+                await self.backend.adopt_file(blob_path, temp_path, content_type=file.content_type)
+
+            path = await self._store_blob(sha256, size, self._extension(file.filename), place)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to save file: {str(e)}"
+            )
+        finally:
+            # 중복이거나 실패하면 임시 파일 정리
+            temp_path.unlink(missing_ok=True)
+
+        return SavedUpload(path=path, size=size, sha256=sha256)
+
+    async def save_bytes(
+        self,
+        content: bytes,
+        filename: str,
+        user_id: Optional[str] = None,
+        folder: str = "processed"
+    ) -> str:
+        """
+        바이트 데이터를 내용 주소(blob)로 저장
+
+        Args:
+            content: 파일 내용 (bytes)
+            filename: 파일명 (확장자만 사용)
+            user_id: 사용자 ID (호환용)
+            folder: 저장 폴더명 (호환용)
+
+        Returns:
+            저장된 파일의 상대 경로
+        """
+        try:
+            sha256 = hashlib.sha256(content).hexdigest()
+
+            async def write(blob_path: str) -> None:
+                await self.backend.save_bytes(blob_path, content)
+
+            # 이미 같은 내용이 있으면 쓰기 생략
+            return await self._store_blob(sha256, len(content), self._extension(filename), write)
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to save bytes: {str(e)}"
+            )
+
+    async def save_bytes_at(self, content: bytes, file_path: str) -> str:
+        """
+        바이트 데이터를 지정한 경로(결정적 키)에 저장, 이미 있으면 덮어씀
+
+        Args:
+            content: 파일 내용 (bytes)
+            file_path: 저장할 상대 경로
+
+        Returns:
+            저장된 파일의 상대 경로
+        """
+        try:
+            await self.backend.save_bytes(file_path, content)
+            return file_path
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to save bytes: {str(e)}"
+            )
+
+    # ===== 내용 주소 저장 (blob) =====
+    @staticmethod
+    def _extension(filename: Optional[str]) -> str:
+        """파일명에서 정규화된 확장자 추출 (없거나 이상하면 빈 문자열)"""
+        extension = os.path.splitext(filename or "")[1].lower()
+        extension = _EXTENSION_ALIASES.get(extension, extension)
+        if len(extension) > 8 or not extension[1:].isalnum():
+            return ""
+        return extension
+
+    def blob_path(self, sha256: str, extension: str = "") -> str:
+        """blob 상대 경로: [{역할}/]blobs/ab/cd/<sha256><ext> (디렉터리당 파일 수 분산)"""
+        return f"{self.blob_prefix}{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+    def is_blob_path(self, file_path: str) -> bool:
+        return file_path.startswith(self.blob_prefix)
+
+    async def _store_blob(
+        self,
+        sha256: str,
+        size: int,
+        extension: str,
+        write: Callable[[str], Awaitable[None]]
+    ) -> str:
+        """
+        blob 참조 추가, 처음 보는 내용일 때만 write()로 파일 생성
+
+        새 행을 먼저 flush해 키를 잡은 뒤 파일을 쓰고 커밋하므로,
+        다른 요청은 파일이 자리 잡은 뒤에야 이 blob을 보게 된다.
+
+        Args:
+            sha256: 내용 해시
+            size: 바이트 수
+            extension: 새로 만들 때 사용할 확장자
+            write: blob 상대 경로를 받아 내용을 기록하는 함수
+
+        Returns:
+            blob 상대 경로
+        """
+        key = (StoredBlob.store == self.role, StoredBlob.sha256 == sha256)
+        async with async_session_maker() as db:
+            # 동시에 같은 내용이 처음 저장되면 한쪽은 INSERT 충돌 → 참조 추가로 재시도
+            for _ in range(2):
+                result = await db.execute(
+                    update(StoredBlob)
+                    .where(*key)
+                    .values(ref_count=StoredBlob.ref_count + 1)
+                )
+                if result.rowcount:
+                    path = (await db.execute(select(StoredBlob.path).where(*key))).scalar_one()
+                    await db.commit()
+                    return path
+
+                path = self.blob_path(sha256, extension)
+                db.add(StoredBlob(store=self.role, sha256=sha256, path=path, size=size, ref_count=1))
+                try:
+                    await db.flush()
+                except IntegrityError:
+                    await db.rollback()
+                    continue
+
+                await write(path)
+                await db.commit()
+                return path
+
+        raise RuntimeError(f"Could not register blob {sha256}")
+
+    async def _release_blob(self, file_path: str) -> bool:
+        """
+        blob 참조 제거, 참조 수가 0이 되면 행과 파일 삭제
+
+        Returns:
+            파일 삭제 여부
+        """
+        sha256 = Path(file_path).name.split(".", 1)[0]
+        key = (StoredBlob.store == self.role, StoredBlob.sha256 == sha256)
+        async with async_session_maker() as db:
+            await db.execute(
+                update(StoredBlob)
+                .where(*key)
+                .values(ref_count=StoredBlob.ref_count - 1)
+            )
+            result = await db.execute(delete(StoredBlob).where(*key, StoredBlob.ref_count <= 0))
+            removed = bool(result.rowcount)
+            # 커밋 전에 지워야 같은 내용을 새로 저장하는 요청과 엇갈리지 않음
+            if removed:
+                await self.backend.delete_many([file_path])
+            await db.commit()
+            return removed
+
+    # ===== 읽기 / 조회 =====
+    async def exists(self, file_path: str) -> bool:
+        """
+        파일 존재 여부
+
+        Args:
+            file_path: 파일 상대 경로
+
+        Returns:
+            존재 여부
+        """
+        try:
+            return await self.backend.exists(file_path)
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to check file: {str(e)}"
+            )
+
+    async def stat(self, file_path: str) -> Optional[ObjectStat]:
+        """
+        파일 메타데이터 (크기, ETag, Content-Type, 수정 시각)
+
+        Args:
+            file_path: 파일 상대 경로
+
+        Returns:
+            ObjectStat (없으면 None)
+        """
+        try:
+            return await self.backend.stat(file_path)
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to stat file: {str(e)}"
+            )
+
+    async def read_file(self, file_path: str) -> bytes:
+        """
+        파일 읽기
+
+        Args:
+            file_path: 파일 상대 경로
+
+        Returns:
+            파일 내용 (bytes)
+        """
+        try:
+            return await self.backend.read(file_path)
+
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="File not found")
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to read file: {str(e)}"
+            )
+
+    def open_range(self, file_path: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        바이트 범위 스트리밍 읽기 [start, end] (없는 파일은 FileNotFoundError)
+
+        Args:
+            file_path: 파일 상대 경로
+            start: 시작 오프셋
+            end: 끝 오프셋 (포함, None이면 끝까지)
+        """
+        return self.backend.open_range(file_path, start, end)
+
+    def get_file_url(self, file_path: str) -> str:
+        """
+        파일의 공개 URL 생성
+
+        Args:
+            file_path: 파일 상대 경로
+
+        Returns:
+            파일 접근 URL
+        """
+        return self.backend.public_url(file_path)
+
+    async def presign(self, file_path: str, expires_in: Optional[int] = None) -> str:
+        """
+        인증 없이 일정 시간 읽을 수 있는 URL 생성
+
+        Args:
+            file_path: 파일 상대 경로
+            expires_in: 유효 시간(초), 기본 STORAGE_PRESIGN_EXPIRES
+
+        Returns:
+            서명된 URL (로컬 드라이버는 공개 URL)
+        """
+        try:
+            return await self.backend.presign(file_path, expires_in or settings.STORAGE_PRESIGN_EXPIRES)
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to presign file: {str(e)}"
+            )
+
+    def path_from_url(self, file_url: str) -> Optional[str]:
+        """
+        get_file_url()로 만든 URL에서 상대 경로 추출
+
+        Args:
+            file_url: 파일 접근 URL
+
+        Returns:
+            파일 상대 경로 (이 저장소 URL이 아니면 None)
+        """
+        return self.backend.path_from_url(file_url)
+
+    # ===== 삭제 =====
+    async def delete_file(self, file_path: str) -> bool:
+        """
+        파일 삭제
+
+        Args:
+            file_path: 파일 상대 경로
+
+        Returns:
+            삭제 성공 여부
+        """
+        try:
+            # blob은 마지막 참조가 사라질 때만 삭제
+            if self.is_blob_path(file_path):
+                return await self._release_blob(file_path)
+
+            return bool(await self.backend.delete_many([file_path]))
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to delete file: {str(e)}"
+            )
+
+    async def discard_file(self, file_path: str) -> bool:
+        """
+        실패한 요청/작업이 남긴 파일 참조 해제 (정리 오류가 원래 오류를 가리지 않도록 로그만 남김)
+
+        Returns:
+            파일이 실제로 삭제되었는지 여부
+        """
+        try:
+            return await self.delete_file(file_path)
+        except HTTPException as e:
+            print(f"⚠️ Failed to release {file_path}: {e.detail}")
+            return False
+
+    async def delete_paths(self, file_paths: List[str]) -> int:
+        """
+        결정적 경로 파일 여러 개를 한 번에 삭제 (파생 이미지 정리용, 없는 파일은 무시)
+
+        blob은 참조 수로 관리되므로 delete_file()을 사용해야 한다.
+
+        Args:
+            file_paths: 파일 상대 경로 목록
+
+        Returns:
+            삭제 요청한 파일 수
+        """
+        try:
+            return await self.backend.delete_many([path for path in file_paths if not self.is_blob_path(path)])
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to delete files: {str(e)}"
+            )
+
+
+# Singleton instances (역할별)
+_file_storages: Dict[str, FileStorageService] = {}
+
+
+def get_file_storage(role: str = "assets") -> FileStorageService:
+    """
+    Get or create FileStorageService for a role
+
+    Args:
+        role: 'assets' (회원 원본/처리 결과) 또는 'trial' (체험 업로드)
+    """
+    if role not in STORAGE_ROLES:
+        raise ValueError(f"Unknown storage role '{role}'. Available: {', '.join(STORAGE_ROLES)}")
+
+    storage = _file_storages.get(role)
+    if storage is None:
+        storage = FileStorageService(role, get_storage_backend(STORAGE_ROLES[role]()))
+        _file_storages[role] = storage
+    return storage
@@ -4,17 +4,145 @@ Google Gemini API Service
 """
 import os
 import json
-from typing import Dict, Optional, List
+import asyncio
+from typing import AsyncIterator, Dict, Optional, List
 from fastapi import HTTPException
 try:
     import google.generativeai as genai
 except ImportError:
     genai = None
 from app.core.config import get_settings
+from app.core.cache import make_cache_key
+from app.core.singleflight import SingleFlight
+from app.services.image_preparation_service import get_image_preparation_service
+from app.services.analysis_cache_service import (
+    create_analysis_cache,
+    prepare_and_lookup,
+    prepare_and_lookup_async
+)
+from app.services.caption_cache_service import get_caption_cache
 
 settings = get_settings()
 
 
+# 이미지 분석 프롬프트
+ANALYZE_PROMPT = """
+이 이미지를 분석하여 다음 정보를 JSON 형식으로 제공해주세요:
+
+1. category: 상품의 카테고리 (예: 전자기기, 패션, 가구, 식품 등)
+2. colors: 이미지에서 주요 색상 3개 (영문, 예: ["black", "white", "red"])
+3. mood: 이미지의 전반적인 분위기 (예: modern, vintage, elegant, casual, professional)
+4. description: 상품에 대한 간단한 설명 (1-2문장, 한글)
+
+응답은 반드시 다음 형식의 JSON만 출력하세요:
+{
+  "category": "카테고리",
+  "colors": ["색상1", "색상2", "색상3"],
+  "mood": "분위기",
+  "description": "설명"
+}
+"""
+
+# 플랫폼별 가이드라인
+PLATFORM_GUIDE = {
+    "instagram": "해시태그와 이모지를 활용하고, 시각적이고 감성적인 표현",
+    "facebook": "친근하고 대화형 톤, 행동 유도 문구 포함",
+    "kakao": "간결하고 직관적인 메시지, 이모지 적절히 활용"
+}
+
+# 스타일별 가이드
+STYLE_GUIDE = {
+    "감성형": "감성적이고 스토리텔링이 있는 표현",
+    "질문형": "고객에게 질문을 던지는 형식으로 호기심 유발",
+    "간결형": "핵심 메시지만 간결하게 전달"
+}
+
+# 길이별 가이드
+LENGTH_GUIDE = {
+    "short": "1-2문장 (50자 이내)",
+    "medium": "2-3문장 (50-100자)",
+    "long": "3-4문장 (100-150자)"
+}
+
+
+def build_caption_prompt(
+    product_description: str,
+    platform: str,
+    style: str,
+    length: str
+) -> str:
+    """광고 문구 생성 프롬프트 구성"""
+    return f"""
+다음 상품에 대한 {platform} SNS 광고 문구를 3가지 만들어주세요.
+
+상품 설명: {product_description}
+
+요구사항:
+- 플랫폼: {platform} ({PLATFORM_GUIDE.get(platform, '')})
+- 스타일: {style} ({STYLE_GUIDE.get(style, '')})
+- 길이: {length} ({LENGTH_GUIDE.get(length, '')})
+- 각 문구는 서로 다른 접근 방식 사용
+- 자연스러운 한국어 표현
+- AI가 생성했다는 언급 없이 작성
+
+응답은 반드시 다음 형식의 JSON만 출력하세요:
+{{
+  "captions": [
+    "광고 문구 1",
+    "광고 문구 2",
+    "광고 문구 3"
+  ]
+}}
+"""
+
+
+def build_analyze_and_caption_prompt(
+    platform: str,
+    style: str,
+    length: str,
+    num_captions: int
+) -> str:
+    """이미지 분석 + 광고 문구 생성을 한 번에 요청하는 프롬프트 구성"""
+    return f"""
+이 상품 이미지를 분석하고, 그 결과를 바탕으로 {platform} SNS 광고 문구를 {num_captions}가지 만들어주세요.
+
+분석 항목:
+1. category: 상품의 카테고리 (예: 전자기기, 패션, 가구, 식품 등)
+2. colors: 이미지에서 주요 색상 3개 (영문, 예: ["black", "white", "red"])
+3. mood: 이미지의 전반적인 분위기 (예: modern, vintage, elegant, casual, professional)
+4. description: 상품에 대한 간단한 설명 (1-2문장, 한글)
+
+광고 문구 요구사항:
+- 플랫폼: {platform} ({PLATFORM_GUIDE.get(platform, '')})
+- 스타일: {style} ({STYLE_GUIDE.get(style, '')})
+- 길이: {length} ({LENGTH_GUIDE.get(length, '')})
+- 각 문구는 서로 다른 접근 방식 사용
+- 자연스러운 한국어 표현
+- AI가 생성했다는 언급 없이 작성
+
+응답은 반드시 다음 형식의 JSON만 출력하세요:
+{{
+  "category": "카테고리",
+  "colors": ["색상1", "색상2", "색상3"],
+  "mood": "분위기",
+  "description": "설명",
+  "captions": ["광고 문구 1", "광고 문구 2", "광고 문구 3"]
+}}
+"""
+
+
+def parse_json_response(text: str) -> Dict:
+    """Gemini 응답 텍스트에서 JSON 파싱 (마크다운 코드 블록 제거)"""
+    text = text.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return json.loads(text.strip())
+
+
 class GeminiService:
     """Google Gemini API를 사용한 이미지 분석 및 텍스트 생성 서비스"""
 
@@ -34,6 +162,57 @@ class GeminiService:
         self.model = genai.GenerativeModel('gemini-2.5-flash')
         print("✅ Using model: gemini-2.5-flash")
 
+        # 동일 이미지/파라미터로 동시에 들어온 요청은 한 번만 호출
+        self._inflight = SingleFlight()
+
+        # 비동기 호출 동시 실행 수 및 호출당 타임아웃
+        self.timeout = settings.GEMINI_TIMEOUT
+        self._semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+
+        # 전송 전 이미지 축소/재인코딩 (원본 업로드 대신 모델 입력 해상도로)
+        self.image_prep = get_image_preparation_service()
+
+        # 유사 이미지(재촬영/재압축)의 분석 결과 재사용 (지각 해시 캐시)
+        self.analysis_cache = create_analysis_cache("gemini_analysis")
+
+        # 정규화된 입력 기준 문구 캐시 (비활성화 시 None)
+        self.caption_cache = get_caption_cache()
+
+    async def _generate_content_async(self, contents, generation_config: Optional[Dict] = None):
+        """동시 실행 수 제한 + 타임아웃을 적용한 비동기 generate_content"""
+        async with self._semaphore:
+            try:
+                return await asyncio.wait_for(
+                    self.model.generate_content_async(
+                        contents,
+                        generation_config=generation_config,
+                        request_options={"timeout": self.timeout}
+                    ),
+                    timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
+                raise HTTPException(
+                    status_code=504,
+                    detail="Gemini API request timed out"
+                )
+
+    def _store_analysis(self, phash: Optional[int], analysis: Dict[str, any]) -> None:
+        """분석 결과를 캐시에 저장"""
+        if phash is not None and self.analysis_cache is not None:
+            self.analysis_cache.set(phash, analysis)
+
+    def _caption_cache_key(
+        self,
+        product_description: str,
+        platform: str,
+        style: str,
+        length: str
+    ) -> Optional[Dict[str, str]]:
+        """문구 캐시 키 (캐시 비활성화 시 None)"""
+        if self.caption_cache is None:
+            return None
+        return self.caption_cache.make_key("gemini", product_description, platform, style, length)
+
     def analyze_image(self, image_data: bytes) -> Dict[str, any]:
         """
         이미지를 분석하여 카테고리, 색상, 분위기 등을 추출
@@ -48,48 +227,71 @@ class GeminiService:
             - mood: 분위기/스타일
             - description: 상품 설명
         """
+        _, phash, cached = prepare_and_lookup(self.image_prep, self.analysis_cache, image_data)
+        if cached is not None:
+            return cached
+
+        analysis = self._inflight.do_sync(
+            make_cache_key("analyze_image", image_data),
+            self._analyze_image,
+            image_data
+        )
+        self._store_analysis(phash, analysis)
+        return analysis
+
+    def _analyze_image(self, image_data: bytes) -> Dict[str, any]:
+        """analyze_image 실제 호출 (single-flight 리더만 실행)"""
         try:
-            # PIL Image로 변환
-            from PIL import Image
-            import io
-            image = Image.open(io.BytesIO(image_data))
-
-            # Gemini API 요청 prompt
-            prompt = """
-이 이미지를 분석하여 다음 정보를 JSON 형식으로 제공해주세요:
+            # 모델 입력 해상도의 JPEG로 변환
+            image = self.image_prep.prepare(image_data).to_blob()
 
-1. category: 상품의 카테고리 (예: 전자기기, 패션, 가구, 식품 등)
-2. colors: 이미지에서 주요 색상 3개 (영문, 예: ["black", "white", "red"])
-3. mood: 이미지의 전반적인 분위기 (예: modern, vintage, elegant, casual, professional)
-4. description: 상품에 대한 간단한 설명 (1-2문장, 한글)
+            # Gemini로 이미지 분석
+            response = self.model.generate_content([ANALYZE_PROMPT, image])
 
-응답은 반드시 다음 형식의 JSON만 출력하세요:
-{
-  "category": "카테고리",
-  "colors": ["색상1", "색상2", "색상3"],
-  "mood": "분위기",
-  "description": "설명"
-}
-"""
+            return parse_json_response(response.text)
 
-            # Gemini로 이미지 분석
-            response = self.model.generate_content([prompt, image])
+        except json.JSONDecodeError as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to parse Gemini response: {str(e)}"
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to analyze image with Gemini: {str(e)}"
+            )
 
-            # 응답 텍스트 추출
-            text = response.text.strip()
+    async def analyze_image_async(self, image_data: bytes) -> Dict[str, any]:
+        """
+        이미지 분석 (비동기, 이벤트 루프를 블로킹하지 않음)
 
-            # JSON 파싱 (마크다운 코드 블록 제거)
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
-            text = text.strip()
+        Args:
+            image_data: 이미지 바이트 데이터
 
-            analysis = json.loads(text)
-            return analysis
+        Returns:
+            analyze_image()와 동일
+        """
+        _, phash, cached = await prepare_and_lookup_async(self.image_prep, self.analysis_cache, image_data)
+        if cached is not None:
+            return cached
+
+        analysis = await self._inflight.do(
+            make_cache_key("analyze_image", image_data),
+            self._analyze_image_async,
+            image_data
+        )
+        self._store_analysis(phash, analysis)
+        return analysis
+
+    async def _analyze_image_async(self, image_data: bytes) -> Dict[str, any]:
+        """analyze_image_async 실제 호출 (single-flight 리더만 실행)"""
+        try:
+            image = (await self.image_prep.prepare_async(image_data)).to_blob()
+            response = await self._generate_content_async([ANALYZE_PROMPT, image])
+            return parse_json_response(response.text)
 
+        except HTTPException:
+            raise
         except json.JSONDecodeError as e:
             raise HTTPException(
                 status_code=500,
@@ -106,7 +308,8 @@ class GeminiService:
         product_description: str,
         platform: str = "instagram",
         style: str = "감성형",
-        length: str = "medium"
+        length: str = "medium",
+        regenerate: bool = False
     ) -> List[str]:
         """
         상품 설명을 기반으로 SNS 광고 문구 생성
@@ -116,73 +319,274 @@ class GeminiService:
             platform: SNS 플랫폼 (instagram, facebook, kakao)
             style: 문구 스타일 (감성형, 질문형, 간결형)
             length: 문구 길이 (short, medium, long)
+            regenerate: True면 캐시를 건너뛰고 새로 생성 (결과로 캐시 갱신)
 
         Returns:
             광고 문구 3개의 리스트
         """
+        # 동기 경로는 Redis 없이 프로세스 내 계층만 사용
+        cache_key = self._caption_cache_key(product_description, platform, style, length)
+        if cache_key is not None:
+            if regenerate:
+                self.caption_cache.record_bypass()
+            else:
+                cached = self.caption_cache.get_local(cache_key)
+                if cached is not None:
+                    return cached
+
+        captions = self._inflight.do_sync(
+            make_cache_key("generate_caption", product_description, platform, style, length, regenerate),
+            self._generate_caption,
+            product_description,
+            platform,
+            style,
+            length
+        )
+
+        if cache_key is not None and captions:
+            self.caption_cache.set_local(cache_key, captions)
+        return captions
+
+    def _generate_caption(
+        self,
+        product_description: str,
+        platform: str,
+        style: str,
+        length: str
+    ) -> List[str]:
+        """generate_caption 실제 호출 (single-flight 리더만 실행)"""
         try:
-            # 플랫폼별 가이드라인
-            platform_guide = {
-                "instagram": "해시태그와 이모지를 활용하고, 시각적이고 감성적인 표현",
-                "facebook": "친근하고 대화형 톤, 행동 유도 문구 포함",
-                "kakao": "간결하고 직관적인 메시지, 이모지 적절히 활용"
-            }
+            prompt = build_caption_prompt(product_description, platform, style, length)
 
-            # 스타일별 가이드
-            style_guide = {
-                "감성형": "감성적이고 스토리텔링이 있는 표현",
-                "질문형": "고객에게 질문을 던지는 형식으로 호기심 유발",
-                "간결형": "핵심 메시지만 간결하게 전달"
-            }
+            # Gemini로 텍스트 생성
+            response = self.model.generate_content(prompt)
 
-            # 길이별 가이드
-            length_guide = {
-                "short": "1-2문장 (50자 이내)",
-                "medium": "2-3문장 (50-100자)",
-                "long": "3-4문장 (100-150자)"
-            }
+            captions_data = parse_json_response(response.text)
+            return captions_data.get("captions", [])
 
-            prompt = f"""
-다음 상품에 대한 {platform} SNS 광고 문구를 3가지 만들어주세요.
+        except json.JSONDecodeError as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to parse Gemini response: {str(e)}"
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to generate caption with Gemini: {str(e)}"
+            )
 
-상품 설명: {product_description}
+    async def generate_caption_async(
+        self,
+        product_description: str,
+        platform: str = "instagram",
+        style: str = "감성형",
+        length: str = "medium",
+        regenerate: bool = False
+    ) -> List[str]:
+        """
+        광고 문구 생성 (비동기)
 
-요구사항:
-- 플랫폼: {platform} ({platform_guide.get(platform, '')})
-- 스타일: {style} ({style_guide.get(style, '')})
-- 길이: {length} ({length_guide.get(length, '')})
-- 각 문구는 서로 다른 접근 방식 사용
-- 자연스러운 한국어 표현
-- AI가 생성했다는 언급 없이 작성
+        Args:
+            generate_caption()과 동일
 
-응답은 반드시 다음 형식의 JSON만 출력하세요:
-{{
-  "captions": [
-    "광고 문구 1",
-    "광고 문구 2",
-    "광고 문구 3"
-  ]
-}}
-"""
+        Returns:
+            광고 문구 3개의 리스트
+        """
+        cache_key = self._caption_cache_key(product_description, platform, style, length)
+        if cache_key is not None:
+            if regenerate:
+                self.caption_cache.record_bypass()
+            else:
+                cached = await self.caption_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+        captions = await self._inflight.do(
+            make_cache_key("generate_caption", product_description, platform, style, length, regenerate),
+            self._generate_caption_async,
+            product_description,
+            platform,
+            style,
+            length
+        )
+
+        if cache_key is not None and captions:
+            await self.caption_cache.set(cache_key, captions)
+        return captions
+
+    async def _generate_caption_async(
+        self,
+        product_description: str,
+        platform: str,
+        style: str,
+        length: str
+    ) -> List[str]:
+        """generate_caption_async 실제 호출 (single-flight 리더만 실행)"""
+        try:
+            prompt = build_caption_prompt(product_description, platform, style, length)
+            response = await self._generate_content_async(prompt)
+            captions_data = parse_json_response(response.text)
+            return captions_data.get("captions", [])
 
-            # Gemini로 텍스트 생성
-            response = self.model.generate_content(prompt)
+        except HTTPException:
+            raise
+        except json.JSONDecodeError as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to parse Gemini response: {str(e)}"
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to generate caption with Gemini: {str(e)}"
+            )
 
-            # 응답 텍스트 추출
-            text = response.text.strip()
+    async def stream_caption(
+        self,
+        product_description: str,
+        platform: str = "instagram",
+        style: str = "감성형",
+        length: str = "medium",
+        regenerate: bool = False
+    ) -> AsyncIterator[str]:
+        """
+        광고 문구 생성 (스트리밍)
 
-            # JSON 파싱 (마크다운 코드 블록 제거)
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
-            text = text.strip()
+        Args:
+            generate_caption()과 동일
 
-            captions_data = json.loads(text)
-            return captions_data.get("captions", [])
+        Yields:
+            모델 출력 텍스트 조각 ({"captions": [...]} JSON의 일부)
+            캐시 히트 시 전체 JSON을 한 번에 반환
+        """
+        cache_key = self._caption_cache_key(product_description, platform, style, length)
+        if cache_key is not None:
+            if regenerate:
+                self.caption_cache.record_bypass()
+            else:
+                cached = await self.caption_cache.get(cache_key)
+                if cached is not None:
+                    yield json.dumps({"captions": cached}, ensure_ascii=False)
+                    return
+
+        prompt = build_caption_prompt(product_description, platform, style, length)
+
+        parts = []
+        async with self._semaphore:
+            try:
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(
+                        prompt,
+                        generation_config={"response_mime_type": "application/json"},
+                        request_options={"timeout": self.timeout},
+                        stream=True
+                    ),
+                    timeout=self.timeout
+                )
+
+                # 청크마다 타임아웃 적용 (멈춘 스트림이 세마포어 슬롯과 SSE 연결을 붙잡지 않도록)
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.timeout)
+                    except StopAsyncIteration:
+                        break
+                    # 안전 필터 등으로 텍스트가 없는 청크는 건너뜀
+                    if chunk.parts:
+                        parts.append(chunk.text)
+                        yield chunk.text
+            except asyncio.TimeoutError:
+                raise HTTPException(
+                    status_code=504,
+                    detail="Gemini API request timed out"
+                )
+
+        if cache_key is not None:
+            try:
+                captions = parse_json_response("".join(parts)).get("captions", [])
+            except json.JSONDecodeError:
+                return
+            if captions:
+                await self.caption_cache.set(cache_key, captions)
+
+    async def analyze_and_caption(
+        self,
+        image_data: bytes,
+        platform: str = "instagram",
+        style: str = "감성형",
+        length: str = "medium",
+        num_captions: int = 3
+    ) -> Dict[str, any]:
+        """
+        이미지 분석과 광고 문구 생성을 한 번의 Gemini 호출로 수행
+
+        analyze_image → generate_caption 두 번의 왕복 대신 이미지를 한 번만 보내고
+        구조화된 JSON으로 분석 결과와 문구를 함께 받는다.
+
+        Args:
+            image_data: 이미지 바이트 데이터
+            platform: SNS 플랫폼 (instagram, facebook, kakao)
+            style: 문구 스타일 (감성형, 질문형, 간결형)
+            length: 문구 길이 (short, medium, long)
+            num_captions: 생성할 문구 수
 
+        Returns:
+            Dict containing:
+            - category, colors, mood, description: analyze_image()와 동일
+            - captions: 광고 문구 리스트
+        """
+        _, phash, cached = await prepare_and_lookup_async(self.image_prep, self.analysis_cache, image_data)
+        if cached is not None:
+            # 유사 이미지 분석 결과가 있으면 이미지 전송 없이 문구만 생성
+            captions = await self.generate_caption_async(
+                product_description=cached.get("description") or "상품 이미지",
+                platform=platform,
+                style=style,
+                length=length
+            )
+            return {**cached, "captions": captions[:num_captions]}
+
+        result = await self._inflight.do(
+            make_cache_key("analyze_and_caption", image_data, platform, style, length, num_captions),
+            self._analyze_and_caption,
+            image_data,
+            platform,
+            style,
+            length,
+            num_captions
+        )
+        self._store_analysis(phash, {k: v for k, v in result.items() if k != "captions"})
+        return result
+
+    async def _analyze_and_caption(
+        self,
+        image_data: bytes,
+        platform: str,
+        style: str,
+        length: str,
+        num_captions: int
+    ) -> Dict[str, any]:
+        """analyze_and_caption 실제 호출 (single-flight 리더만 실행)"""
+        try:
+            image = (await self.image_prep.prepare_async(image_data)).to_blob()
+            prompt = build_analyze_and_caption_prompt(platform, style, length, num_captions)
+            response = await self._generate_content_async(
+                [prompt, image],
+                generation_config={"response_mime_type": "application/json"}
+            )
+
+            result = parse_json_response(response.text)
+            captions = result.get("captions") or []
+            return {
+                "category": result.get("category"),
+                "colors": result.get("colors", []),
+                "mood": result.get("mood"),
+                "description": result.get("description"),
+                "captions": captions[:num_captions]
+            }
+
+        except HTTPException:
+            raise
         except json.JSONDecodeError as e:
             raise HTTPException(
                 status_code=500,
@@ -191,7 +595,7 @@ class GeminiService:
         except Exception as e:
             raise HTTPException(
                 status_code=500,
-                detail=f"Failed to generate caption with Gemini: {str(e)}"
+                detail=f"Failed to analyze image and generate caption with Gemini: {str(e)}"
             )
 
 
@@ -0,0 +1,107 @@
+"""
+Vision LLM 입력 이미지 전처리 서비스
+모델 입력 해상도로 축소, EXIF 제거, 압축 포맷 재인코딩 후 콘텐츠 해시로 캐시
+"""
+import io
+import asyncio
+import base64
+from dataclasses import dataclass
+from typing import Optional
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+from app.core.cache import LRUByteCache, make_cache_key
+
+
+# 출력 포맷 → MIME 타입
+FORMAT_MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+}
+
+
+@dataclass
+class PreparedImage:
+    """전처리된 이미지"""
+    data: bytes
+    mime_type: str
+
+    def to_data_url(self) -> str:
+        """OpenAI image_url 용 data URL"""
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('utf-8')}"
+
+    def to_blob(self) -> dict:
+        """Gemini generate_content 용 inline blob"""
+        return {"mime_type": self.mime_type, "data": self.data}
+
+
+class ImagePreparationService:
+    """Vision LLM 호출 전 이미지 축소/재인코딩 서비스"""
+
+    def __init__(self):
+        self.max_side = settings.VISION_MAX_SIDE
+        self.format = settings.VISION_IMAGE_FORMAT.upper()
+        if self.format not in FORMAT_MIME_TYPES:
+            raise ValueError(f"Unsupported VISION_IMAGE_FORMAT: {self.format}")
+        self.quality = settings.VISION_IMAGE_QUALITY
+        self.cache = LRUByteCache(settings.VISION_PREP_CACHE_BYTES)
+
+    def prepare(self, image_data: bytes, max_side: Optional[int] = None) -> PreparedImage:
+        """
+        이미지를 모델 입력 해상도로 축소하고 압축 포맷으로 재인코딩
+
+        Args:
+            image_data: 원본 이미지 바이트 데이터
+            max_side: 긴 변 최대 픽셀 (기본: VISION_MAX_SIDE)
+
+        Returns:
+            PreparedImage (EXIF 등 메타데이터 제거됨)
+        """
+        max_side = max_side or self.max_side
+        mime_type = FORMAT_MIME_TYPES[self.format]
+        cache_key = make_cache_key(image_data, max_side, self.format, self.quality)
+
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return PreparedImage(data=cached, mime_type=mime_type)
+
+        image = Image.open(io.BytesIO(image_data))
+        # JPEG는 DCT 스케일링으로 축소 디코딩 (전체 해상도 디코딩 생략)
+        image.draft("RGB", (max_side, max_side))
+        # EXIF 회전 정보를 픽셀에 반영 (재인코딩 시 EXIF는 버려짐)
+        image = ImageOps.exif_transpose(image)
+
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            # 투명 배경은 흰색으로 합성 (JPEG는 알파 미지원)
+            rgba = image.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            image = background
+        else:
+            image = image.convert("RGB")
+
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=self.format, quality=self.quality)
+        data = buffer.getvalue()
+
+        self.cache.set(cache_key, data)
+        return PreparedImage(data=data, mime_type=mime_type)
+
+    async def prepare_async(self, image_data: bytes, max_side: Optional[int] = None) -> PreparedImage:
+        """prepare()를 스레드 풀에서 실행 (디코딩/리사이즈가 이벤트 루프를 막지 않도록)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.prepare, image_data, max_side)
+
+
+# Singleton instance
+_image_preparation_service = None
+
+
+def get_image_preparation_service() -> ImagePreparationService:
+    """Get or create ImagePreparationService singleton"""
+    global _image_preparation_service
+    if _image_preparation_service is None:
+        _image_preparation_service = ImagePreparationService()
+    return _image_preparation_service
@@ -0,0 +1,268 @@
+"""
+즉석 이미지 변환 서비스
+/files/{path}?w=&fmt=&q= 요청을 축소 디코딩 + 프로세스 풀 리샘플링으로 처리하고
+결과를 디스크 캐시(총 바이트 기준 LRU)에 저장 (같은 변환은 single-flight로 한 번만)
+"""
+import os
+import time
+import uuid
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import aiofiles
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.executors import run_in_process
+from app.core.singleflight import SingleFlight
+from app.services.file_serving_service import FileInfo
+from app.services.variant_service import THUMBNAIL_WIDTHS, VARIANT_PRESETS, render_variants
+
+# 렌더링 방식이 바뀌면 올려서 기존 캐시 키를 무효화
+TRANSFORM_VERSION = 1
+
+# fmt 파라미터 → (Pillow 형식, 확장자, Content-Type)
+OUTPUT_FORMATS: Dict[str, Tuple[str, str, str]] = {
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+    "jpg": ("JPEG", ".jpg", "image/jpeg"),
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "png": ("PNG", ".png", "image/png"),
+}
+
+# 변환 가능한 원본 형식
+TRANSFORMABLE_TYPES = ("image/jpeg", "image/png", "image/webp")
+
+# 조회/저장 직후 응답이 파일을 열 때까지 삭제하지 않는 시간 (초)
+SERVE_LEASE_SECONDS = 30.0
+
+
+class TransformCache:
+    """변환 결과 디스크 캐시 - 총 바이트가 한도를 넘으면 가장 오래 안 쓴 항목부터 삭제"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Args:
+            directory: 캐시 디렉토리
+            max_bytes: 캐시 파일 총량 상한
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # 캐시 파일 → 크기 (오래 안 쓴 순)
+        self._entries: "OrderedDict[Path, int]" = OrderedDict()
+        self._total_bytes = 0
+        # 응답 중인 캐시 파일 → 삭제 보호 만료 시각 (monotonic)
+        self._leases: Dict[Path, float] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """기존 캐시 파일을 마지막 사용(mtime) 순으로 색인 (재시작 후에도 유지)"""
+        files = []
+        for path in self.directory.glob("*/*"):
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, path, stat.st_size))
+
+        for _, path, size in sorted(files):
+            self._entries[path] = size
+            self._total_bytes += size
+        self._evict()
+
+    def path_for(self, key: str, extension: str) -> Path:
+        return self.directory / key[:2] / f"{key}{extension}"
+
+    def get(self, key: str, extension: str) -> Optional[Path]:
+        """캐시 파일 경로 (없으면 None), 사용 시각 갱신"""
+        path = self.path_for(key, extension)
+        try:
+            # mtime을 마지막 사용 시각으로 사용 (다른 프로세스/재시작 후 LRU 순서 복원용)
+            os.utime(path)
+        except FileNotFoundError:
+            # 다른 프로세스가 지운 항목
+            size = self._entries.pop(path, None)
+            if size is not None:
+                self._total_bytes -= size
+            self._leases.pop(path, None)
+            return None
+
+        self._lease(path)
+        if path in self._entries:
+            self._entries.move_to_end(path)
+        else:
+            # 다른 프로세스가 만든 항목
+            size = path.stat().st_size
+            self._entries[path] = size
+            self._total_bytes += size
+            self._evict()
+        return path
+
+    async def put(self, key: str, extension: str, data: bytes) -> Path:
+        """변환 결과 저장 (임시 파일에 쓴 뒤 교체) 후 한도 초과분 삭제"""
+        path = self.path_for(key, extension)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            async with aiofiles.open(temp_path, "wb") as f:
+                await f.write(data)
+            os.replace(temp_path, path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+        self._total_bytes += len(data) - self._entries.pop(path, 0)
+        self._entries[path] = len(data)
+        self._lease(path)
+        self._evict()
+        return path
+
+    def _lease(self, path: Path) -> None:
+        """응답이 파일을 여는 동안 삭제되지 않도록 보호 (열린 뒤에는 삭제되어도 전송은 계속됨)"""
+        self._leases[path] = time.monotonic() + SERVE_LEASE_SECONDS
+
+    def _evict(self) -> None:
+        """한도를 넘으면 오래 안 쓴 항목부터 삭제 (응답 중인 항목은 건너뜀)"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        now = time.monotonic()
+        for path in list(self._entries):
+            if self._total_bytes <= self.max_bytes:
+                break
+            lease = self._leases.get(path)
+            if lease is not None:
+                if lease > now:
+                    continue
+                del self._leases[path]
+            self._total_bytes -= self._entries.pop(path)
+            path.unlink(missing_ok=True)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class ImageTransformService:
+    """저장된 이미지의 즉석 크기 변경/형식 변환 서비스"""
+
+    def __init__(self):
+        self.cache = TransformCache(settings.TRANSFORM_CACHE_DIR, settings.TRANSFORM_CACHE_MAX_BYTES)
+        self.max_width = settings.TRANSFORM_MAX_WIDTH
+        self.default_quality = settings.TRANSFORM_DEFAULT_QUALITY
+        # 임의 값 조합으로 캐시/CPU를 소모시키지 못하도록 썸네일·내보내기 크기와 지정 품질만 허용
+        self.allowed_widths = sorted(
+            {*THUMBNAIL_WIDTHS, *(width for width, _ in VARIANT_PRESETS.values()), self.max_width}
+        )
+        self.allowed_qualities = sorted({*settings.TRANSFORM_ALLOWED_QUALITIES, self.default_quality})
+        # 인기 이미지에 몰린 같은 변환 요청은 한 번만 렌더링
+        self._inflight = SingleFlight()
+
+    def _validate(
+        self,
+        source: FileInfo,
+        width: Optional[int],
+        fmt: Optional[str],
+        quality: Optional[int]
+    ) -> Tuple[int, str, int]:
+        """파라미터 검증/기본값 적용 → (너비, 형식 키, 품질)"""
+        if source.content_type not in TRANSFORMABLE_TYPES:
+            raise HTTPException(status_code=400, detail="Only JPEG, PNG and WebP images can be transformed")
+
+        if width is not None and width not in self.allowed_widths:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported w. Available: {', '.join(map(str, self.allowed_widths))}"
+            )
+        if quality is not None and quality not in self.allowed_qualities:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported q. Available: {', '.join(map(str, self.allowed_qualities))}"
+            )
+
+        if fmt is None:
+            # 형식을 지정하지 않으면 원본 형식 유지
+            fmt = source.content_type.split("/", 1)[1]
+        fmt = fmt.lower()
+        if fmt not in OUTPUT_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported fmt. Available: {', '.join(OUTPUT_FORMATS)}"
+            )
+
+        return width or self.max_width, fmt, quality or self.default_quality
+
+    async def get_transformed(
+        self,
+        file_path: str,
+        source: FileInfo,
+        width: Optional[int] = None,
+        fmt: Optional[str] = None,
+        quality: Optional[int] = None
+    ) -> FileInfo:
+        """
+        변환된 이미지 정보 반환 (캐시에 없으면 렌더링)
+
+        캐시 키에 원본 ETag(내용 해시)가 들어가므로 원본이 바뀌면 새로 렌더링된다.
+
+        Args:
+            file_path: /files 아래 원본 상대 경로
+            source: 원본 파일 정보
+            width: 목표 너비 (허용 목록 중 하나, 원본보다 크게 확대하지 않음)
+            fmt: 출력 형식 (jpeg, webp, png)
+            quality: 품질 (허용 목록 중 하나)
+
+        Returns:
+            변환 결과 FileInfo (ETag는 캐시 키)
+        """
+        width, fmt, quality = self._validate(source, width, fmt, quality)
+        pillow_format, extension, content_type = OUTPUT_FORMATS[fmt]
+
+        key = hashlib.sha256(
+            f"{TRANSFORM_VERSION}:{file_path}:{source.etag}:{width}:{pillow_format}:{quality}".encode("utf-8")
+        ).hexdigest()
+
+        spec = {"name": "output", "mode": "width", "width": width, "format": pillow_format, "quality": quality}
+        path = self.cache.get(key, extension)
+        try:
+            if path is None:
+                path = await self._inflight.do(key, self._render, source.full_path, key, extension, spec)
+            stat = path.stat()
+        except FileNotFoundError:
+            # 다른 프로세스가 방금 삭제한 항목 → 다시 렌더링
+            path = await self._inflight.do(key, self._render, source.full_path, key, extension, spec)
+            stat = path.stat()
+
+        return FileInfo(
+            full_path=path,
+            stat=stat,
+            size=stat.st_size,
+            etag=f'"{key}"',
+            last_modified=source.last_modified,
+            content_type=content_type,
+            immutable=source.immutable
+        )
+
+    async def _render(self, source_path: Path, key: str, extension: str, spec: Dict) -> Path:
+        """원본 읽기 → 프로세스 풀에서 변환 → 캐시 저장 (single-flight 리더만 실행)"""
+        async with aiofiles.open(source_path, "rb") as f:
+            source = await f.read()
+        rendered = await run_in_process(render_variants, source, [spec])
+        return await self.cache.put(key, extension, rendered["output"])
+
+
+# Singleton instance
+_image_transform_service = None
+
+
+def get_image_transform_service() -> ImageTransformService:
+    """Get or create ImageTransformService singleton"""
+    global _image_transform_service
+    if _image_transform_service is None:
+        _image_transform_service = ImageTransformService()
+    return _image_transform_service
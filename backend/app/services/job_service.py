@@ -0,0 +1,491 @@
+"""
+이미지 처리 작업 서비스
+업로드 → 배경 제거 → 합성 → 썸네일 → 문구 생성 단계를 작업 단위로 실행 (DB 상태 저장, 단계별 재시도)
+"""
+import asyncio
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Set
+from fastapi import HTTPException
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.queue import enqueue_job, publish_job_event, subscribe_job_events
+from app.models import Image, ImageJob
+from app.services.file_storage_service import get_file_storage
+
+# 실행 순서대로
+STAGES = ["remove_bg", "composite", "thumbnails", "caption"]
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+def job_to_event(job: ImageJob) -> Dict[str, Any]:
+    """작업 상태를 진행 상황 이벤트(dict)로 변환"""
+    return {
+        "job_id": job.id,
+        "image_id": job.image_id,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress,
+        "attempts": job.attempts or {},
+        "error": job.error
+    }
+
+
+class JobService:
+    """이미지 처리 작업 생성/실행 서비스"""
+
+    def __init__(self):
+        self.storage = get_file_storage()
+        self.max_attempts = settings.JOB_STAGE_MAX_ATTEMPTS
+        self.retry_backoff = settings.JOB_RETRY_BACKOFF
+        self.stale_after = timedelta(seconds=settings.JOB_STALE_AFTER)
+
+        self._stage_handlers = {
+            "remove_bg": self._remove_background,
+            "composite": self._composite,
+            "thumbnails": self._thumbnails,
+            "caption": self._caption,
+        }
+
+        # Redis 미사용 시 API 프로세스에서 실행 중인 작업 (GC 방지용 참조)
+        self._inline_tasks: Set[asyncio.Task] = set()
+
+    # ===== 작업 생성/등록 =====
+    async def create_job(
+        self,
+        session: AsyncSession,
+        image: Image,
+        options: Dict[str, Any]
+    ) -> ImageJob:
+        """
+        작업 레코드 생성 (커밋은 호출 측에서)
+
+        Args:
+            session: DB 세션
+            image: 처리할 이미지 (id가 할당된 상태)
+            options: 작업 입력 (original_path, platform, style, length, product_description)
+
+        Returns:
+            생성된 ImageJob
+        """
+        job = ImageJob(
+            image_id=image.id,
+            user_id=image.user_id,
+            status="queued",
+            progress=0,
+            options=options,
+            attempts={},
+            results={}
+        )
+        session.add(job)
+        await session.flush()
+        return job
+
+    async def submit(self, job_id: int) -> str:
+        """
+        커밋된 작업을 큐에 등록
+
+        Redis를 사용할 수 없으면 JOB_INLINE_FALLBACK 설정에 따라 현재 프로세스에서 실행한다.
+
+        Returns:
+            작업 상태 ('queued' 또는 'failed')
+        """
+        if await enqueue_job(job_id):
+            return "queued"
+
+        if settings.JOB_INLINE_FALLBACK:
+            task = asyncio.create_task(self.run_job(job_id))
+            self._inline_tasks.add(task)
+            task.add_done_callback(self._inline_tasks.discard)
+            return "queued"
+
+        await self._update(
+            job_id,
+            status="failed",
+            error="Job queue is unavailable",
+            finished_at=datetime.now(timezone.utc)
+        )
+        return "failed"
+
+    async def requeue_stale_jobs(self) -> int:
+        """
+        오래 갱신되지 않은 queued/running 작업을 다시 큐에 등록 (워커 시작 시)
+
+        워커가 작업 도중 종료되었거나 큐 등록에 실패한 작업을 복구한다.
+        완료된 단계는 결과가 저장되어 있으므로 재실행 시 건너뛴다.
+
+        Returns:
+            재등록한 작업 수
+        """
+        cutoff = datetime.now(timezone.utc) - self.stale_after
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(ImageJob.id).where(
+                    ImageJob.status.in_(("queued", "running")),
+                    ImageJob.updated_at < cutoff
+                )
+            )
+            job_ids = list(result.scalars().all())
+
+        requeued = 0
+        for job_id in job_ids:
+            if await enqueue_job(job_id):
+                requeued += 1
+        return requeued
+
+    # ===== 상태 조회 =====
+    async def get_latest_job(self, session: AsyncSession, image_id: int) -> Optional[ImageJob]:
+        """이미지의 가장 최근 작업"""
+        result = await session.execute(
+            select(ImageJob)
+            .where(ImageJob.image_id == image_id)
+            .order_by(ImageJob.id.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_latest_jobs(self, session: AsyncSession, image_ids: Sequence[int]) -> Dict[int, ImageJob]:
+        """이미지별 가장 최근 작업 (목록 조회용, 한 번의 쿼리)"""
+        if not image_ids:
+            return {}
+        result = await session.execute(
+            select(ImageJob)
+            .where(ImageJob.image_id.in_(image_ids))
+            .order_by(ImageJob.id.desc())
+        )
+        jobs: Dict[int, ImageJob] = {}
+        for job in result.scalars():
+            jobs.setdefault(job.image_id, job)
+        return jobs
+
+    async def get_job_event(self, image_id: int) -> Optional[Dict[str, Any]]:
+        """이미지의 최근 작업 상태 이벤트 (새 세션 사용)"""
+        async with async_session_maker() as db:
+            job = await self.get_latest_job(db, image_id)
+            return job_to_event(job) if job else None
+
+    async def watch_job(self, image_id: int, poll_interval: float = 1.0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        작업 진행 상황 스트림 (종료 상태 이벤트 후 끝남)
+
+        Redis pub/sub 이벤트를 우선 사용하고, Redis를 사용할 수 없으면 DB를 주기적으로 조회한다.
+
+        Args:
+            image_id: 이미지 ID
+            poll_interval: DB 폴링 간격 (초, Redis 미사용 시)
+
+        Yields:
+            job_to_event() 형식의 상태 이벤트 (변경이 있을 때만)
+        """
+        last = None
+        try:
+            async with aclosing(subscribe_job_events(image_id)) as events:
+                async for event in events:
+                    if event is None:
+                        # 구독 직후/타임아웃: 놓친 이벤트가 없도록 DB 상태 확인
+                        event = await self.get_job_event(image_id)
+                        if event is None:
+                            return
+                    if event != last:
+                        last = event
+                        yield event
+                    if event["status"] in TERMINAL_STATUSES:
+                        return
+        except Exception as e:
+            print(f"⚠️ Job events unavailable, polling database: {e}")
+
+        while True:
+            event = await self.get_job_event(image_id)
+            if event is None:
+                return
+            if event != last:
+                last = event
+                yield event
+            if event["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(poll_interval)
+
+    # ===== 실행 =====
+    async def _update(self, job_id: int, **fields: Any) -> Optional[ImageJob]:
+        """작업 필드 갱신 후 진행 상황 이벤트 발행"""
+        async with async_session_maker() as db:
+            job = await db.get(ImageJob, job_id)
+            if job is None:
+                return None
+            for name, value in fields.items():
+                setattr(job, name, value)
+            await db.commit()
+            await db.refresh(job)
+
+        await publish_job_event(job.image_id, job_to_event(job))
+        return job
+
+    async def _claim(self, job_id: int) -> bool:
+        """
+        작업 실행 권한 획득 (원자적 상태 전환)
+
+        queued 작업 또는 오래 갱신되지 않은 running 작업만 running으로 바꾼다.
+        같은 작업이 큐에 중복 등록되어도 한 워커만 실행한다.
+        """
+        cutoff = datetime.now(timezone.utc) - self.stale_after
+        async with async_session_maker() as db:
+            result = await db.execute(
+                update(ImageJob)
+                .where(
+                    ImageJob.id == job_id,
+                    or_(
+                        ImageJob.status == "queued",
+                        and_(ImageJob.status == "running", ImageJob.updated_at < cutoff)
+                    )
+                )
+                .values(
+                    status="running",
+                    error=None,
+                    started_at=datetime.now(timezone.utc),
+                    updated_at=datetime.now(timezone.utc)
+                )
+            )
+            await db.commit()
+            return result.rowcount == 1
+
+    async def run_job(self, job_id: int) -> None:
+        """
+        작업의 모든 단계를 순서대로 실행
+
+        이미 결과가 저장된 단계(재시작된 작업)는 건너뛰고,
+        단계가 최대 시도 횟수만큼 실패하면 작업을 failed로 종료한다.
+        """
+        if not await self._claim(job_id):
+            return
+
+        job = await self._update(job_id)
+        if job is None:
+            return
+
+        print(f"⚙️ Job {job_id} started (image_id={job.image_id})")
+        results = dict(job.results or {})
+        attempts = dict(job.attempts or {})
+
+        for index, stage in enumerate(STAGES):
+            if stage in results:
+                continue
+
+            try:
+                results[stage] = await self._run_stage(job, stage, results, attempts)
+            except Exception as e:
+                detail = getattr(e, "detail", None) or str(e)
+                print(f"❌ Job {job_id} failed at {stage}: {detail}")
+                # 실패한 작업은 재실행되지 않으므로 앞 단계가 저장한 파일 참조를 돌려줌
+                results = await self._release_outputs(results)
+                await self._update(
+                    job_id,
+                    status="failed",
+                    stage=stage,
+                    attempts=dict(attempts),
+                    results=results,
+                    error=f"{stage}: {detail}",
+                    finished_at=datetime.now(timezone.utc)
+                )
+                return
+
+            await self._update(
+                job_id,
+                stage=stage,
+                progress=int((index + 1) * 100 / len(STAGES)),
+                results=dict(results)
+            )
+
+        await self._apply_results(job, results)
+        await self._update(
+            job_id,
+            status="succeeded",
+            progress=100,
+            finished_at=datetime.now(timezone.utc)
+        )
+        print(f"✅ Job {job_id} succeeded (image_id={job.image_id})")
+
+    async def _run_stage(
+        self,
+        job: ImageJob,
+        stage: str,
+        results: Dict[str, Any],
+        attempts: Dict[str, int]
+    ) -> Dict[str, Any]:
+        """
+        단계 실행 (실패 시 지수 백오프로 재시도)
+
+        4xx HTTPException은 입력 문제이므로 재시도하지 않는다.
+        """
+        handler = self._stage_handlers[stage]
+        while True:
+            attempts[stage] = attempts.get(stage, 0) + 1
+            await self._update(job.id, stage=stage, attempts=dict(attempts))
+
+            try:
+                return await handler(job, results)
+            except HTTPException as e:
+                if e.status_code < 500 or attempts[stage] >= self.max_attempts:
+                    raise
+                error = e.detail
+            except Exception as e:
+                if attempts[stage] >= self.max_attempts:
+                    raise
+                error = str(e)
+
+            delay = self.retry_backoff * (2 ** (attempts[stage] - 1))
+            print(
+                f"⚠️ Job {job.id} {stage} failed "
+                f"(attempt {attempts[stage]}/{self.max_attempts}), retrying in {delay:.0f}s: {error}"
+            )
+            await asyncio.sleep(delay)
+
+    # ===== 단계 =====
+    async def _remove_background(self, job: ImageJob, results: Dict[str, Any]) -> Dict[str, Any]:
+        """배경 제거 → 투명 PNG 저장"""
+        from app.services.rembg_service import get_rembg_service
+
+        original = await self.storage.read_file(job.options["original_path"])
+        png = await get_rembg_service().remove_background_from_bytes(
+            original,
+            filename=job.options.get("filename") or "image.png"
+        )
+        path = await self.storage.save_bytes(
+            png,
+            f"{job.image_id}_nobg.png",
+            user_id=str(job.user_id),
+            folder="processed"
+        )
+        return {"path": path, "url": self.storage.get_file_url(path)}
+
+    async def _composite(self, job: ImageJob, results: Dict[str, Any]) -> Dict[str, Any]:
+        """배경 합성 → 스타일 배경(프리셋 또는 Unsplash) 위에 상품 배치"""
+        from app.services.compositing_service import get_compositing_service
+
+        cutout = await self.storage.read_file(results["remove_bg"]["path"])
+        composite = await get_compositing_service().composite_with_style(
+            cutout,
+            style=job.options.get("style"),
+            seed=job.image_id
+        )
+        path = await self.storage.save_bytes(
+            composite.data,
+            f"{job.image_id}_composite.{composite.extension}",
+            user_id=str(job.user_id),
+            folder="processed"
+        )
+        return {"path": path, "url": self.storage.get_file_url(path), "background": composite.background}
+
+    async def _thumbnails(self, job: ImageJob, results: Dict[str, Any]) -> Dict[str, Any]:
+        """합성 이미지의 목록용 썸네일(WebP) 생성"""
+        from app.services.variant_service import get_variant_service
+
+        urls = await get_variant_service().generate_thumbnails(results["composite"]["url"])
+        return {"urls": urls}
+
+    async def _caption(self, job: ImageJob, results: Dict[str, Any]) -> Dict[str, Any]:
+        """상품 분석 + 광고 문구 생성 (Gemini 우선, 없으면 OpenAI)"""
+        options = job.options
+        platform = options.get("platform") or "instagram"
+        length = options.get("length") or "medium"
+        description = options.get("product_description")
+        analysis = None
+
+        if settings.GEMINI_API_KEY:
+            from app.services.gemini_service import get_gemini_service
+            gemini = get_gemini_service()
+            if not description:
+                original = await self.storage.read_file(options["original_path"])
+                analysis = await gemini.analyze_image_async(original)
+                description = analysis.get("description") or "상품 이미지"
+            captions = await gemini.generate_caption_async(
+                product_description=description,
+                platform=platform,
+                style=options.get("caption_style") or "감성형",
+                length=length
+            )
+            return {"provider": "gemini", "captions": captions, "hashtags": [], "analysis": analysis}
+
+        if settings.OPENAI_API_KEY:
+            from app.services.openai_service import get_openai_vision_service
+            from app.services.caption_service import get_caption_service
+            if not description:
+                original = await self.storage.read_file(options["original_path"])
+                analysis = await get_openai_vision_service().analyze_product_from_bytes(original)
+                description = analysis.get("description") or "product"
+            result = await get_caption_service().generate_caption(
+                product_description=description,
+                platform=platform,
+                style=options.get("caption_style") or "engaging",
+                mood=(analysis or {}).get("mood"),
+                max_length={"short": 50, "medium": 100, "long": 150}.get(length, 100)
+            )
+            return {
+                "provider": "openai",
+                "captions": result.get("captions", []),
+                "hashtags": result.get("hashtags", []),
+                "analysis": analysis
+            }
+
+        # 문구 제공자가 없으면 이미지 처리 결과만 반영
+        return {"provider": None, "captions": [], "hashtags": [], "skipped": "No caption provider configured"}
+
+    async def _release_outputs(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        단계 결과 파일의 참조 해제 (실패한 작업용)
+
+        파일이 실제로 지워지면 그 파일에서 만든 변형/썸네일도 삭제한다.
+        합성 이미지의 썸네일 결과는 목록이 원본 기준 썸네일을 쓰도록 함께 뺀다.
+
+        Returns:
+            파일 경로를 뺀 단계 결과 (이미지 삭제 시 다시 해제하지 않도록)
+        """
+        from app.services.variant_service import get_variant_service
+
+        remaining = {}
+        for stage, stage_result in results.items():
+            if stage == "thumbnails":
+                continue
+            if isinstance(stage_result, dict) and stage_result.get("path"):
+                path = stage_result["path"]
+                if await self.storage.discard_file(path):
+                    await get_variant_service().delete_derived(path)
+                stage_result = {k: v for k, v in stage_result.items() if k not in ("path", "url")}
+            remaining[stage] = stage_result
+        return remaining
+
+    async def _apply_results(self, job: ImageJob, results: Dict[str, Any]) -> None:
+        """단계 결과를 Image 레코드에 반영"""
+        caption_result = results.get("caption") or {}
+        captions = caption_result.get("captions") or []
+
+        async with async_session_maker() as db:
+            image = await db.get(Image, job.image_id)
+            if image is None:
+                return
+            image.processed_url = results["composite"]["url"]
+            if captions:
+                image.caption = captions[0]
+                image.caption_metadata = {
+                    "provider": caption_result.get("provider"),
+                    "platform": job.options.get("platform") or "instagram",
+                    "captions": captions,
+                    "hashtags": caption_result.get("hashtags", []),
+                    "analysis": caption_result.get("analysis"),
+                    "generated_at": datetime.now(timezone.utc).isoformat()
+                }
+            await db.commit()
+
+
+# Singleton instance
+_job_service: Optional[JobService] = None
+
+
+def get_job_service() -> JobService:
+    """Get or create JobService singleton"""
+    global _job_service
+    if _job_service is None:
+        _job_service = JobService()
+    return _job_service
@@ -6,6 +6,8 @@ from typing import Optional, Dict, Any
 import openai
 from fastapi import HTTPException, UploadFile
 from app.core.config import settings
+from app.services.image_preparation_service import get_image_preparation_service
+from app.services.analysis_cache_service import create_analysis_cache, prepare_and_lookup_async
 
 
 class OpenAIVisionService:
@@ -22,6 +24,12 @@ class OpenAIVisionService:
         self.model = "gpt-4-vision-preview"
         self.max_tokens = 500
 
+        # 전송 전 이미지 축소/재인코딩
+        self.image_prep = get_image_preparation_service()
+
+        # 유사 이미지(재촬영/재압축)의 분석 결과 재사용 (지각 해시 캐시)
+        self.analysis_cache = create_analysis_cache("openai_analysis")
+
     def _encode_image(self, image_bytes: bytes) -> str:
         """
         이미지를 Base64로 인코딩
@@ -34,6 +42,19 @@ class OpenAIVisionService:
         """
         return base64.b64encode(image_bytes).decode('utf-8')
 
+    async def _image_data_url(self, image_bytes: bytes) -> str:
+        """
+        이미지를 모델 입력 해상도로 축소/재인코딩한 data URL 생성
+
+        Args:
+            image_bytes: 원본 이미지 바이트 데이터
+
+        Returns:
+            실제 MIME 타입이 반영된 data URL
+        """
+        prepared = await self.image_prep.prepare_async(image_bytes)
+        return prepared.to_data_url()
+
     async def analyze_image(
         self,
         image_file: UploadFile,
@@ -50,9 +71,9 @@ class OpenAIVisionService:
             분석 결과 딕셔너리
         """
         try:
-            # 이미지 읽기 및 인코딩
+            # 이미지 읽기 및 축소/인코딩
             image_bytes = await image_file.read()
-            base64_image = self._encode_image(image_bytes)
+            image_url = await self._image_data_url(image_bytes)
 
             # 기본 프롬프트
             if not prompt:
@@ -69,7 +90,7 @@ class OpenAIVisionService:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
+                                    "url": image_url
                                 }
                             }
                         ]
@@ -180,7 +201,16 @@ Format: JSON
 """
 
         try:
-            base64_image = self._encode_image(image_bytes)
+            # 유사 이미지 분석 결과가 있으면 API 호출 생략
+            prepared, phash, cached = await prepare_and_lookup_async(
+                self.image_prep,
+                self.analysis_cache,
+                image_bytes
+            )
+            if cached is not None:
+                return cached
+
+            image_url = prepared.to_data_url()
 
             response = await openai.ChatCompletion.acreate(
                 model=self.model,
@@ -192,7 +222,7 @@ Format: JSON
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
+                                    "url": image_url
                                 }
                             }
                         ]
@@ -207,7 +237,10 @@ Format: JSON
             import json
             try:
                 parsed = json.loads(analysis)
-                return {"success": True, **parsed}
+                result = {"success": True, **parsed}
+                if phash is not None:
+                    self.analysis_cache.set(phash, result)
+                return result
             except:
                 return {
                     "success": False,
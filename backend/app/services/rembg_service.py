@@ -1,13 +1,57 @@
 """
 Rembg 배경 제거 서비스
 """
+import json
+import base64
+import struct
+import asyncio
 import httpx
+from dataclasses import dataclass
 from io import BytesIO
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from fastapi import HTTPException, UploadFile
 from PIL import Image
 
 from app.core.config import settings
+from app.core.cache import TwoTierCache, make_cache_key
+from app.core.http import get_http_client
+from app.core.singleflight import SingleFlight
+
+# 사이드카 폼 파라미터 기본값 (캐시 키에서는 생략)
+# max_side는 사이드카 환경 변수로 기본값이 바뀌므로 포함하지 않음
+_SIDECAR_DEFAULTS = {
+    "alpha_matting": "false",
+    "alpha_matting_foreground_threshold": "240",
+    "alpha_matting_background_threshold": "10",
+    "refine_edges": "false",
+    "output": "png",
+}
+
+_RAW_MASK_HEADER = struct.Struct(">II")
+
+
+@dataclass
+class RawMask:
+    """mask_raw 결과: 8비트 단일 채널 마스크 원시 바이트와 크기"""
+    data: bytes
+    width: int
+    height: int
+
+    def pack(self) -> bytes:
+        """캐시 저장용 직렬화 (크기 헤더 + 원시 바이트)"""
+        return _RAW_MASK_HEADER.pack(self.width, self.height) + self.data
+
+    @classmethod
+    def unpack(cls, packed: bytes) -> "RawMask":
+        width, height = _RAW_MASK_HEADER.unpack_from(packed)
+        return cls(data=packed[_RAW_MASK_HEADER.size:], width=width, height=height)
+
+    def to_image(self) -> Image.Image:
+        """L 모드 PIL 이미지로 변환"""
+        return Image.frombytes("L", (self.width, self.height), self.data)
+
+
+RemoveResult = Union[bytes, RawMask]
 
 
 class RembgService:
@@ -15,7 +59,110 @@ class RembgService:
 
     def __init__(self):
         self.api_url = settings.REMBG_API_URL
-        self.timeout = 60.0  # 60초 타임아웃
+        self.timeout = settings.REMBG_TIMEOUT
+
+        # 입력 이미지 해시 + 파라미터 → 결과 PNG 캐시
+        self.cache: Optional[TwoTierCache] = None
+        if settings.REMBG_CACHE_ENABLED:
+            self.cache = TwoTierCache(
+                namespace="rembg",
+                max_memory_bytes=settings.REMBG_CACHE_MEMORY_BYTES,
+                ttl=settings.REMBG_CACHE_TTL
+            )
+
+        # 같은 이미지/파라미터로 동시에 들어온 요청은 사이드카를 한 번만 호출
+        self._inflight = SingleFlight()
+
+    def _with_defaults(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """설정 기반 공통 파라미터 추가 (축소 마스크 모드 등)"""
+        if settings.REMBG_MAX_SIDE > 0:
+            params = {"max_side": settings.REMBG_MAX_SIDE, "refine_edges": "true", **params}
+        return params
+
+    def _cache_key(self, image_bytes: bytes, params: Dict[str, Any]) -> str:
+        """
+        입력 이미지와 요청 파라미터로 캐시 키 생성
+
+        값은 문자열로 맞추고 사이드카 기본값과 같은 항목은 빼서,
+        단일/배치 경로가 같은 옵션을 다르게 적어도 같은 키가 나오게 한다.
+        """
+        normalized = {
+            name: str(value).lower()
+            for name, value in params.items()
+            if _SIDECAR_DEFAULTS.get(name) != str(value).lower()
+        }
+        return make_cache_key(image_bytes, normalized)
+
+    async def _post_remove(
+        self,
+        filename: str,
+        image_bytes: bytes,
+        content_type: Optional[str],
+        params: Dict[str, Any]
+    ) -> bytes:
+        """
+        /remove 호출 (캐시 히트 시 네트워크 호출 생략, 동시 중복 요청은 병합)
+
+        Args:
+            filename: 파일명
+            image_bytes: 이미지 데이터
+            content_type: 이미지 MIME 타입
+            params: /remove 폼 파라미터
+
+        Returns:
+            배경이 제거된 PNG 이미지 (bytes, mask_raw는 RawMask.pack() 형식)
+        """
+        params = self._with_defaults(params)
+        cache_key = self._cache_key(image_bytes, params)
+        if self.cache is not None:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        return await self._inflight.do(
+            cache_key,
+            self._call_remove,
+            cache_key,
+            filename,
+            image_bytes,
+            content_type,
+            params
+        )
+
+    async def _call_remove(
+        self,
+        cache_key: str,
+        filename: str,
+        image_bytes: bytes,
+        content_type: Optional[str],
+        params: Dict[str, Any]
+    ) -> bytes:
+        """/remove 실제 호출 후 캐시에 저장 (single-flight 리더만 실행)"""
+        client = get_http_client("rembg")
+        response = await client.post(
+            f"{self.api_url}/remove",
+            files={"file": (filename, image_bytes, content_type)},
+            data=params
+        )
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Rembg API error: {response.text}"
+            )
+
+        output_bytes = response.content
+        if params.get("output") == "mask_raw":
+            # 크기는 응답 헤더로만 오므로 바이트와 함께 보관
+            output_bytes = RawMask(
+                data=output_bytes,
+                width=int(response.headers["X-Image-Width"]),
+                height=int(response.headers["X-Image-Height"])
+            ).pack()
+
+        if self.cache is not None:
+            await self.cache.set(cache_key, output_bytes)
+        return output_bytes
 
     async def remove_background(
         self,
@@ -37,22 +184,16 @@ class RembgService:
             # 이미지 파일 읽기
             image_bytes = await image_file.read()
 
-            # Rembg API 호출
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.api_url}/remove",
-                    files={"file": (image_file.filename, image_bytes, image_file.content_type)}
-                )
-
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Rembg API error: {response.text}"
-                    )
-
-                # PNG 형식으로 반환
-                return response.content
+            # Rembg API 호출 (PNG 형식으로 반환)
+            return await self._post_remove(
+                image_file.filename,
+                image_bytes,
+                image_file.content_type,
+                params={}
+            )
 
+        except HTTPException:
+            raise
         except httpx.TimeoutException:
             raise HTTPException(
                 status_code=504,
@@ -67,34 +208,33 @@ class RembgService:
     async def remove_background_from_bytes(
         self,
         image_bytes: bytes,
-        filename: str = "image.png"
-    ) -> bytes:
+        filename: str = "image.png",
+        output: str = "png"
+    ) -> RemoveResult:
         """
         이미지 bytes에서 배경 제거
 
         Args:
             image_bytes: 이미지 데이터
             filename: 파일명 (기본: image.png)
+            output: 출력 형식 ("png", "webp", "mask", "mask_raw")
 
         Returns:
-            배경이 제거된 PNG 이미지 (bytes)
+            배경이 제거된 이미지 (기본 PNG, bytes), mask_raw는 크기가 포함된 RawMask
         """
         try:
-            # Rembg API 호출
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.api_url}/remove",
-                    files={"file": (filename, image_bytes, "image/png")}
-                )
-
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Rembg API error: {response.text}"
-                    )
-
-                return response.content
+            output_bytes = await self._post_remove(
+                filename,
+                image_bytes,
+                "image/png",
+                params={"output": output} if output != "png" else {}
+            )
+            if output == "mask_raw":
+                return RawMask.unpack(output_bytes)
+            return output_bytes
 
+        except HTTPException:
+            raise
         except httpx.TimeoutException:
             raise HTTPException(
                 status_code=504,
@@ -106,6 +246,46 @@ class RembgService:
                 detail=f"Failed to remove background: {str(e)}"
             )
 
+    async def get_mask_from_bytes(
+        self,
+        image_bytes: bytes,
+        filename: str = "image.png"
+    ) -> bytes:
+        """
+        전경 마스크만 추출 (단일 채널 8비트 PNG)
+
+        RGBA 결과보다 인코딩/전송이 훨씬 가볍다. 원본과 합성은 apply_mask()로 나중에 수행.
+
+        Args:
+            image_bytes: 이미지 데이터
+            filename: 파일명
+
+        Returns:
+            그레이스케일 마스크 PNG (bytes)
+        """
+        return await self.remove_background_from_bytes(image_bytes, filename, output="mask")
+
+    def apply_mask(self, image_bytes: bytes, mask_bytes: bytes) -> bytes:
+        """
+        원본 이미지에 마스크를 적용해 RGBA PNG 생성
+
+        Args:
+            image_bytes: 원본 이미지 데이터
+            mask_bytes: get_mask_from_bytes()로 받은 마스크 PNG
+
+        Returns:
+            배경이 제거된 PNG 이미지 (bytes)
+        """
+        image = Image.open(BytesIO(image_bytes)).convert("RGBA")
+        mask = Image.open(BytesIO(mask_bytes)).convert("L")
+        if mask.size != image.size:
+            mask = mask.resize(image.size, Image.BILINEAR)
+        image.putalpha(mask)
+
+        output_buffer = BytesIO()
+        image.save(output_buffer, format="PNG")
+        return output_buffer.getvalue()
+
     async def remove_background_with_alpha(
         self,
         image_file: UploadFile,
@@ -129,30 +309,207 @@ class RembgService:
             image_bytes = await image_file.read()
 
             # Rembg API 호출 (파라미터 포함)
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.api_url}/remove",
-                    files={"file": (image_file.filename, image_bytes, image_file.content_type)},
-                    data={
-                        "alpha_matting": str(alpha_matting).lower(),
-                        "alpha_matting_foreground_threshold": alpha_matting_foreground_threshold,
-                        "alpha_matting_background_threshold": alpha_matting_background_threshold
-                    }
-                )
+            return await self._post_remove(
+                image_file.filename,
+                image_bytes,
+                image_file.content_type,
+                params={
+                    "alpha_matting": str(alpha_matting).lower(),
+                    "alpha_matting_foreground_threshold": alpha_matting_foreground_threshold,
+                    "alpha_matting_background_threshold": alpha_matting_background_threshold
+                }
+            )
 
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Rembg API error: {response.text}"
-                    )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to remove background with alpha: {str(e)}"
+            )
+
+    async def stream_remove_background_batch(
+        self,
+        images: List[Tuple[str, bytes]],
+        alpha_matting: bool = False,
+        alpha_matting_foreground_threshold: int = 240,
+        alpha_matting_background_threshold: int = 10,
+        output: str = "png"
+    ) -> AsyncIterator[Tuple[int, Optional[RemoveResult], Optional[str]]]:
+        """
+        여러 이미지 배경 제거 (/remove/batch, 끝나는 순서대로 결과 수신)
+
+        캐시에 있는 이미지는 즉시 반환하고, 나머지만 사이드카 용량에 맞춘 묶음으로 나눠 전송한다.
+
+        Args:
+            images: (파일명, 이미지 데이터) 목록
+            alpha_matting: Alpha matting 활성화 여부
+            alpha_matting_foreground_threshold: 전경 임계값
+            alpha_matting_background_threshold: 배경 임계값
+            output: 출력 형식 ("png", "webp", "mask", "mask_raw")
 
-                return response.content
+        Yields:
+            (입력 인덱스, 배경이 제거된 이미지(mask_raw는 RawMask) 또는 None, 에러 메시지 또는 None)
+        """
+        params = self._with_defaults({
+            "alpha_matting": str(alpha_matting).lower(),
+            "alpha_matting_foreground_threshold": alpha_matting_foreground_threshold,
+            "alpha_matting_background_threshold": alpha_matting_background_threshold,
+            "output": output
+        })
+
+        # 캐시 히트는 바로 반환, 미스만 배치 요청에 포함 (배치 인덱스 → 입력 인덱스)
+        cache_keys = [self._cache_key(image_bytes, params) for _, image_bytes in images]
+        misses: List[int] = []
+        for index, cache_key in enumerate(cache_keys):
+            cached = await self.cache.get(cache_key) if self.cache is not None else None
+            if cached is not None:
+                yield index, RawMask.unpack(cached) if output == "mask_raw" else cached, None
+            else:
+                misses.append(index)
+
+        if not misses:
+            return
 
+        try:
+            # 사이드카 배치 한도와 대기열 용량을 넘지 않게 나눠서 전송
+            batch_size = await self._batch_size()
+            for start in range(0, len(misses), batch_size):
+                chunk = misses[start:start + batch_size]
+                async for index, output_bytes, error in self._stream_batch_chunk(images, chunk, params):
+                    if output_bytes is not None and self.cache is not None:
+                        await self.cache.set(
+                            cache_keys[index],
+                            output_bytes.pack() if isinstance(output_bytes, RawMask) else output_bytes
+                        )
+                    yield index, output_bytes, error
+
+        except HTTPException:
+            raise
+        except httpx.TimeoutException:
+            raise HTTPException(
+                status_code=504,
+                detail="Batch background removal timed out"
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=500,
-                detail=f"Failed to remove background with alpha: {str(e)}"
+                detail=f"Failed to remove background (batch): {str(e)}"
+            )
+
+    async def _batch_size(self) -> int:
+        """
+        요청당 이미지 수 결정
+
+        설정값(REMBG_BATCH_SIZE)과 사이드카 헬스 체크의 max_batch, 워커 + 대기열 용량 중 최솟값.
+        헬스 체크에 실패하면 설정값을 사용한다.
+        """
+        batch_size = settings.REMBG_BATCH_SIZE
+        try:
+            response = await get_http_client("rembg").get(f"{self.api_url}/")
+            response.raise_for_status()
+            health = response.json()
+            batch_size = min(
+                batch_size,
+                health.get("max_batch", batch_size),
+                health.get("workers", 1) + health.get("max_queue", batch_size)
             )
+        except Exception as e:
+            print(f"⚠️ Rembg health check failed, using REMBG_BATCH_SIZE: {str(e)}")
+        return max(1, batch_size)
+
+    async def _stream_batch_chunk(
+        self,
+        images: List[Tuple[str, bytes]],
+        chunk: List[int],
+        params: Dict[str, Any]
+    ) -> AsyncIterator[Tuple[int, Optional[RemoveResult], Optional[str]]]:
+        """
+        /remove/batch 한 번 호출 (대기열이 가득 차 503이면 Retry-After만큼 기다렸다 재시도)
+
+        Args:
+            images: 전체 입력 목록
+            chunk: 이번 요청에 포함할 입력 인덱스
+            params: /remove/batch 폼 파라미터
+
+        Yields:
+            (입력 인덱스, 결과 또는 None, 에러 메시지 또는 None)
+        """
+        client = get_http_client("rembg")
+        for attempt in range(settings.REMBG_BATCH_RETRIES + 1):
+            async with client.stream(
+                "POST",
+                f"{self.api_url}/remove/batch",
+                files=[
+                    ("files", (images[index][0], images[index][1], "application/octet-stream"))
+                    for index in chunk
+                ],
+                data=params,
+                timeout=self.timeout * len(chunk)
+            ) as response:
+                if response.status_code == 503 and attempt < settings.REMBG_BATCH_RETRIES:
+                    retry_after = float(response.headers.get("retry-after") or 1)
+                    print(f"⏳ Rembg queue full, retrying batch in {retry_after}s")
+                    await asyncio.sleep(retry_after)
+                    continue
+
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise HTTPException(
+                        status_code=response.status_code,
+                        detail=f"Rembg API error: {body.decode('utf-8', 'replace')}"
+                    )
+
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    index = chunk[item["index"]]
+                    if item.get("status") == "ok":
+                        output_bytes = base64.b64decode(item["data"])
+                        if params.get("output") == "mask_raw":
+                            output_bytes = RawMask(output_bytes, item["width"], item["height"])
+                        yield index, output_bytes, None
+                    else:
+                        yield index, None, item.get("error", "Unknown error")
+                return
+
+    async def remove_background_batch(
+        self,
+        images: List[Tuple[str, bytes]],
+        alpha_matting: bool = False,
+        alpha_matting_foreground_threshold: int = 240,
+        alpha_matting_background_threshold: int = 10,
+        output: str = "png"
+    ) -> List[Optional[RemoveResult]]:
+        """
+        여러 이미지 배경 제거 (카탈로그 일괄 처리용)
+
+        Args:
+            images: (파일명, 이미지 데이터) 목록
+            output: 출력 형식 ("png", "webp", "mask", "mask_raw")
+
+        Returns:
+            입력 순서와 같은 결과 목록 (실패한 이미지는 None, mask_raw는 RawMask)
+        """
+        results: List[Optional[RemoveResult]] = [None] * len(images)
+        async for index, output_bytes, error in self.stream_remove_background_batch(
+            images,
+            alpha_matting=alpha_matting,
+            alpha_matting_foreground_threshold=alpha_matting_foreground_threshold,
+            alpha_matting_background_threshold=alpha_matting_background_threshold,
+            output=output
+        ):
+            if error:
+                print(f"❌ Batch background removal failed for #{index}: {error}")
+            results[index] = output_bytes
+        return results
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """결과 캐시 히트/미스 통계"""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.get_stats()}
 
     def validate_image(self, image_bytes: bytes) -> bool:
         """
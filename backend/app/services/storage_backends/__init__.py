@@ -0,0 +1,55 @@
+"""
+저장소 드라이버
+설정으로 local / supabase / s3 중 선택 (STORAGE_BACKEND, TRIAL_STORAGE_BACKEND)
+"""
+from typing import Dict
+
+from app.core.config import settings
+from app.services.storage_backends.base import ObjectStat, StorageBackend
+
+BACKEND_KINDS = ("local", "supabase", "s3")
+
+_backends: Dict[str, StorageBackend] = {}
+
+
+def create_backend(kind: str) -> StorageBackend:
+    """설정값으로 드라이버 생성"""
+    if kind == "local":
+        from app.services.storage_backends.local import LocalBackend
+        return LocalBackend(settings.LOCAL_STORAGE_DIR, settings.LOCAL_STORAGE_BASE_URL)
+
+    if kind == "supabase":
+        from app.services.storage_backends.supabase import SupabaseBackend
+        return SupabaseBackend()
+
+    if kind == "s3":
+        from app.services.storage_backends.s3 import S3Backend
+        return S3Backend(
+            bucket=settings.S3_BUCKET,
+            access_key=settings.S3_ACCESS_KEY_ID,
+            secret_key=settings.S3_SECRET_ACCESS_KEY,
+            region=settings.S3_REGION,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            public_url=settings.S3_PUBLIC_URL,
+            part_size=settings.S3_MULTIPART_PART_SIZE
+        )
+
+    raise ValueError(f"Unknown storage backend '{kind}'. Available: {', '.join(BACKEND_KINDS)}")
+
+
+def get_storage_backend(kind: str) -> StorageBackend:
+    """종류별 드라이버 싱글톤"""
+    backend = _backends.get(kind)
+    if backend is None:
+        backend = create_backend(kind)
+        _backends[kind] = backend
+    return backend
+
+
+__all__ = [
+    "BACKEND_KINDS",
+    "ObjectStat",
+    "StorageBackend",
+    "create_backend",
+    "get_storage_backend",
+]
@@ -0,0 +1,106 @@
+"""
+저장소 드라이버 공통 인터페이스
+모든 드라이버는 저장소 상대 경로(예: blobs/ab/cd/<sha256>.jpg)를 키로 사용
+"""
+import mimetypes
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Optional
+
+import aiofiles
+
+
+@dataclass
+class ObjectStat:
+    """저장된 객체 메타데이터"""
+    path: str
+    size: int
+    etag: Optional[str] = None
+    content_type: Optional[str] = None
+    modified_at: Optional[datetime] = None
+
+
+def guess_content_type(path: str) -> str:
+    """확장자로 Content-Type 추정"""
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+class StorageBackend(ABC):
+    """
+    저장소 드라이버 인터페이스
+
+    없는 객체를 읽으면 FileNotFoundError, 그 밖의 전송 오류는 드라이버 예외를 그대로 올린다.
+    (HTTPException 변환은 FileStorageService에서)
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    async def save_stream(
+        self,
+        path: str,
+        chunks: AsyncIterator[bytes],
+        content_type: Optional[str] = None,
+        size: Optional[int] = None
+    ) -> None:
+        """바이트 스트림을 path에 저장 (있으면 덮어씀, 전체를 메모리에 올리지 않음)"""
+
+    async def save_bytes(self, path: str, content: bytes, content_type: Optional[str] = None) -> None:
+        """바이트를 path에 저장"""
+        async def single() -> AsyncIterator[bytes]:
+            yield content
+
+        await self.save_stream(path, single(), content_type=content_type, size=len(content))
+
+    async def adopt_file(self, path: str, local_path: Path, content_type: Optional[str] = None) -> None:
+        """
+        로컬 임시 파일을 path로 저장
+
+        기본 구현은 파일을 스트리밍 업로드한다. 같은 디스크의 드라이버는 이동으로 대신할 수 있으며,
+        호출한 쪽은 이후 local_path가 남아 있으면 정리해야 한다.
+        """
+        chunk_size = 1024 * 1024
+
+        async def chunks() -> AsyncIterator[bytes]:
+            async with aiofiles.open(local_path, "rb") as f:
+                while chunk := await f.read(chunk_size):
+                    yield chunk
+
+        await self.save_stream(path, chunks(), content_type=content_type, size=local_path.stat().st_size)
+
+    @abstractmethod
+    def open_range(self, path: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        바이트 범위 [start, end] 읽기 (end 포함, None이면 끝까지)
+
+        async generator로 구현하며 청크 단위로 내보낸다.
+        """
+
+    async def read(self, path: str) -> bytes:
+        """객체 전체 읽기"""
+        return b"".join([chunk async for chunk in self.open_range(path)])
+
+    @abstractmethod
+    async def delete_many(self, paths: Iterable[str]) -> int:
+        """여러 객체 삭제 (없는 객체는 무시), 삭제 요청한 개수 반환"""
+
+    @abstractmethod
+    async def stat(self, path: str) -> Optional[ObjectStat]:
+        """객체 메타데이터 (없으면 None)"""
+
+    async def exists(self, path: str) -> bool:
+        return await self.stat(path) is not None
+
+    @abstractmethod
+    async def presign(self, path: str, expires_in: int) -> str:
+        """인증 없이 expires_in초 동안 읽을 수 있는 URL"""
+
+    @abstractmethod
+    def public_url(self, path: str) -> str:
+        """공개 URL"""
+
+    @abstractmethod
+    def path_from_url(self, url: str) -> Optional[str]:
+        """public_url()로 만든 URL에서 상대 경로 추출 (이 저장소 URL이 아니면 None)"""
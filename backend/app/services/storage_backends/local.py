@@ -0,0 +1,128 @@
+"""
+로컬 파일 시스템 저장소 드라이버
+/files 마운트로 공개 제공되는 디렉터리에 저장 (개발 환경, 빠른 로컬 디스크의 체험 데이터)
+"""
+import os
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Optional
+
+import aiofiles
+
+from app.services.storage_backends.base import ObjectStat, StorageBackend
+
+_READ_CHUNK_SIZE = 256 * 1024
+
+
+class LocalBackend(StorageBackend):
+    """로컬 디렉터리 드라이버"""
+
+    name = "local"
+
+    def __init__(self, base_dir: str, base_url: str):
+        """
+        Args:
+            base_dir: 파일 저장 기본 디렉토리
+            base_url: 파일 공개 URL 접두사 (예: http://localhost:8000/files)
+        """
+        self.base_dir = Path(base_dir).resolve()
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url.rstrip("/")
+
+    def full_path(self, path: str) -> Path:
+        """상대 경로 → 절대 경로 (기본 디렉토리 밖을 가리키면 거부)"""
+        full_path = (self.base_dir / path).resolve()
+        if not full_path.is_relative_to(self.base_dir):
+            raise ValueError(f"Path escapes storage root: {path}")
+        return full_path
+
+    def _temp_path(self, full_path: Path) -> Path:
+        return full_path.with_name(f".{full_path.name}.{uuid.uuid4().hex}.tmp")
+
+    async def save_stream(
+        self,
+        path: str,
+        chunks: AsyncIterator[bytes],
+        content_type: Optional[str] = None,
+        size: Optional[int] = None
+    ) -> None:
+        # 임시 파일에 쓴 뒤 교체하므로 동시에 읽는 쪽이 쓰다 만 파일을 보지 않는다
+        full_path = self.full_path(path)
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self._temp_path(full_path)
+        try:
+            async with aiofiles.open(temp_path, "wb") as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+            os.replace(temp_path, full_path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    async def adopt_file(self, path: str, local_path: Path, content_type: Optional[str] = None) -> None:
+        full_path = self.full_path(path)
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            # 같은 파일 시스템이면 복사 없이 이동
+            os.replace(local_path, full_path)
+        except OSError:
+            await super().adopt_file(path, local_path, content_type)
+
+    async def open_range(self, path: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        full_path = self.full_path(path)
+        if not full_path.is_file():
+            raise FileNotFoundError(path)
+
+        remaining = None if end is None else end - start + 1
+        async with aiofiles.open(full_path, "rb") as f:
+            await f.seek(start)
+            while remaining is None or remaining > 0:
+                size = _READ_CHUNK_SIZE if remaining is None else min(_READ_CHUNK_SIZE, remaining)
+                chunk = await f.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    async def read(self, path: str) -> bytes:
+        full_path = self.full_path(path)
+        if not full_path.is_file():
+            raise FileNotFoundError(path)
+        async with aiofiles.open(full_path, "rb") as f:
+            return await f.read()
+
+    async def delete_many(self, paths: Iterable[str]) -> int:
+        count = 0
+        for path in paths:
+            self.full_path(path).unlink(missing_ok=True)
+            count += 1
+        return count
+
+    async def stat(self, path: str) -> Optional[ObjectStat]:
+        try:
+            result = self.full_path(path).stat()
+        except FileNotFoundError:
+            return None
+        return ObjectStat(
+            path=path,
+            size=result.st_size,
+            etag=f'"{result.st_size:x}-{result.st_mtime_ns:x}"',
+            modified_at=datetime.fromtimestamp(result.st_mtime, tz=timezone.utc)
+        )
+
+    async def presign(self, path: str, expires_in: int) -> str:
+        # 로컬 파일은 /files로 공개 제공되므로 서명이 필요 없다
+        return self.public_url(path)
+
+    def public_url(self, path: str) -> str:
+        return f"{self.base_url}/{path}"
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        if url.startswith(f"{self.base_url}/"):
+            return url[len(self.base_url) + 1:]
+        # 호스트가 다르게 저장된 예전 URL
+        marker = "/files/"
+        if marker not in url:
+            return None
+        return url.split(marker, 1)[1]
@@ -0,0 +1,378 @@
+"""
+S3 호환 저장소 드라이버 (AWS S3, MinIO 등)
+SigV4 서명을 직접 계산해 공유 httpx 풀로 REST API 호출 (경로 방식 주소: {endpoint}/{bucket}/{key})
+"""
+import base64
+import hashlib
+import hmac
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from urllib.parse import quote, unquote, urlsplit
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import httpx
+
+from app.core.http import get_http_client
+from app.services.storage_backends.base import ObjectStat, StorageBackend, guess_content_type
+
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+ALGORITHM = "AWS4-HMAC-SHA256"
+
+# S3 멀티파트 업로드의 최소 파트 크기 (마지막 파트 제외)
+MIN_PART_SIZE = 5 * 1024 * 1024
+# DeleteObjects 한 번에 지울 수 있는 최대 키 수
+_DELETE_BATCH_SIZE = 1000
+
+
+def _uri_encode(value: str, safe: str = "") -> str:
+    """SigV4 URI 인코딩 (비예약 문자 A-Z a-z 0-9 - _ . ~ 만 그대로)"""
+    return quote(value, safe=safe)
+
+
+def _canonical_query(params: Dict[str, str]) -> str:
+    return "&".join(f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(params.items()))
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _xml_text(document: bytes, tag: str) -> List[str]:
+    """네임스페이스와 무관하게 태그 텍스트 수집"""
+    root = ElementTree.fromstring(document)
+    return [element.text or "" for element in root.iter() if element.tag.rsplit("}", 1)[-1] == tag]
+
+
+class SigV4Signer:
+    """AWS Signature Version 4 서명기"""
+
+    def __init__(self, access_key: str, secret_key: str, region: str, service: str = "s3"):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.service = service
+
+    def _scope(self, date_stamp: str) -> str:
+        return f"{date_stamp}/{self.region}/{self.service}/aws4_request"
+
+    def _signature(self, date_stamp: str, string_to_sign: str) -> str:
+        key = _hmac(f"AWS4{self.secret_key}".encode("utf-8"), date_stamp)
+        key = _hmac(key, self.region)
+        key = _hmac(key, self.service)
+        key = _hmac(key, "aws4_request")
+        return hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def _string_to_sign(self, amz_date: str, scope: str, canonical_request: str) -> str:
+        return "\n".join([
+            ALGORITHM,
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+        ])
+
+    def sign_headers(
+        self,
+        method: str,
+        canonical_uri: str,
+        query: Dict[str, str],
+        headers: Dict[str, str],
+        payload_hash: str,
+        now: Optional[datetime] = None
+    ) -> Dict[str, str]:
+        """
+        Authorization 헤더 방식 서명
+
+        Args:
+            method: HTTP 메서드
+            canonical_uri: 인코딩된 경로 (/bucket/key)
+            query: 쿼리 파라미터 (인코딩 전)
+            headers: 서명할 헤더 (host 포함)
+            payload_hash: 본문 SHA-256 hex 또는 UNSIGNED-PAYLOAD
+
+        Returns:
+            요청에 그대로 사용할 헤더 (Authorization 포함)
+        """
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date_stamp = now.strftime("%Y%m%d")
+        scope = self._scope(date_stamp)
+
+        signed = {name.lower(): " ".join(str(value).split()) for name, value in headers.items()}
+        signed["x-amz-date"] = amz_date
+        signed["x-amz-content-sha256"] = payload_hash
+        names = sorted(signed)
+        signed_headers = ";".join(names)
+
+        canonical_request = "\n".join([
+            method,
+            canonical_uri,
+            _canonical_query(query),
+            "".join(f"{name}:{signed[name]}\n" for name in names),
+            signed_headers,
+            payload_hash
+        ])
+        signature = self._signature(date_stamp, self._string_to_sign(amz_date, scope, canonical_request))
+
+        signed["authorization"] = (
+            f"{ALGORITHM} Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        return signed
+
+    def presign_query(
+        self,
+        method: str,
+        canonical_uri: str,
+        host: str,
+        expires_in: int,
+        now: Optional[datetime] = None
+    ) -> Dict[str, str]:
+        """쿼리 문자열 방식 서명 (presigned URL), 서명 포함 쿼리 파라미터 반환"""
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date_stamp = now.strftime("%Y%m%d")
+        scope = self._scope(date_stamp)
+
+        query = {
+            "X-Amz-Algorithm": ALGORITHM,
+            "X-Amz-Credential": f"{self.access_key}/{scope}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires_in),
+            "X-Amz-SignedHeaders": "host",
+        }
+        canonical_request = "\n".join([
+            method,
+            canonical_uri,
+            _canonical_query(query),
+            f"host:{host}\n",
+            "host",
+            UNSIGNED_PAYLOAD
+        ])
+        query["X-Amz-Signature"] = self._signature(
+            date_stamp,
+            self._string_to_sign(amz_date, scope, canonical_request)
+        )
+        return query
+
+
+class S3Backend(StorageBackend):
+    """S3 호환 버킷 드라이버"""
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        endpoint_url: Optional[str] = None,
+        public_url: Optional[str] = None,
+        part_size: int = 8 * 1024 * 1024
+    ):
+        """
+        Args:
+            bucket: 버킷 이름
+            access_key / secret_key: 접근 키
+            region: 서명 리전 (MinIO는 보통 us-east-1)
+            endpoint_url: 엔드포인트 (없으면 https://s3.{region}.amazonaws.com)
+            public_url: 공개 읽기 URL 접두사 (CDN 등, 없으면 {endpoint}/{bucket})
+            part_size: 멀티파트 업로드 파트 크기
+        """
+        if not access_key or not secret_key:
+            raise ValueError("S3 access key and secret key must be set in environment variables")
+
+        self.bucket = bucket
+        self.endpoint = (endpoint_url or f"https://s3.{region}.amazonaws.com").rstrip("/")
+        self.host = urlsplit(self.endpoint).netloc
+        self.public_base = (public_url or f"{self.endpoint}/{bucket}").rstrip("/")
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.signer = SigV4Signer(access_key, secret_key, region)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return get_http_client("s3")
+
+    def _canonical_uri(self, path: Optional[str] = None) -> str:
+        uri = f"/{_uri_encode(self.bucket)}"
+        if path is not None:
+            uri += f"/{_uri_encode(path, safe='/')}"
+        return uri
+
+    async def _request(
+        self,
+        method: str,
+        path: Optional[str] = None,
+        query: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        stream: bool = False
+    ) -> httpx.Response:
+        """서명된 요청 전송 (본문이 있으면 SHA-256으로 서명, 없으면 빈 본문 해시)"""
+        query = query or {}
+        canonical_uri = self._canonical_uri(path)
+        payload_hash = hashlib.sha256(content or b"").hexdigest()
+        signed = self.signer.sign_headers(
+            method,
+            canonical_uri,
+            query,
+            {"host": self.host, **(headers or {})},
+            payload_hash
+        )
+
+        url = f"{self.endpoint}{canonical_uri}"
+        if query:
+            url += f"?{_canonical_query(query)}"
+        request = self.client.build_request(method, url, headers=signed, content=content)
+        return await self.client.send(request, stream=stream)
+
+    @staticmethod
+    def _raise_for_error(response: httpx.Response) -> None:
+        # CompleteMultipartUpload 등은 200 응답 본문에 오류를 담기도 한다
+        response.raise_for_status()
+        if response.content and b"<Error>" in response.content:
+            codes = _xml_text(response.content, "Code")
+            raise RuntimeError(f"S3 error: {codes[0] if codes else 'unknown'}")
+
+    async def save_stream(
+        self,
+        path: str,
+        chunks: AsyncIterator[bytes],
+        content_type: Optional[str] = None,
+        size: Optional[int] = None
+    ) -> None:
+        """
+        파트 크기까지만 버퍼링해 작은 객체는 PUT 한 번, 큰 객체는 멀티파트 업로드
+
+        메모리 사용량은 객체 크기와 관계없이 part_size 정도로 유지된다.
+        """
+        content_type = content_type or guess_content_type(path)
+        buffer = bytearray()
+        iterator = chunks.__aiter__()
+
+        async def fill() -> bool:
+            """buffer를 part_size 이상으로 채움, 스트림이 끝나면 False"""
+            while len(buffer) < self.part_size:
+                try:
+                    buffer.extend(await iterator.__anext__())
+                except StopAsyncIteration:
+                    return False
+            return True
+
+        if not await fill():
+            response = await self._request(
+                "PUT", path, headers={"content-type": content_type}, content=bytes(buffer)
+            )
+            self._raise_for_error(response)
+            return
+
+        response = await self._request(
+            "POST", path, query={"uploads": ""}, headers={"content-type": content_type}
+        )
+        self._raise_for_error(response)
+        upload_id = _xml_text(response.content, "UploadId")[0]
+
+        etags: List[str] = []
+        try:
+            more = True
+            while buffer:
+                part = bytes(buffer[:self.part_size])
+                del buffer[:len(part)]
+                response = await self._request(
+                    "PUT",
+                    path,
+                    query={"partNumber": str(len(etags) + 1), "uploadId": upload_id},
+                    content=part
+                )
+                self._raise_for_error(response)
+                etags.append(response.headers["etag"])
+                if more:
+                    more = await fill()
+
+            body = "".join(
+                f"<Part><PartNumber>{number}</PartNumber><ETag>{escape(etag)}</ETag></Part>"
+                for number, etag in enumerate(etags, start=1)
+            )
+            response = await self._request(
+                "POST",
+                path,
+                query={"uploadId": upload_id},
+                headers={"content-type": "application/xml"},
+                content=f"<CompleteMultipartUpload>{body}</CompleteMultipartUpload>".encode("utf-8")
+            )
+            self._raise_for_error(response)
+
+        except BaseException:
+            # 미완성 파트가 저장 공간을 차지하지 않도록 중단
+            try:
+                await self._request("DELETE", path, query={"uploadId": upload_id})
+            except Exception:
+                pass
+            raise
+
+    async def open_range(self, path: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        headers = {}
+        if start or end is not None:
+            headers["range"] = f"bytes={start}-{'' if end is None else end}"
+
+        response = await self._request("GET", path, headers=headers, stream=True)
+        try:
+            if response.status_code == 404:
+                raise FileNotFoundError(path)
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                yield chunk
+        finally:
+            await response.aclose()
+
+    async def delete_many(self, paths: Iterable[str]) -> int:
+        paths = list(paths)
+        for index in range(0, len(paths), _DELETE_BATCH_SIZE):
+            objects = "".join(
+                f"<Object><Key>{escape(path)}</Key></Object>"
+                for path in paths[index:index + _DELETE_BATCH_SIZE]
+            )
+            body = f"<Delete><Quiet>true</Quiet>{objects}</Delete>".encode("utf-8")
+            response = await self._request(
+                "POST",
+                query={"delete": ""},
+                headers={
+                    "content-type": "application/xml",
+                    # DeleteObjects는 Content-MD5 필수
+                    "content-md5": base64.b64encode(hashlib.md5(body).digest()).decode("ascii")
+                },
+                content=body
+            )
+            self._raise_for_error(response)
+        return len(paths)
+
+    async def stat(self, path: str) -> Optional[ObjectStat]:
+        response = await self._request("HEAD", path)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        last_modified = response.headers.get("last-modified")
+        return ObjectStat(
+            path=path,
+            size=int(response.headers.get("content-length") or 0),
+            etag=response.headers.get("etag"),
+            content_type=response.headers.get("content-type"),
+            modified_at=parsedate_to_datetime(last_modified) if last_modified else None
+        )
+
+    async def presign(self, path: str, expires_in: int) -> str:
+        canonical_uri = self._canonical_uri(path)
+        query = self.signer.presign_query("GET", canonical_uri, self.host, expires_in)
+        return f"{self.endpoint}{canonical_uri}?{_canonical_query(query)}"
+
+    def public_url(self, path: str) -> str:
+        return f"{self.public_base}/{quote(path)}"
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        for prefix in (self.public_base, f"{self.endpoint}/{self.bucket}"):
+            if url.startswith(f"{prefix}/"):
+                return unquote(url[len(prefix) + 1:].split("?", 1)[0])
+        return None
@@ -0,0 +1,98 @@
+"""
+Supabase Storage 드라이버
+StorageService(REST API + 공유 httpx 풀) 위에 공통 인터페이스 구현
+"""
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Iterable, List, Optional
+from urllib.parse import quote
+
+from app.services.storage_backends.base import ObjectStat, StorageBackend, guess_content_type
+from app.services.storage_service import StorageService
+
+# 한 번의 삭제 요청에 담는 최대 경로 수
+_DELETE_BATCH_SIZE = 1000
+
+
+class SupabaseBackend(StorageBackend):
+    """Supabase Storage 버킷 드라이버"""
+
+    name = "supabase"
+
+    def __init__(self, service: Optional[StorageService] = None):
+        self.service = service or StorageService()
+
+    async def save_stream(
+        self,
+        path: str,
+        chunks: AsyncIterator[bytes],
+        content_type: Optional[str] = None,
+        size: Optional[int] = None
+    ) -> None:
+        await self.service.upload_content(
+            path,
+            chunks,
+            content_type=content_type or guess_content_type(path),
+            upsert=True,
+            size=size
+        )
+
+    async def open_range(self, path: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        headers = dict(self.service.headers)
+        if start or end is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+
+        async with self.service.client.stream("GET", self.service.object_url(path), headers=headers) as response:
+            # Storage API answers missing objects with 400 or 404
+            if response.status_code in (400, 404):
+                raise FileNotFoundError(path)
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                yield chunk
+
+    async def delete_many(self, paths: Iterable[str]) -> int:
+        paths: List[str] = list(paths)
+        for index in range(0, len(paths), _DELETE_BATCH_SIZE):
+            response = await self.service.client.request(
+                "DELETE",
+                f"{self.service.base_url}/object/{self.service.bucket}",
+                json={"prefixes": paths[index:index + _DELETE_BATCH_SIZE]},
+                headers=self.service.headers
+            )
+            response.raise_for_status()
+        return len(paths)
+
+    async def stat(self, path: str) -> Optional[ObjectStat]:
+        response = await self.service.client.head(self.service.object_url(path), headers=self.service.headers)
+        if response.status_code in (400, 404):
+            return None
+        response.raise_for_status()
+
+        last_modified = response.headers.get("last-modified")
+        return ObjectStat(
+            path=path,
+            size=int(response.headers.get("content-length") or 0),
+            etag=response.headers.get("etag"),
+            content_type=response.headers.get("content-type"),
+            modified_at=parsedate_to_datetime(last_modified) if last_modified else None
+        )
+
+    async def presign(self, path: str, expires_in: int) -> str:
+        response = await self.service.client.post(
+            f"{self.service.base_url}/object/sign/{self.service.bucket}/{quote(path)}",
+            json={"expiresIn": expires_in},
+            headers=self.service.headers
+        )
+        response.raise_for_status()
+        # signedURL은 /object/sign/... 형태의 상대 경로
+        return f"{self.service.base_url}{response.json()['signedURL']}"
+
+    def public_url(self, path: str) -> str:
+        return self.service.get_public_url(path)
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        if not url.startswith(self.service.base_url):
+            return None
+        try:
+            return self.service.path_from_url(url.split("?", 1)[0])
+        except ValueError:
+            return None
@@ -1,24 +1,80 @@
 import os
-from typing import BinaryIO
+import asyncio
+from typing import AsyncIterator, Optional, Union
 from datetime import datetime
+from urllib.parse import quote, unquote
+import httpx
 from fastapi import UploadFile, HTTPException
-from supabase import create_client, Client
 from app.core.config import settings
+from app.core.http import get_http_client
+
+UploadContent = Union[bytes, AsyncIterator[bytes]]
 
 
 class StorageService:
-    """Service for managing file storage with Supabase"""
+    """
+    Service for managing file storage with Supabase
+    Talks to the Storage REST API through the shared pooled async HTTP client,
+    so transfers never block the event loop.
+    """
 
     def __init__(self):
-        """Initialize Supabase client"""
+        """Initialize Storage REST endpoint and auth headers"""
         if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
             raise ValueError("Supabase URL and Key must be set in environment variables")
 
-        self.client: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_KEY
-        )
+        # SUPABASE_STORAGE_URL lets tests point at a local stand-in server
+        self.base_url = (
+            settings.SUPABASE_STORAGE_URL
+            or f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1"
+        ).rstrip("/")
         self.bucket = settings.SUPABASE_BUCKET
+        self.headers = {
+            "Authorization": f"Bearer {settings.SUPABASE_KEY}",
+            "apikey": settings.SUPABASE_KEY
+        }
+        self.part_size = settings.SUPABASE_DOWNLOAD_PART_SIZE
+        # Shared across downloads so large files can't monopolize the pool
+        self.download_slots = asyncio.Semaphore(settings.SUPABASE_DOWNLOAD_CONCURRENCY)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return get_http_client("supabase")
+
+    def object_url(self, file_path: str) -> str:
+        return f"{self.base_url}/object/{self.bucket}/{quote(file_path)}"
+
+    def path_from_url(self, file_url: str) -> str:
+        # Assuming URL format: https://{project}.supabase.co/storage/v1/object/public/{bucket}/{path}
+        path_parts = file_url.split(f"{self.bucket}/", 1)
+        if len(path_parts) < 2:
+            raise ValueError("Invalid file URL")
+        return unquote(path_parts[1])
+
+    async def upload_content(
+        self,
+        file_path: str,
+        content: UploadContent,
+        content_type: str,
+        upsert: bool = False,
+        size: Optional[int] = None
+    ) -> str:
+        """
+        Upload raw bytes or an async byte stream to a path
+        Streams are sent chunked unless the size is known.
+        Returns the public URL of the uploaded object
+        """
+        headers = {
+            **self.headers,
+            "Content-Type": content_type or "application/octet-stream",
+            "x-upsert": "true" if upsert else "false"
+        }
+        if size is not None:
+            headers["Content-Length"] = str(size)
+
+        response = await self.client.post(self.object_url(file_path), content=content, headers=headers)
+        response.raise_for_status()
+        return self.get_public_url(file_path)
 
     async def upload_file(
         self,
@@ -28,33 +84,50 @@ class StorageService:
     ) -> str:
         """
         Upload file to Supabase Storage
+        The upload is streamed in UPLOAD_CHUNK_SIZE pieces instead of read into memory.
         Returns the public URL of the uploaded file
         """
         try:
             # Generate unique filename
             timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            file_ext = os.path.splitext(file.filename)[1]
-            file_path = f"{folder}/{user_id}/{timestamp}_{file.filename}"
+            file_path = f"{folder}/{user_id}/{timestamp}_{os.path.basename(file.filename or 'upload')}"
 
-            # Read file content
-            file_content = await file.read()
+            async def chunks() -> AsyncIterator[bytes]:
+                while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                    yield chunk
 
-            # Upload to Supabase
-            response = self.client.storage.from_(self.bucket).upload(
-                path=file_path,
-                file=file_content,
-                file_options={"content-type": file.content_type}
+            return await self.upload_content(
+                file_path,
+                chunks(),
+                content_type=file.content_type,
+                size=getattr(file, "size", None)
             )
 
-            # Get public URL
-            public_url = self.client.storage.from_(self.bucket).get_public_url(file_path)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to upload file: {str(e)}"
+            )
 
-            return public_url
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        file_path: str,
+        content_type: str = "application/octet-stream",
+        size: Optional[int] = None,
+        upsert: bool = False
+    ) -> str:
+        """
+        Upload an async byte stream to a fixed path without buffering it
+        Returns the public URL of the uploaded file
+        """
+        try:
+            return await self.upload_content(file_path, chunks, content_type, upsert=upsert, size=size)
 
         except Exception as e:
             raise HTTPException(
                 status_code=500,
-                detail=f"Failed to upload file: {str(e)}"
+                detail=f"Failed to upload stream: {str(e)}"
             )
 
     async def upload_bytes(
@@ -74,17 +147,26 @@ class StorageService:
             timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
             file_path = f"{folder}/{user_id}/{timestamp}_{filename}"
 
-            # Upload to Supabase
-            response = self.client.storage.from_(self.bucket).upload(
-                path=file_path,
-                file=file_content,
-                file_options={"content-type": content_type}
-            )
+            return await self.upload_content(file_path, file_content, content_type)
 
-            # Get public URL
-            public_url = self.client.storage.from_(self.bucket).get_public_url(file_path)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to upload bytes: {str(e)}"
+            )
 
-            return public_url
+    async def save_bytes_at(
+        self,
+        file_content: bytes,
+        file_path: str,
+        content_type: str = "image/jpeg"
+    ) -> str:
+        """
+        Upload bytes to a fixed (deterministic) path, overwriting any existing object
+        Returns the public URL of the uploaded file
+        """
+        try:
+            return await self.upload_content(file_path, file_content, content_type, upsert=True)
 
         except Exception as e:
             raise HTTPException(
@@ -92,22 +174,39 @@ class StorageService:
                 detail=f"Failed to upload bytes: {str(e)}"
             )
 
+    async def exists(self, file_path: str) -> bool:
+        """
+        Check whether an object exists at the given path
+        """
+        try:
+            response = await self.client.head(self.object_url(file_path), headers=self.headers)
+            # Storage API answers missing objects with 400 or 404
+            if response.status_code in (400, 404):
+                return False
+            response.raise_for_status()
+            return True
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to check file: {str(e)}"
+            )
+
     async def delete_file(self, file_url: str) -> bool:
         """
         Delete file from Supabase Storage
         Returns True if successful
         """
         try:
-            # Extract file path from URL
-            # Assuming URL format: https://{project}.supabase.co/storage/v1/object/public/{bucket}/{path}
-            path_parts = file_url.split(f"{self.bucket}/")
-            if len(path_parts) < 2:
-                raise ValueError("Invalid file URL")
-
-            file_path = path_parts[1]
+            file_path = self.path_from_url(file_url)
 
-            # Delete from Supabase
-            response = self.client.storage.from_(self.bucket).remove([file_path])
+            response = await self.client.request(
+                "DELETE",
+                f"{self.base_url}/object/{self.bucket}",
+                json={"prefixes": [file_path]},
+                headers=self.headers
+            )
+            response.raise_for_status()
 
             return True
 
@@ -119,25 +218,29 @@ class StorageService:
 
     def get_public_url(self, file_path: str) -> str:
         """Get public URL for a file path"""
-        return self.client.storage.from_(self.bucket).get_public_url(file_path)
+        return f"{self.base_url}/object/public/{self.bucket}/{quote(file_path)}"
 
     async def download_file(self, file_url: str) -> bytes:
         """
         Download file from Supabase Storage
+        Objects larger than SUPABASE_DOWNLOAD_PART_SIZE are fetched as parallel
+        byte ranges when the server supports them.
         Returns file content as bytes
         """
         try:
-            # Extract file path from URL
-            path_parts = file_url.split(f"{self.bucket}/")
-            if len(path_parts) < 2:
-                raise ValueError("Invalid file URL")
+            url = self.object_url(self.path_from_url(file_url))
 
-            file_path = path_parts[1]
+            head = await self.client.head(url, headers=self.headers)
+            head.raise_for_status()
+            size = int(head.headers.get("content-length") or 0)
 
-            # Download from Supabase
-            response = self.client.storage.from_(self.bucket).download(file_path)
+            if size > self.part_size and head.headers.get("accept-ranges") == "bytes":
+                return await self._download_ranges(url, size)
 
-            return response
+            async with self.download_slots:
+                response = await self.client.get(url, headers=self.headers)
+            response.raise_for_status()
+            return response.content
 
         except Exception as e:
             raise HTTPException(
@@ -145,6 +248,40 @@ class StorageService:
                 detail=f"Failed to download file: {str(e)}"
             )
 
+    async def _download_ranges(self, url: str, size: int) -> bytes:
+        """Fetch an object as parallel byte ranges into one buffer"""
+        buffer = bytearray(size)
+
+        async def fetch(start: int) -> None:
+            end = min(start + self.part_size, size) - 1
+            async with self.download_slots:
+                response = await self.client.get(
+                    url,
+                    headers={**self.headers, "Range": f"bytes={start}-{end}"}
+                )
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise ValueError("Storage server ignored the Range header")
+            buffer[start:end + 1] = response.content
+
+        await asyncio.gather(*(fetch(start) for start in range(0, size, self.part_size)))
+        return bytes(buffer)
+
+    async def download_stream(self, file_url: str) -> AsyncIterator[bytes]:
+        """
+        Stream file content from Supabase Storage chunk by chunk
+        Yields bytes without holding the whole object in memory
+        """
+        url = self.object_url(self.path_from_url(file_url))
+        async with self.client.stream("GET", url, headers=self.headers) as response:
+            if response.is_error:
+                raise HTTPException(
+                    status_code=404 if response.status_code in (400, 404) else 500,
+                    detail=f"Failed to download file: HTTP {response.status_code}"
+                )
+            async for chunk in response.aiter_bytes(settings.UPLOAD_CHUNK_SIZE):
+                yield chunk
+
     async def list_files(self, user_id: int, folder: str = "uploads") -> list[dict]:
         """
         List all files for a user in a specific folder
@@ -153,10 +290,14 @@ class StorageService:
         try:
             folder_path = f"{folder}/{user_id}"
 
-            # List files from Supabase
-            response = self.client.storage.from_(self.bucket).list(folder_path)
+            response = await self.client.post(
+                f"{self.base_url}/object/list/{self.bucket}",
+                json={"prefix": folder_path, "limit": 1000, "offset": 0},
+                headers=self.headers
+            )
+            response.raise_for_status()
 
-            return response
+            return response.json()
 
         except Exception as e:
             raise HTTPException(
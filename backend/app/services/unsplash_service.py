@@ -5,6 +5,7 @@ import httpx
 from typing import Optional, List
 from fastapi import HTTPException
 from app.core.config import settings
+from app.core.http import get_http_client
 
 
 class UnsplashService:
@@ -16,7 +17,6 @@ class UnsplashService:
 
         self.access_key = settings.UNSPLASH_ACCESS_KEY
         self.base_url = "https://api.unsplash.com"
-        self.timeout = 10.0
 
     async def search_photos(
         self,
@@ -60,19 +60,19 @@ class UnsplashService:
             if orientation:
                 params["orientation"] = orientation
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/search/photos",
-                    params=params
-                )
+            client = get_http_client("unsplash")
+            response = await client.get(
+                f"{self.base_url}/search/photos",
+                params=params
+            )
 
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Unsplash API error: {response.text}"
-                    )
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail=f"Unsplash API error: {response.text}"
+                )
 
-                return response.json()
+            return response.json()
 
         except httpx.TimeoutException:
             raise HTTPException(
@@ -113,23 +113,23 @@ class UnsplashService:
             if orientation:
                 params["orientation"] = orientation
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/photos/random",
-                    params=params
-                )
+            client = get_http_client("unsplash")
+            response = await client.get(
+                f"{self.base_url}/photos/random",
+                params=params
+            )
 
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Unsplash API error: {response.text}"
-                    )
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail=f"Unsplash API error: {response.text}"
+                )
 
-                data = response.json()
-                # 단일 사진일 경우 리스트로 변환
-                if isinstance(data, dict):
-                    return [data]
-                return data
+            data = response.json()
+            # 단일 사진일 경우 리스트로 변환
+            if isinstance(data, dict):
+                return [data]
+            return data
 
         except Exception as e:
             raise HTTPException(
@@ -148,19 +148,19 @@ class UnsplashService:
             사진 객체
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/photos/{photo_id}",
-                    params={"client_id": self.access_key}
-                )
+            client = get_http_client("unsplash")
+            response = await client.get(
+                f"{self.base_url}/photos/{photo_id}",
+                params={"client_id": self.access_key}
+            )
 
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Unsplash API error: {response.text}"
-                    )
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail=f"Unsplash API error: {response.text}"
+                )
 
-                return response.json()
+            return response.json()
 
         except Exception as e:
             raise HTTPException(
@@ -180,13 +180,13 @@ class UnsplashService:
             성공 여부
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    download_location,
-                    params={"client_id": self.access_key}
-                )
+            client = get_http_client("unsplash")
+            response = await client.get(
+                download_location,
+                params={"client_id": self.access_key}
+            )
 
-                return response.status_code == 200
+            return response.status_code == 200
 
         except Exception as e:
             print(f"Failed to trigger download: {str(e)}")
@@ -208,23 +208,23 @@ class UnsplashService:
             컬렉션 리스트
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/collections",
-                    params={
-                        "page": page,
-                        "per_page": min(per_page, 30),
-                        "client_id": self.access_key
-                    }
-                )
+            client = get_http_client("unsplash")
+            response = await client.get(
+                f"{self.base_url}/collections",
+                params={
+                    "page": page,
+                    "per_page": min(per_page, 30),
+                    "client_id": self.access_key
+                }
+            )
 
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Unsplash API error: {response.text}"
-                    )
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail=f"Unsplash API error: {response.text}"
+                )
 
-                return response.json()
+            return response.json()
 
         except Exception as e:
             raise HTTPException(
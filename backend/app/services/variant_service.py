@@ -0,0 +1,430 @@
+"""
+파생 이미지(플랫폼별 내보내기 변형 / 목록 썸네일) 렌더링 서비스
+원본 하나를 한 번 디코딩해 모든 크기를 생성하고 결정적 경로에 저장 (지연 생성)
+"""
+import io
+import math
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from fastapi import HTTPException
+from PIL import Image, ImageFilter, ImageOps
+
+from app.core.config import settings
+from app.core.executors import run_in_process
+from app.core.singleflight import SingleFlight
+from app.services.file_storage_service import get_file_storage
+
+# 렌더링 방식이 바뀌면 올려서 기존 경로를 무효화 (내보내기 변형 / 썸네일 각각)
+VARIANTS_VERSION = 3
+THUMBNAILS_VERSION = 2
+
+# 플랫폼별 내보내기 크기 (너비, 높이)
+VARIANT_PRESETS: Dict[str, Tuple[int, int]] = {
+    "instagram_square": (1080, 1080),
+    "instagram_portrait": (1080, 1350),
+    "facebook_feed": (1200, 630),
+    "kakao_feed": (800, 400),
+    "kakao_square": (800, 800),
+}
+
+# 목록/갤러리용 썸네일 너비 (WebP, 원본보다 크게 확대하지 않음)
+THUMBNAIL_WIDTHS: Tuple[int, ...] = (160, 320, 640)
+
+# 목록 조회에서 예약한 썸네일 생성 상태를 기억할 최대 원본 수
+_BACKFILL_MAX_ENTRIES = 10000
+_BACKFILL_PENDING = "pending"
+
+# 투명도를 담을 수 있는 출력 형식 ("width" 모드에서만 알파 유지)
+ALPHA_FORMATS = ("PNG", "WEBP")
+
+# EXIF Orientation 중 가로/세로가 바뀌는 값
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+# ===== 렌더링 (프로세스 풀에서 실행) =====
+def _oriented_size(image: Image.Image) -> Tuple[int, int]:
+    """EXIF 회전을 반영한 표시 크기"""
+    width, height = image.size
+    if image.getexif().get(0x0112) in _TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def _scale_for(spec: Dict[str, Any], width: int, height: int) -> float:
+    """원본 대비 필요한 축척"""
+    if spec["mode"] == "width":
+        return min(1.0, spec["width"] / width)
+    fit_scale = min(spec["width"] / width, spec["height"] / height)
+    if spec.get("fill") == "photo":
+        # _fill_photo()와 같은 축척 (일부를 잘라내므로 fit보다 크게)
+        cover_scale = max(spec["width"] / width, spec["height"] / height)
+        return min(cover_scale, fit_scale / (1 - spec["max_crop"]))
+    return fit_scale
+
+
+def _pad_with_edges(image: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """
+    이미지를 size 캔버스 중앙에 두고 남는 영역을 가장자리 픽셀을 늘려 채움
+
+    단색/그라데이션 배경은 자연스럽게 이어지고, 상품은 잘리지 않는다.
+    """
+    target_width, target_height = size
+    width, height = image.size
+    x, y = (target_width - width) // 2, (target_height - height) // 2
+
+    canvas = Image.new("RGB", size)
+    canvas.paste(image, (x, y))
+
+    if y > 0:
+        canvas.paste(image.crop((0, 0, width, 1)).resize((width, y)), (x, 0))
+    bottom = target_height - (y + height)
+    if bottom > 0:
+        canvas.paste(image.crop((0, height - 1, width, height)).resize((width, bottom)), (x, y + height))
+    if x > 0:
+        canvas.paste(canvas.crop((x, 0, x + 1, target_height)).resize((x, target_height)), (0, 0))
+    right = target_width - (x + width)
+    if right > 0:
+        edge = canvas.crop((x + width - 1, 0, x + width, target_height))
+        canvas.paste(edge.resize((right, target_height)), (x + width, 0))
+
+    return canvas
+
+
+def _fill_photo(image: Image.Image, size: Tuple[int, int], max_crop: float) -> Image.Image:
+    """
+    사진 배경용 채우기: 가장자리를 늘리면 사진이 번져 보이므로 잘라서(cover) 채움
+
+    상품이 잘리지 않도록 넘치는 쪽은 최대 max_crop 비율까지만 중앙을 기준으로 자르고,
+    그래도 남는 영역은 같은 사진을 흐리게 확대한 배경으로 채운다.
+    """
+    target_width, target_height = size
+    fit_scale = min(target_width / image.width, target_height / image.height)
+    cover_scale = max(target_width / image.width, target_height / image.height)
+    scale = min(cover_scale, fit_scale / (1 - max_crop))
+
+    scaled_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    scaled = image.resize(scaled_size, Image.LANCZOS) if scaled_size != image.size else image
+    crop_width, crop_height = min(scaled.width, target_width), min(scaled.height, target_height)
+    left, top = (scaled.width - crop_width) // 2, (scaled.height - crop_height) // 2
+    cropped = scaled.crop((left, top, left + crop_width, top + crop_height))
+    if cropped.size == size:
+        return cropped
+
+    # 흐린 배경은 작게 만들어 블러한 뒤 확대 (큰 반경 블러를 원본 크기에서 하지 않음)
+    small_size = (max(1, target_width // 8), max(1, target_height // 8))
+    backdrop = ImageOps.fit(image, small_size, Image.BILINEAR).filter(ImageFilter.GaussianBlur(4))
+    backdrop = backdrop.resize(size, Image.BILINEAR)
+    backdrop.paste(cropped, ((target_width - crop_width) // 2, (target_height - crop_height) // 2))
+    return backdrop
+
+
+def _encode(image: Image.Image, output_format: str, quality: int) -> bytes:
+    if image.mode == "RGBa":
+        image = image.convert("RGBA")
+    buffer = io.BytesIO()
+    if output_format == "JPEG":
+        image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, format=output_format, quality=quality)
+    return buffer.getvalue()
+
+
+def render_variants(source: bytes, specs: List[Dict[str, Any]]) -> Dict[str, bytes]:
+    """
+    한 번의 디코딩으로 여러 크기의 변형 생성
+
+    1. 가장 큰 변형에 필요한 해상도로 축소 디코딩 (JPEG DCT 스케일링)
+    2. 그 크기로 한 번 리샘플링한 중간 이미지를 만들고
+    3. 모든 변형을 중간 이미지에서 생성
+
+    모든 변형이 "width" 모드 + PNG/WEBP이면 투명도를 유지하고, 그 밖에는 흰 배경에 합친다.
+
+    Args:
+        source: 원본 이미지 바이트
+        specs: [{"name", "mode": "fit"|"width", "width", "height"(fit), "format", "quality",
+                 "fill": "edges"|"photo"(fit, 기본 edges), "max_crop"(photo)}]
+
+    Returns:
+        {name: 인코딩된 이미지 바이트}
+    """
+    image = Image.open(io.BytesIO(source))
+    width, height = _oriented_size(image)
+
+    scale = min(1.0, max(_scale_for(spec, width, height) for spec in specs))
+    base_size = (max(1, math.ceil(width * scale)), max(1, math.ceil(height * scale)))
+
+    # draft는 회전 전 좌표계 기준
+    draft_size = base_size if image.size == (width, height) else base_size[::-1]
+    image.draft("RGB", draft_size)
+    image = ImageOps.exif_transpose(image)
+
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    keep_alpha = has_alpha and all(
+        spec["mode"] == "width" and spec["format"] in ALPHA_FORMATS for spec in specs
+    )
+    if keep_alpha:
+        # 투명도 유지: 프리멀티플라이드 알파로 리샘플링해 가장자리 번짐 방지
+        image = image.convert("RGBA").convert("RGBa")
+    elif has_alpha:
+        rgba = image.convert("RGBA")
+        image = Image.new("RGB", rgba.size, (255, 255, 255))
+        image.paste(rgba, mask=rgba.getchannel("A"))
+    else:
+        image = image.convert("RGB")
+
+    # 공유 중간 이미지 (큰 축소는 reduce()로 먼저 줄인 뒤 LANCZOS)
+    if image.size != base_size:
+        image = image.resize(base_size, Image.LANCZOS, reducing_gap=3.0)
+
+    rendered: Dict[str, bytes] = {}
+    for spec in specs:
+        if spec["mode"] == "width":
+            target_width = min(spec["width"], image.width)
+            size = (target_width, max(1, round(image.height * target_width / image.width)))
+            variant = image.resize(size, Image.LANCZOS) if size != image.size else image
+        elif spec.get("fill") == "photo":
+            size = (spec["width"], spec["height"])
+            variant = _fill_photo(image, size, spec["max_crop"])
+        else:
+            size = (spec["width"], spec["height"])
+            fit_scale = min(size[0] / image.width, size[1] / image.height)
+            fitted_size = (
+                min(size[0], max(1, round(image.width * fit_scale))),
+                min(size[1], max(1, round(image.height * fit_scale)))
+            )
+            fitted = image.resize(fitted_size, Image.LANCZOS) if fitted_size != image.size else image
+            variant = _pad_with_edges(fitted, size) if fitted_size != size else fitted
+
+        rendered[spec["name"]] = _encode(variant, spec["format"], spec["quality"])
+
+    return rendered
+
+
+# ===== 서비스 =====
+class VariantService:
+    """플랫폼별 내보내기 이미지 / 목록 썸네일 지연 생성/저장 서비스"""
+
+    def __init__(self):
+        self.storage = get_file_storage()
+        self.quality = settings.VARIANT_JPEG_QUALITY
+        self.thumbnail_quality = settings.THUMBNAIL_WEBP_QUALITY
+        self.thumbnail_retry_interval = settings.THUMBNAIL_RETRY_INTERVAL
+        # 같은 원본에 대한 동시 첫 요청은 한 번만 렌더링
+        self._inflight = SingleFlight()
+        # 목록 조회에서 예약한 백그라운드 썸네일 생성 (GC 방지용 참조)
+        self._background_tasks: Set[asyncio.Task] = set()
+        # 작업 결과에 썸네일이 없는 원본 → 생성된 URL / 진행 중 / 마지막 실패 시각 (monotonic)
+        self._backfill: "OrderedDict[str, Union[Dict[str, str], str, float]]" = OrderedDict()
+
+    def _source_key(self, source_path: str, version: int = VARIANTS_VERSION) -> str:
+        """원본 경로 → 결정적 변형 디렉터리 키"""
+        return hashlib.sha256(f"{source_path}:{version}".encode("utf-8")).hexdigest()[:32]
+
+    def variant_path(self, source_path: str, preset: str, version: int = VARIANTS_VERSION) -> str:
+        """변형 저장 경로: variants/{원본 키}/{프리셋}.jpg"""
+        return f"variants/{self._source_key(source_path, version)}/{preset}.jpg"
+
+    def _specs(self, photo_background: bool = False) -> List[Dict[str, Any]]:
+        # 사진 배경은 잘라서 채우되, 합성 여백(양쪽 COMPOSITE_PADDING) 안에서만 잘라 상품은 유지
+        fill = {}
+        if photo_background:
+            fill = {"fill": "photo", "max_crop": min(0.5, 2 * settings.COMPOSITE_PADDING)}
+        return [
+            {
+                "name": name, "mode": "fit", "width": width, "height": height,
+                "format": "JPEG", "quality": self.quality, **fill
+            }
+            for name, (width, height) in VARIANT_PRESETS.items()
+        ]
+
+    async def get_variant_url(self, source_url: str, preset: str, photo_background: bool = False) -> str:
+        """
+        변형 이미지 URL 반환 (없으면 모든 프리셋을 한 번에 렌더링해 저장)
+
+        Args:
+            source_url: 원본(합성) 이미지 URL
+            preset: VARIANT_PRESETS 키
+            photo_background: 사진(Unsplash) 배경 합성 여부 (가장자리 늘리기 대신 잘라서 채움)
+
+        Returns:
+            정적으로 제공되는 변형 이미지 URL
+        """
+        if preset not in VARIANT_PRESETS:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Unknown variant preset. Available: {', '.join(VARIANT_PRESETS)}"
+            )
+
+        source_path = self.storage.path_from_url(source_url)
+        if source_path is None:
+            raise HTTPException(status_code=400, detail="Variants are only available for stored images")
+
+        path = self.variant_path(source_path, preset)
+        if not await self.storage.exists(path):
+            await self._inflight.do(self._source_key(source_path), self._render_all, source_path, photo_background)
+
+        return self.storage.get_file_url(path)
+
+    async def _render_all(self, source_path: str, photo_background: bool = False) -> None:
+        """모든 프리셋 렌더링 후 저장 (single-flight 리더만 실행)"""
+        source = await self.storage.read_file(source_path)
+        rendered = await run_in_process(render_variants, source, self._specs(photo_background))
+        await asyncio.gather(*(
+            self.storage.save_bytes_at(data, self.variant_path(source_path, name))
+            for name, data in rendered.items()
+        ))
+
+    async def delete_derived(self, source_path: str) -> None:
+        """
+        원본에서 파생된 변형/썸네일 삭제 (이전 버전 경로 포함, 없는 파일은 무시)
+
+        Args:
+            source_path: 원본 상대 경로
+        """
+        paths = [
+            self.variant_path(source_path, preset, version)
+            for version in range(1, VARIANTS_VERSION + 1)
+            for preset in VARIANT_PRESETS
+        ] + [
+            self.thumbnail_path(source_path, width, version)
+            for version in range(1, THUMBNAILS_VERSION + 1)
+            for width in THUMBNAIL_WIDTHS
+        ]
+        await self.storage.delete_paths(paths)
+
+    # ===== 썸네일 =====
+    def thumbnail_path(self, source_path: str, width: int, version: int = THUMBNAILS_VERSION) -> str:
+        """썸네일 저장 경로: thumbnails/{원본 키}/{너비}.webp"""
+        return f"thumbnails/{self._source_key(source_path, version)}/{width}.webp"
+
+    def _thumbnail_specs(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": str(width), "mode": "width", "width": width, "format": "WEBP", "quality": self.thumbnail_quality}
+            for width in THUMBNAIL_WIDTHS
+        ]
+
+    def _source_path(self, source_url: str) -> str:
+        source_path = self.storage.path_from_url(source_url)
+        if source_path is None:
+            raise HTTPException(status_code=400, detail="Thumbnails are only available for stored images")
+        return source_path
+
+    def _thumbnail_urls(self, source_path: str) -> Dict[str, str]:
+        return {
+            str(width): self.storage.get_file_url(self.thumbnail_path(source_path, width))
+            for width in THUMBNAIL_WIDTHS
+        }
+
+    async def generate_thumbnails(self, source_url: str) -> Dict[str, str]:
+        """
+        모든 너비의 썸네일 생성 (이미 있으면 건너뜀)
+
+        Args:
+            source_url: 원본 이미지 URL
+
+        Returns:
+            {너비: 썸네일 URL}
+        """
+        source_path = self._source_path(source_url)
+        if not await self.storage.exists(self.thumbnail_path(source_path, THUMBNAIL_WIDTHS[-1])):
+            await self._inflight.do(
+                f"thumbnails:{self._source_key(source_path, THUMBNAILS_VERSION)}",
+                self._render_thumbnails,
+                source_path
+            )
+        return self._thumbnail_urls(source_path)
+
+    async def get_thumbnail_url(self, source_url: str, width: int) -> str:
+        """
+        썸네일 URL 반환 (없으면 모든 너비를 생성)
+
+        Args:
+            source_url: 원본 이미지 URL
+            width: THUMBNAIL_WIDTHS 중 하나
+
+        Returns:
+            정적으로 제공되는 썸네일 URL
+        """
+        if width not in THUMBNAIL_WIDTHS:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Unknown thumbnail width. Available: {', '.join(map(str, THUMBNAIL_WIDTHS))}"
+            )
+        return (await self.generate_thumbnails(source_url))[str(width)]
+
+    def get_listing_thumbnail_urls(
+        self,
+        source_url: str,
+        job_result: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, str]]:
+        """
+        목록 조회용 썸네일 URL (저장소를 조회하지 않음)
+
+        작업 파이프라인이 남긴 결과(job.results["thumbnails"])를 그대로 사용한다.
+        결과가 없는 이미지(파이프라인 이전 업로드 등)는 백그라운드 생성을 원본당 한 번만 예약하고
+        None을 반환하며, 생성에 실패한 원본은 THUMBNAIL_RETRY_INTERVAL 동안 다시 시도하지 않는다.
+
+        Args:
+            source_url: 썸네일 원본 이미지 URL
+            job_result: 최근 작업의 thumbnails 단계 결과 ({"urls": {...}})
+        """
+        if job_result and job_result.get("urls"):
+            return job_result["urls"]
+
+        source_path = self.storage.path_from_url(source_url)
+        if source_path is None:
+            return None
+
+        state = self._backfill.get(source_path)
+        if isinstance(state, dict):
+            self._backfill.move_to_end(source_path)
+            return state
+        if state == _BACKFILL_PENDING:
+            return None
+        if state is not None and time.monotonic() - state < self.thumbnail_retry_interval:
+            return None
+
+        self._set_backfill(source_path, _BACKFILL_PENDING)
+        task = asyncio.create_task(self._generate_in_background(source_url, source_path))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return None
+
+    def _set_backfill(self, source_path: str, state: Union[Dict[str, str], str, float]) -> None:
+        self._backfill[source_path] = state
+        self._backfill.move_to_end(source_path)
+        while len(self._backfill) > _BACKFILL_MAX_ENTRIES:
+            self._backfill.popitem(last=False)
+
+    async def _generate_in_background(self, source_url: str, source_path: str) -> None:
+        try:
+            urls = await self.generate_thumbnails(source_url)
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            print(f"⚠️ Thumbnail generation failed for {source_url}: {detail}")
+            self._set_backfill(source_path, time.monotonic())
+        else:
+            self._set_backfill(source_path, urls)
+
+    async def _render_thumbnails(self, source_path: str) -> None:
+        """모든 너비 렌더링 후 저장 (single-flight 리더만 실행)"""
+        source = await self.storage.read_file(source_path)
+        rendered = await run_in_process(render_variants, source, self._thumbnail_specs())
+        # 가장 큰 너비를 마지막에 저장 (존재 확인 기준)
+        for width in THUMBNAIL_WIDTHS:
+            await self.storage.save_bytes_at(rendered[str(width)], self.thumbnail_path(source_path, width))
+
+
+# Singleton instance
+_variant_service: Optional[VariantService] = None
+
+
+def get_variant_service() -> VariantService:
+    """Get or create VariantService singleton"""
+    global _variant_service
+    if _variant_service is None:
+        _variant_service = VariantService()
+    return _variant_service
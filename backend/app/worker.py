@@ -0,0 +1,74 @@
+"""
+이미지 처리 워커
+Redis 큐(REDIS_URL)에서 작업을 꺼내 배경 제거 → 합성 → 썸네일 → 문구 생성 단계를 실행 (API 서버와 별도 프로세스)
+
+실행: python -m app.worker
+"""
+import asyncio
+import signal
+
+from app.core.config import settings
+from app.core.cache import close_redis
+from app.core.database import create_db_and_tables
+from app.core.http import init_http_clients, close_http_clients
+from app.core.queue import dequeue_job, close_queue_redis
+from app.core.executors import shutdown_process_pool
+from app.services.caption_cache_service import get_caption_cache
+from app.services.job_service import get_job_service
+
+
+async def worker_loop(index: int, stop: asyncio.Event) -> None:
+    """큐에서 작업을 하나씩 꺼내 실행 (stop 설정 시 현재 작업을 마치고 종료)"""
+    job_service = get_job_service()
+    while not stop.is_set():
+        try:
+            job_id = await dequeue_job(timeout=5)
+        except Exception as e:
+            print(f"⚠️ Worker {index}: queue error: {e}")
+            await asyncio.sleep(settings.JOB_RETRY_BACKOFF)
+            continue
+
+        if job_id is None:
+            continue
+
+        try:
+            await job_service.run_job(job_id)
+        except Exception as e:
+            # 단계 오류는 run_job에서 처리되므로 여기까지 오는 것은 DB/큐 장애
+            print(f"❌ Worker {index}: job {job_id} crashed: {e}")
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await create_db_and_tables()
+    await init_http_clients()
+
+    requeued = await get_job_service().requeue_stale_jobs()
+    print(
+        f"🚀 Image job worker started "
+        f"(queue={settings.JOB_QUEUE_NAME}, concurrency={settings.JOB_WORKER_CONCURRENCY}, requeued={requeued})"
+    )
+
+    try:
+        await asyncio.gather(*(
+            worker_loop(index, stop)
+            for index in range(settings.JOB_WORKER_CONCURRENCY)
+        ))
+    finally:
+        # 버퍼에 남은 캐시 통계를 보낸 뒤 공유 연결 종료
+        caption_cache = get_caption_cache()
+        if caption_cache is not None:
+            await caption_cache.flush_stats()
+        await close_http_clients()
+        await close_queue_redis()
+        await close_redis()
+        shutdown_process_pool()
+        print("👋 Image job worker stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())